@@ -0,0 +1,303 @@
+"""Measure the throughput of the formatting pipeline on synthetic logs
+
+Each formatter is given a log generated by :mod:`loggen` that matches its profile,
+the log goes through every stage of the pipeline separately (split the bytes into lines,
+parse the lines, format them, print the summary) and then through ``uecli format``
+like a user would run it. Every case runs in a new process so its peak RSS is its own.
+
+The results are saved as JSON, give a previous result to ``--compare``
+to fail when a case got slower than ``--tolerance``.
+
+.. code-block:: console
+
+   python benchmarks/bench_formatter.py --lines 1000000 --output before.json
+   git checkout my-branch
+   python benchmarks/bench_formatter.py --lines 1000000 --output after.json --compare before.json
+
+"""
+import argparse
+import contextlib
+import json
+import multiprocessing
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from loggen import generate
+
+from uetools.core.run import LineSplitter, format_stream
+from uetools.format.base import Formatter
+from uetools.format.cooking import CookingFormatter
+from uetools.format.sink import TerminalSink
+from uetools.format.tests import TestFormatter
+
+# name: (formatter, profile of uecli format, kind of log)
+CASES = {
+    "Formatter": (Formatter, None, "generic"),
+    "CookingFormatter": (CookingFormatter, "cooking", "cook"),
+    "TestFormatter": (TestFormatter, "tests", "tests"),
+}
+
+READ_SIZE = 1024 * 1024
+
+
+def peak_rss():
+    """Peak resident memory of this process in bytes"""
+    try:
+        import resource
+    except ImportError:
+        import psutil
+
+        return psutil.Process().memory_info().peak_wset
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    # kilobytes on linux, bytes on macOS
+    if sys.platform == "darwin":
+        return peak
+    return peak * 1024
+
+
+@contextlib.contextmanager
+def devnull_stdout():
+    stdout = sys.stdout
+
+    with open(os.devnull, "w", encoding="utf-8") as null:
+        sys.stdout = null
+        try:
+            yield null
+        finally:
+            sys.stdout = stdout
+
+
+def new_formatter(cls, stream):
+    fmt = cls(24)
+    fmt.set_sink(TerminalSink(stream, color=False))
+
+    if isinstance(fmt, CookingFormatter):
+        fmt.progress.clock = None
+
+    return fmt
+
+
+def bench_stages(name, path):
+    """Time each stage of the pipeline on its own"""
+    cls, _, _ = CASES[name]
+    stages = {}
+
+    start = time.perf_counter()
+    splitter = LineSplitter()
+    lines = []
+    with open(path, "rb") as file:
+        while chunk := file.read(READ_SIZE):
+            lines.extend(splitter.feed(chunk))
+    lines.extend(splitter.finish())
+    stages["split"] = time.perf_counter() - start
+
+    with devnull_stdout() as null:
+        fmt = new_formatter(cls, null)
+
+        start = time.perf_counter()
+        tokens = [fmt.parse(line) for line in lines]
+        stages["parse"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for line, data in zip(lines, tokens):
+            fmt.match_tokens(line, data)
+        fmt.flush()
+        stages["format"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        fmt.summary()
+        fmt.flush()
+        stages["summary"] = time.perf_counter() - start
+
+    return len(lines), stages
+
+
+def bench_stream(name, path):
+    """Time :func:`format_stream`, what ``popen_with_format`` does with the output of UE"""
+    cls, _, _ = CASES[name]
+
+    with devnull_stdout() as null, open(path, "rb") as file:
+        fmt = new_formatter(cls, null)
+
+        start = time.perf_counter()
+        format_stream(fmt, file)
+        fmt.summary()
+        fmt.flush()
+        return time.perf_counter() - start
+
+
+def bench_cli(name, path):
+    """Time ``uecli format --file``"""
+    from uetools.core.cli import main
+
+    _, profile, _ = CASES[name]
+
+    argv = ["format", "--file", path]
+    if profile is not None:
+        argv += ["--profile", profile]
+
+    with devnull_stdout():
+        start = time.perf_counter()
+        main(argv)
+        return time.perf_counter() - start
+
+
+BENCHMARKS = {
+    "stages": bench_stages,
+    "stream": bench_stream,
+    "cli": bench_cli,
+}
+
+
+def run_case(benchmark, name, path):
+    """Run in a new process, returns the timings along with the peak memory"""
+    result = {"benchmark": benchmark, "formatter": name}
+    baseline = peak_rss()
+
+    output = BENCHMARKS[benchmark](name, path)
+
+    if benchmark == "stages":
+        result["lines"], result["stages"] = output
+        result["seconds"] = sum(output[1].values())
+    else:
+        result["seconds"] = output
+
+    result["peak_rss"] = peak_rss()
+    result["baseline_rss"] = baseline
+    return result
+
+
+def commit():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            stderr=subprocess.DEVNULL,
+            text=True,
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, previous, tolerance):
+    """Print the speedup of each case, returns the cases that got slower than the tolerance"""
+    before = {(r["benchmark"], r["formatter"]): r for r in previous["results"]}
+    regressions = []
+
+    print()
+    print(f"{'Compared to ' + str(previous['commit']):<40} {'ratio':>8}")
+    for result in results:
+        key = (result["benchmark"], result["formatter"])
+
+        if key not in before:
+            continue
+
+        ratio = result["lines_per_sec"] / before[key]["lines_per_sec"]
+        flag = ""
+        if ratio < 1 - tolerance:
+            flag = "  REGRESSION"
+            regressions.append(key)
+
+        print(f"{' '.join(key):<40} {ratio:8.2f}x{flag}")
+
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--lines", type=int, default=500_000)
+    parser.add_argument("--categories", type=int, default=16)
+    parser.add_argument("--warnings", type=float, default=0.05)
+    parser.add_argument("--errors", type=float, default=0.005)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--formatter", choices=list(CASES), action="append")
+    parser.add_argument("--benchmark", choices=list(BENCHMARKS), action="append")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", type=str, default=None)
+    parser.add_argument("--compare", type=str, default=None)
+    parser.add_argument("--tolerance", type=float, default=0.1)
+    args = parser.parse_args()
+
+    formatters = args.formatter or list(CASES)
+    benchmarks = args.benchmark or list(BENCHMARKS)
+    results = []
+
+    # Every case gets a new interpreter, so nothing is cached and the peak RSS is its own
+    context = multiprocessing.get_context("spawn")
+
+    with tempfile.TemporaryDirectory() as folder:
+        print(f"{'Case':<30} {'lines/s':>12} {'seconds':>8} {'peak RSS':>10}  stages")
+
+        for name in formatters:
+            _, _, kind = CASES[name]
+            path = os.path.join(folder, f"{kind}.log")
+
+            if not os.path.exists(path):
+                generate(
+                    path,
+                    args.lines,
+                    categories=args.categories,
+                    warnings=args.warnings,
+                    errors=args.errors,
+                    kind=kind,
+                    seed=args.seed,
+                )
+
+            for benchmark in benchmarks:
+                best = None
+
+                for _ in range(args.repeat):
+                    with ProcessPoolExecutor(1, mp_context=context) as executor:
+                        result = executor.submit(
+                            run_case, benchmark, name, path
+                        ).result()
+
+                    if best is None or result["seconds"] < best["seconds"]:
+                        best = result
+
+                best["lines"] = args.lines
+                best["bytes"] = os.path.getsize(path)
+                best["lines_per_sec"] = args.lines / best["seconds"]
+                results.append(best)
+
+                stages = " ".join(
+                    f"{stage}={seconds:.2f}"
+                    for stage, seconds in best.get("stages", {}).items()
+                )
+                print(
+                    f"{benchmark + ' ' + name:<30} {best['lines_per_sec']:12,.0f} "
+                    f"{best['seconds']:8.2f} {best['peak_rss'] / 2**20:8.1f}MB  {stages}"
+                )
+
+    report = {
+        "commit": commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "time": time.time(),
+        "arguments": vars(args),
+        "results": results,
+    }
+
+    if args.output is not None:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2)
+
+    if args.compare is not None:
+        with open(args.compare, encoding="utf-8") as file:
+            previous = json.load(file)
+
+        if compare(results, previous, args.tolerance):
+            return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,123 @@
+"""Measure the time spent writing formatted lines to the terminal
+
+Replays a large cook log through the ``uecli format`` code path, once with one
+``print`` per line and once with the buffered :class:`~uetools.format.sink.TerminalSink`.
+The output goes to a pseudo terminal (colors enabled) and then to a pipe (colors disabled).
+
+.. code-block:: console
+
+   python benchmarks/bench_sink.py --lines 1000000
+
+"""
+import argparse
+import io
+import os
+import sys
+import tempfile
+import threading
+import time
+
+from uetools.core.run import format_stream
+from uetools.format.cooking import CookingFormatter
+
+SAMPLE = os.path.join(
+    os.path.dirname(__file__),
+    "..",
+    "tests",
+    "unit",
+    "format",
+    "samples",
+    "cooking_in.txt",
+)
+
+
+def generate_log(path, lines):
+    """Repeat the cooking sample, numbering the lines so they are not deduplicated"""
+    with open(SAMPLE, encoding="utf-8") as file:
+        sample = [line.rstrip("\n") for line in file]
+
+    with open(path, "w", encoding="utf-8") as file:
+        file.writelines(f"{sample[i % len(sample)]} #{i}\n" for i in range(lines))
+
+
+def drain(fd):
+    try:
+        while os.read(fd, 1024 * 1024):
+            pass
+    except OSError:
+        pass
+
+
+def open_output(kind):
+    """Returns a (read, write) pair of file descriptors"""
+    if kind == "pty":
+        import pty
+
+        return pty.openpty()
+
+    return os.pipe()
+
+
+def replay(path, kind, buffered):
+    read_fd, write_fd = open_output(kind)
+    reader = threading.Thread(target=drain, args=(read_fd,), daemon=True)
+    reader.start()
+
+    # Like the real stdout, terminals are line buffered
+    stdout = sys.stdout
+    sys.stdout = io.TextIOWrapper(
+        io.BufferedWriter(io.FileIO(write_fd, "w")),
+        encoding="utf-8",
+        line_buffering=kind == "pty",
+    )
+
+    try:
+        start = time.perf_counter()
+        fmt = CookingFormatter(24)
+
+        if buffered:
+            fmt.use_terminal_sink()
+
+        with open(path, "rb") as file:
+            format_stream(fmt, file)
+
+        sys.stdout.flush()
+        return time.perf_counter() - start
+    finally:
+        sys.stdout.close()
+        sys.stdout = stdout
+        try:
+            os.close(read_fd)
+        except OSError:
+            pass
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--lines", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    kinds = ["pipe"]
+    if os.name != "nt":
+        kinds.insert(0, "pty")
+
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, "Cook.log")
+        generate_log(path, args.lines)
+        print(f"{args.lines:,} lines")
+
+        for kind in kinds:
+            before = replay(path, kind, buffered=False)
+            after = replay(path, kind, buffered=True)
+
+            print(
+                f"{kind:<5} print    {before:8.2f} s {args.lines / before:12,.0f} lines/s"
+            )
+            print(
+                f"{kind:<5} buffered {after:8.2f} s {args.lines / after:12,.0f} lines/s"
+            )
+            print(f"{kind:<5} saved    {before - after:8.2f} s {before / after:8.2f} x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""Measure the time ``uecli`` takes to start a command
+
+Runs a few commands in new interpreters, once importing every command
+(``UETOOLS_LAZY_COMMANDS=0``) and once importing only the invoked command from the manifest.
+Reports the median wall time, the number of modules loaded and, with ``--importtime``,
+the modules that took the longest to import.
+
+.. code-block:: console
+
+   python benchmarks/bench_startup.py --repeat 10
+
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+SCRIPT = """
+import sys
+from uetools.core.cli import main
+main(sys.argv[1:])
+print(len(sys.modules), file=sys.stderr)
+"""
+
+
+def commands(log):
+    return [
+        ["format", "--file", log],
+        ["format", "--file", log, "--profile", "ubt"],
+        ["--output-format", "jsonl", "format", "--file", log],
+        ["uat", "localize", "--help"],
+        ["ubt", "build", "--help"],
+    ]
+
+
+def run(argv, lazy, importtime=False):
+    env = dict(os.environ)
+    env["UETOOLS_LAZY_COMMANDS"] = "1" if lazy else "0"
+
+    options = ["-X", "importtime"] if importtime else []
+
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, *options, "-c", SCRIPT, *argv],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        text=True,
+        check=True,
+    )
+    elapsed = time.perf_counter() - start
+
+    return elapsed, result.stderr.splitlines()
+
+
+def slowest_imports(lines, count):
+    """Parse the output of ``-X importtime``, returns the slowest top level imports"""
+    imports = []
+
+    for line in lines:
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+
+        _, cumulative, name = line[len("import time:") :].split("|")
+
+        # Only the packages imported directly, not their dependencies
+        if not name.startswith("   "):
+            try:
+                imports.append((int(cumulative), name.strip()))
+            except ValueError:
+                pass
+
+    return sorted(imports, reverse=True)[:count]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--importtime", action="store_true")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as folder:
+        log = os.path.join(folder, "Build.log")
+
+        with open(log, "w", encoding="utf-8") as file:
+            file.write("LogInit: Display: Engine is initialized\n")
+
+        # The first lazy run generates the manifest
+        run(commands(log)[0], lazy=True)
+
+        for argv in commands(log):
+            print(" ".join(argv).replace(log, "Build.log"))
+
+            for lazy in (False, True):
+                times = []
+
+                for _ in range(args.repeat):
+                    elapsed, stderr = run(argv, lazy)
+                    times.append(elapsed)
+
+                modules = int(stderr[-1])
+                name = "lazy" if lazy else "eager"
+                print(
+                    f"  {name:<5} {statistics.median(times):6.2f} s {modules:6d} modules"
+                )
+
+                if args.importtime:
+                    _, stderr = run(argv, lazy, importtime=True)
+
+                    for cumulative, module in slowest_imports(stderr, 5):
+                        print(f"        {cumulative / 1e6:6.2f} s {module}")
+
+
+if __name__ == "__main__":
+    main()
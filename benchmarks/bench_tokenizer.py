@@ -0,0 +1,149 @@
+"""Compare the regex log parser against the tokenizer
+
+.. code-block:: console
+
+   python benchmarks/bench_tokenizer.py --lines 3000000
+
+"""
+import argparse
+import glob
+import os
+import time
+
+from uetools.format.base import (
+    ERROR_PATERNS,
+    UE_LOG_FORMAT,
+    Formatter,
+    LogLine,
+    bad_logs,
+    log_verbosity,
+)
+from uetools.format.tokenizer import detect_returncode, tokenize
+
+SAMPLES = os.path.join(
+    os.path.dirname(__file__), "..", "tests", "unit", "format", "samples"
+)
+
+
+def load_corpus(lines):
+    """Load the formatter samples and repeat them until we have enough lines"""
+    corpus = []
+    for path in sorted(glob.glob(os.path.join(SAMPLES, "*.txt"))):
+        if path.endswith("_out.txt"):
+            continue
+
+        with open(path, encoding="utf-8") as file:
+            corpus.extend(file.readlines())
+
+    repeat = lines // len(corpus) + 1
+    return (corpus * repeat)[:lines]
+
+
+def regex_parse(lines):
+    """Parsing as it was done before the tokenizer"""
+    for line in lines:
+        result = UE_LOG_FORMAT.search(line)
+
+        if result:
+            result.groupdict()
+
+        for error_pat in ERROR_PATERNS:
+            error_pat.search(line)
+
+
+def tokenizer_parse(lines):
+    for line in lines:
+        tokenize(line)
+        detect_returncode(line)
+
+
+class RegexFormatter(Formatter):
+    """Formatter as it was before the tokenizer"""
+
+    def match_regex(self, line):
+        result = self.regex.search(line)
+
+        if result:
+            data = result.groupdict()
+
+            if data["verbosity"] is None:
+                data["verbosity"] = "Log"
+
+            if data["verbosity"] not in log_verbosity:
+                msg = data["verbosity"]
+                data["verbosity"] = "Log"
+                data["message"] = f"{msg}: " + data["message"]
+
+            if data["verbosity"] in bad_logs:
+                self.bad_logs.append(LogLine(**data))
+
+            if self.suppress_duplicate_lines:
+                h = hash(LogLine(**data))
+
+                if h not in self.line_hash:
+                    self.format(**data)
+                    self.line_hash.add(h)
+                    self.prev_hash = h
+            else:
+                self.format(**data)
+        elif self.print_non_matching:
+            self.print(line, end="")
+
+        for error_pat in ERROR_PATERNS:
+            result = error_pat.search(line)
+
+            if result:
+                data = result.groupdict()
+
+                rc = data.get("returncode", 0)
+                if rc != 0:
+                    self.return_codes.append(int(rc))
+
+
+def formatter(cls):
+    def run(lines):
+        fmt = cls(24)
+        fmt.print = lambda *args, **kwargs: None
+
+        for line in lines:
+            fmt.match_regex(line)
+
+    return run
+
+
+def bench(name, before, after, lines, repeat):
+    """Run both implementations in turn and keep the best time of each"""
+    timings = [float("inf"), float("inf")]
+
+    for _ in range(repeat):
+        for i, fun in enumerate((before, after)):
+            start = time.perf_counter()
+            fun(lines)
+            timings[i] = min(timings[i], time.perf_counter() - start)
+
+    for kind, elapsed in zip(("before", "after"), timings):
+        print(
+            f"{name + ' ' + kind:<30} {elapsed:8.2f} s {len(lines) / elapsed:12,.0f} lines/s"
+        )
+
+    print(f"{'speedup':<30} {timings[0] / timings[1]:8.2f} x")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--lines", type=int, default=3_000_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    lines = load_corpus(args.lines)
+    print(f"{len(lines):,} lines")
+
+    bench("parse", regex_parse, tokenizer_parse, lines, args.repeat)
+
+    bench(
+        "Formatter", formatter(RegexFormatter), formatter(Formatter), lines, args.repeat
+    )
+
+
+if __name__ == "__main__":
+    main()
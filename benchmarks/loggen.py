@@ -0,0 +1,268 @@
+"""Generate synthetic Unreal Engine logs for the benchmarks
+
+The logs look like what the editor prints with ``-stdout -FullStdOutLogOutput``:
+a datetime and a frame prefix, a category, an optional verbosity and a message
+with paths, numbers and GUIDs, so the formatters and the fingerprinting do the same work
+as on real logs. The same arguments always generate the same log.
+
+.. code-block:: console
+
+   python benchmarks/loggen.py Cook.log --lines 1000000 --kind cook --warnings 0.05
+
+"""
+import argparse
+import random
+from datetime import datetime, timedelta
+
+KINDS = ("generic", "cook", "tests")
+
+# Verbosities of the lines that are not warnings or errors, with their weight
+VERBOSITIES = [(None, 6), ("Display", 3), ("Verbose", 1)]
+
+CATEGORIES = [
+    "LogInit",
+    "LogConfig",
+    "LogPluginManager",
+    "LogStreaming",
+    "LogShaderCompilers",
+    "LogMaterial",
+    "LogTexture",
+    "LogStaticMesh",
+    "LogAssetRegistry",
+    "LogLinker",
+    "LogUObjectGlobals",
+    "LogPython",
+    "LogNet",
+    "LogAudio",
+    "LogRenderer",
+    "LogMemory",
+]
+
+MESSAGES = [
+    "Loading {platform} ini files took {float} seconds",
+    "Mounting Engine plugin {name}",
+    "Loaded {path} in {float} ms",
+    "Compiling {int} shaders for {name}",
+    "Texture '{name}' took {float}s, {int} mips at {hex}",
+    "Created {int} objects of class {name}",
+    "Package {path} ({guid}) is up to date",
+    "Garbage collection took {float} ms, {int} objects purged",
+]
+
+WARNINGS = [
+    "Failed to load {path} (GUID={guid})",
+    'Short type name "{name}" provided for TryFindType. Please convert it to a path name',
+    "Unable to find package {path} referenced by {path}",
+    "Material {name} has {int} texture samplers, only {int} are supported",
+    "Actor {name}_{int} is outside the world bounds at {float}, {float}, {float}",
+]
+
+ERRORS = [
+    "Missing cached shader map for material {name}, compiling {int} shaders",
+    "Could not find class {name} to create {path}",
+    "Assertion failed: Index >= 0 [File:{path}] [Line: {int}]",
+]
+
+PLATFORMS = ["Windows", "Linux", "Android", "IOS", "Mac", "TVOS", "HoloLens"]
+
+NAMES = ["RTSGame", "Gamekit", "T_Rock", "M_Water", "BP_Unit", "SM_Tree", "FogOfWar"]
+
+
+class LogGenerator:
+    """Deterministic generator of log lines
+
+    Parameters
+    ----------
+    categories: int
+        Number of distinct categories used by the generic lines
+
+    warnings: float
+        Fraction of the lines that are warnings
+
+    errors: float
+        Fraction of the lines that are errors
+
+    kind: str
+        ``generic``, ``cook`` to add the cook progress lines,
+        ``tests`` to wrap the lines inside automation tests
+
+    """
+
+    def __init__(
+        self, categories=16, warnings=0.05, errors=0.005, kind="generic", seed=0
+    ):
+        if kind not in KINDS:
+            raise ValueError(f"kind should be one of {KINDS}")
+
+        self.rng = random.Random(seed)
+        self.categories = [
+            CATEGORIES[i] if i < len(CATEGORIES) else f"LogGenerated{i}"
+            for i in range(categories)
+        ]
+        self.warnings = warnings
+        self.errors = errors
+        self.kind = kind
+        self.time = datetime(2023, 2, 14, 13, 0, 0)
+        self.frame = 0
+        self.test = 0
+
+    def _value(self, kind):
+        rng = self.rng
+
+        if kind == "int":
+            return str(rng.randrange(1, 5000))
+        if kind == "float":
+            return f"{rng.random() * 100:.2f}"
+        if kind == "hex":
+            return f"0x{rng.getrandbits(48):x}"
+        if kind == "guid":
+            return f"{rng.getrandbits(128):032X}"
+        if kind == "path":
+            name = rng.choice(NAMES)
+            return f"/Game/{rng.choice(NAMES)}/{name}_{rng.randrange(100)}.{name}"
+        if kind == "platform":
+            return rng.choice(PLATFORMS)
+        return rng.choice(NAMES)
+
+    def _message(self, templates):
+        template = self.rng.choice(templates)
+        parts = template.split("{")
+        message = [parts[0]]
+
+        for part in parts[1:]:
+            kind, rest = part.split("}", 1)
+            message.append(self._value(kind))
+            message.append(rest)
+
+        return "".join(message)
+
+    def _line(self, category, verbosity, message):
+        self.time += timedelta(milliseconds=self.rng.randrange(0, 20))
+        self.frame = (self.frame + (self.rng.random() < 0.1)) % 1000
+
+        prefix = (
+            f"[{self.time:%Y.%m.%d-%H.%M.%S}:{self.time.microsecond // 1000:03d}]"
+            f"[{self.frame:3d}]{category}: "
+        )
+
+        if verbosity is None:
+            return f"{prefix}{message}\n"
+
+        return f"{prefix}{verbosity}: {message}\n"
+
+    def _generic(self):
+        draw = self.rng.random()
+        category = self.rng.choice(self.categories)
+
+        if draw < self.errors:
+            return self._line(category, "Error", self._message(ERRORS))
+
+        if draw < self.errors + self.warnings:
+            return self._line(category, "Warning", self._message(WARNINGS))
+
+        verbosity = self.rng.choices(
+            [v for v, _ in VERBOSITIES], [w for _, w in VERBOSITIES]
+        )[0]
+        return self._line(category, verbosity, self._message(MESSAGES))
+
+    def lines(self, count):
+        """Generate ``count`` lines"""
+        if self.kind == "cook":
+            return self._cook(count)
+
+        if self.kind == "tests":
+            return self._tests(count)
+
+        return (self._generic() for _ in range(count))
+
+    def _cook(self, count):
+        total = max(count // 50, 1)
+
+        for i in range(count):
+            if i % 50 == 0:
+                done = i // 50
+                yield self._line(
+                    "LogCook",
+                    "Display",
+                    f"Cooked packages {done} Packages Remain {total - done} Total {total}",
+                )
+            elif i % 500 == 1:
+                yield self._line(
+                    "LogShaderCompilers",
+                    "Display",
+                    f"{self.rng.randrange(1, 1000)} jobs remaining",
+                )
+            else:
+                yield self._generic()
+
+    def _tests(self, count):
+        # A test every 100 lines, its events are the generic lines
+        for i in range(count):
+            step = i % 100
+
+            if step == 0:
+                yield self._test_event("Test Started.")
+            elif step == 97:
+                result = "Fail" if self.rng.random() < self.errors * 10 else "Success"
+                yield self._test_event(f"Test Completed. Result={{{result}}}")
+            elif step == 98:
+                yield self._line(
+                    "LogAutomationController", None, f"BeginEvents: {self._test_path()}"
+                )
+            elif step == 99:
+                yield self._line(
+                    "LogAutomationController", None, f"EndEvents: {self._test_path()}"
+                )
+                self.test += 1
+            else:
+                yield self._generic()
+
+    def _test_path(self):
+        return f"Project.Generated.Suite{self.test // 10}.Test{self.test}"
+
+    def _test_event(self, event):
+        path = self._test_path()
+        name = path.rsplit(".", 1)[1]
+        return self._line(
+            "LogAutomationController",
+            "Display",
+            f"{event} Name={{{name}}} Path={{{path}}}",
+        )
+
+
+def generate(path, lines, **kwargs):
+    """Write a synthetic log of ``lines`` lines to ``path``, returns its size in bytes"""
+    generator = LogGenerator(**kwargs)
+    size = 0
+
+    with open(path, "w", encoding="utf-8", newline="\n") as file:
+        for line in generator.lines(lines):
+            size += file.write(line)
+
+    return size
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("path")
+    parser.add_argument("--lines", type=int, default=100_000)
+    parser.add_argument("--kind", choices=KINDS, default="generic")
+    parser.add_argument("--categories", type=int, default=16)
+    parser.add_argument("--warnings", type=float, default=0.05)
+    parser.add_argument("--errors", type=float, default=0.005)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    generate(
+        args.path,
+        args.lines,
+        categories=args.categories,
+        warnings=args.warnings,
+        errors=args.errors,
+        kind=args.kind,
+        seed=args.seed,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -14,6 +14,9 @@ extras_require = {
         "numpy",
         "gym",
     ],
+    "zstd": [
+        "zstandard",
+    ],
 }
 extras_require["all"] = sorted(set(sum(extras_require.values(), [])))
 
@@ -0,0 +1,128 @@
+import json
+
+import pytest
+
+from uetools.format.actions import ActionTimeline
+from uetools.format.ubt import UBTFormatter as Formatter
+
+ubt_log = [
+    "[0:00:00] Using bundled DotNet SDK",
+    "[0:00:01] Building 5 actions with 2 processes...",
+    "[0:00:04] [1/5] Compile [x64] Module.Core.cpp",
+    "[0:00:05] [2/5] Compile [x64] Module.Engine.cpp",
+    "[0:00:05] Module.Engine.cpp(12): warning C4996: deprecated",
+    "[0:00:06] [3/5] Compile [x64] Game.cpp",
+    "[0:00:09] [4/5] Compile [x64] SharedPCH.Engine.cpp",
+    "[0:00:12] [5/5] Link [x64] UnrealEditor-Game.dll",
+]
+
+
+def run(lines, slots=None):
+    fmt = Formatter(24)
+    fmt.print = lambda *args, **kwargs: None
+    fmt.timeline.clock = None
+    fmt.timeline.slots = slots
+
+    for line in lines:
+        fmt.match_regex(line + "\n")
+
+    return fmt
+
+
+def test_timeline_lanes():
+    timeline = run(ubt_log).timeline
+
+    assert len(timeline.lanes) == 2
+    assert [(a.lane, a.start, a.end) for a in timeline.actions] == [
+        (0, 1, 4),
+        (1, 1, 5),
+        (0, 4, 6),
+        (1, 5, 9),
+        (0, 6, 12),
+    ]
+
+    assert [a.target for a in timeline.slowest("compile")] == [
+        "Module.Engine.cpp",
+        "SharedPCH.Engine.cpp",
+        "Module.Core.cpp",
+        "Game.cpp",
+    ]
+    assert timeline.slowest("link")[0].target == "UnrealEditor-Game.dll"
+    assert timeline.slowest("link")[0].duration == 6
+
+    # lane 1 is idle for the last 3 seconds
+    assert timeline.occupancy() == pytest.approx(19 / 22)
+
+
+def test_timeline_trace(tmp_path):
+    fmt = run(ubt_log)
+    fmt.use_trace(str(tmp_path / "trace.json"))
+    fmt.summary()
+
+    with open(tmp_path / "trace.json", encoding="utf-8") as file:
+        trace = json.load(file)
+
+    events = [e for e in trace["traceEvents"] if e["ph"] == "X"]
+    lanes = [e for e in trace["traceEvents"] if e["name"] == "thread_name"]
+
+    assert len(events) == 5
+    assert len(lanes) == 2
+    assert events[0] == {
+        "name": "Module.Core.cpp",
+        "cat": "compile",
+        "ph": "X",
+        "ts": 0,
+        "dur": 3_000_000,
+        "pid": 1,
+        "tid": 0,
+        "args": {"kind": "Compile", "index": 1, "total": 5},
+    }
+
+
+def test_timeline_streaming():
+    now = [100.0]
+    timeline = ActionTimeline(slots=4, clock=lambda: now[0])
+
+    timeline.update("Running UnrealBuildTool\n")
+    now[0] = 102.5
+    action = timeline.update("[1/2] Compile Module.Core.cpp\n")
+
+    assert action.duration == 2.5
+    assert timeline.update("Module.Core.cpp: error: oops\n") is None
+
+
+def test_timeline_untimed_header():
+    timeline = ActionTimeline(slots=2, clock=lambda: 1000.0)
+
+    # The lines printed before -Timestamps applies only have the clock
+    timeline.update("Running UnrealBuildTool\n")
+    timeline.update("[1/9] Compile Untimed.cpp\n")
+
+    for line in ubt_log:
+        timeline.update(line + "\n")
+
+    assert [(a.lane, a.start, a.end) for a in timeline.actions[1:]] == [
+        (0, 1, 4),
+        (1, 1, 5),
+        (0, 4, 6),
+        (1, 5, 9),
+        (0, 6, 12),
+    ]
+    assert timeline.actions[0].duration is None
+
+
+def test_timeline_untimed():
+    # Without timestamps in a file we only know the actions
+    fmt = run([line.split("] ", 1)[1] for line in ubt_log])
+
+    assert len(fmt.timeline.actions) == 5
+    assert fmt.timeline.timed == []
+    assert fmt.timeline.occupancy() is None
+
+
+def test_ubt_formatter_record():
+    fmt = run(ubt_log)
+    record = fmt.summary_record(10)
+
+    assert [a["duration"] for a in record["actions"]] == [3, 4, 2, 4, 6]
+    assert record["actions"][-1]["kind"] == "Link"
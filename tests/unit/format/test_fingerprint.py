@@ -0,0 +1,46 @@
+import pytest
+
+from uetools.format.fingerprint import fingerprint
+
+
+@pytest.mark.parametrize(
+    "messages,expected",
+    [
+        (
+            [
+                "Unable to find package /Game/Maps/Level_1.Level_1",
+                "Unable to find package /Game/Props/Rock.Rock",
+            ],
+            "Unable to find package <path>",
+        ),
+        (
+            [
+                "Asset 9C3B8A4E-1F2D-4C5B-8A7E-6D5C4B3A2F1E is missing",
+                "Asset 0B5A6DF84A4A3C2F8B2E9E2C3F1D4A5B is missing",
+            ],
+            "Asset <guid> is missing",
+        ),
+        (
+            [
+                "../../../Engine/Source/Foo.cpp(12): warning C4996",
+                "C:\\UnrealEngine\\Engine\\Source\\Bar.cpp(345): warning C4996",
+            ],
+            "<path>(<n>): warning C4996",
+        ),
+        (
+            ["Pointer 0x7ff6a1b2 freed twice", "Pointer 0X00000001 freed twice"],
+            "Pointer <hex> freed twice",
+        ),
+        (
+            ["Took 43.0452803s for 12 items", "Took 1s for -3 items"],
+            "Took <n>s for <n> items",
+        ),
+    ],
+)
+def test_fingerprint_clusters(messages, expected):
+    assert {fingerprint(message) for message in messages} == {expected}
+
+
+def test_fingerprint_keeps_identifiers():
+    message = "Short type name ETeamAttitude for Actor_3 on UE5 x64"
+    assert fingerprint(message) == message
@@ -1,10 +1,12 @@
 import os
+import re
 
 folder = os.path.join(os.path.dirname(__file__), "samples")
 
 
 from uetools.format.base import Formatter
 from uetools.format.cooking import CookingFormatter
+from uetools.format.store import FingerprintStore, LogTable
 from uetools.format.tests import TestFormatter
 
 log_lines = """
@@ -111,3 +113,72 @@ def test_formater_return_exit_code():
 #    fmt.print_non_matching = True
 #    for line in callstack.splitlines():
 #        fmt.match_regex(line)
+
+
+def test_formatter_summary_counts():
+    fmt = Formatter(24)
+    output = []
+    fmt.print = lambda *args, **kwargs: output.append(" ".join(args))
+
+    for i in range(10):
+        fmt.match_regex(
+            f"[2023.02.14-18.44.00:244][{i:3d}]LogCook: Warning: rare {i}\n"
+        )
+
+    for i in range(100):
+        fmt.match_regex(f"[2023.02.14-18.44.00:244][{i:3d}]LogCook: Error: frequent\n")
+
+    # The rare warnings only differ by a number, they are in the same cluster
+    assert len(fmt.bad_logs) == 2
+    assert fmt.bad_logs.total == 110
+
+    frequent, rare = fmt.bad_logs.top()
+    assert frequent.count == 100
+    assert frequent.first_frame == "0"
+    assert frequent.last_frame == "99"
+    assert frequent.examples == [" frequent"]
+
+    assert rare.count == 10
+    assert rare.examples == [" rare 0", " rare 1", " rare 2"]
+
+    output.clear()
+    fmt.summary(top=1)
+    assert "    Summary (2 clusters, 110 total)" in output
+    assert "  ... 1 more" in output
+
+    output.clear()
+    fmt.summary()
+    assert any("rare <n>" in line for line in output)
+    assert any(line.endswith("e.g. rare 2") for line in output)
+
+
+def test_formatter_summary_examples_aligned():
+    fmt = Formatter(24)
+    output = []
+    fmt.print = lambda *args, end="\n", **kwargs: output.append(" ".join(args) + end)
+
+    for i in range(3):
+        fmt.match_regex(f"[2023.02.14-18.44.00:244][1234]LogCook: Warning: rare {i}\n")
+
+    output.clear()
+    fmt.summary()
+    lines = re.sub(r"\x1b\[[0-9;]*m", "", "".join(output)).splitlines()
+
+    # the frame is wider than its 3 digits, the examples still line up
+    row = next(line for line in lines if "rare <n>" in line)
+    example = next(line for line in lines if "e.g. rare 0" in line)
+    assert row.index("rare <n>") - 1 == example.index("e.g.")
+
+
+def test_formatter_bounded_memory():
+    fmt = Formatter(24)
+    fmt.print = lambda *args, **kwargs: None
+    fmt.line_hash = FingerprintStore(capacity=1000)
+    fmt.bad_logs = LogTable(capacity=100)
+
+    for i in range(20000):
+        fmt.match_regex(f"LogCook: Warning: unique message m{i}\n")
+
+    assert len(fmt.line_hash) <= 1000
+    assert len(fmt.bad_logs) <= 100
+    assert fmt.bad_logs.total == 20000
@@ -0,0 +1,84 @@
+import os
+import shutil
+
+from uetools.format.base import Formatter
+from uetools.format.index import (
+    LogIndex,
+    LogQuery,
+    index_path,
+    load_or_build,
+    query_file,
+)
+
+folder = os.path.join(os.path.dirname(__file__), "samples")
+
+
+def run_query(path, query, index=None):
+    lines = []
+    fmt = Formatter(24)
+    fmt.print = lambda *args, end="\n", **_: lines.append(" ".join(args) + end)
+
+    query_file(fmt, path, query, index)
+    return "".join(lines)
+
+
+def copy_sample(tmp_path, name="cooking_in.txt"):
+    path = str(tmp_path / name)
+    shutil.copyfile(os.path.join(folder, name), path)
+    return path
+
+
+def test_index_same_as_scan(tmp_path):
+    path = copy_sample(tmp_path)
+    index = load_or_build(Formatter(24), path)
+
+    assert os.path.exists(index_path(path))
+
+    for query in [
+        LogQuery(only=["LogCook"]),
+        LogQuery(verbosity=["Error"]),
+        LogQuery(only=["LogClass", "LogCook"], verbosity=["Error", "Display"]),
+        LogQuery(only=["LogDoesNotExist"]),
+        LogQuery(),
+    ]:
+        expected = run_query(path, query)
+
+        assert run_query(path, query, index) == expected
+        assert run_query(path, query, LogIndex.load(path)) == expected
+
+    assert run_query(path, LogQuery(verbosity=["Error"]), index) != ""
+
+
+def test_index_time_buckets(tmp_path):
+    path = str(tmp_path / "time.log")
+
+    with open(path, "wb") as file:
+        for minute in range(10):
+            file.writelines(
+                f"[2023.02.14-13.{minute:02d}.{second:02d}:000][  0]"
+                f"LogCook: Display: {minute} {second}\r\n".encode()
+                for second in range(3)
+            )
+
+    index = load_or_build(Formatter(24), path)
+    query = LogQuery(since="2023.02.14-13.03.01", until="2023.02.14-13.05")
+
+    result = run_query(path, query, index)
+    assert result == run_query(path, query)
+    assert len(result.splitlines()) == 2 + 3 + 3
+
+
+def test_index_invalidated(tmp_path):
+    path = copy_sample(tmp_path)
+    load_or_build(Formatter(24), path)
+
+    assert LogIndex.load(path) is not None
+
+    with open(path, "a", encoding="utf-8") as file:
+        file.write("LogCook: Error: appended\n")
+
+    assert LogIndex.load(path) is None
+
+    query = LogQuery(only=["LogCook"], verbosity=["Error"])
+    index = load_or_build(Formatter(24), path)
+    assert "appended" in run_query(path, query, index)
@@ -0,0 +1,76 @@
+import os
+
+import pytest
+
+from uetools.core.run import format_stream
+from uetools.format.base import Formatter
+from uetools.format.cooking import CookingFormatter
+from uetools.format.parallel import chunk_boundaries, format_file
+from uetools.format.tests import TestFormatter
+
+folder = os.path.join(os.path.dirname(__file__), "samples")
+
+
+def run_formatter(cls, path, sequential, **kwargs):
+    lines = []
+    fmt = cls(24)
+    fmt.print = lambda *args, end="\n", **_: lines.append(" ".join(args) + end)
+
+    # Same as uecli fmt --file, durations only come from the log
+    if isinstance(fmt, CookingFormatter):
+        fmt.progress.clock = None
+
+    if sequential:
+        with open(path, "rb") as file:
+            format_stream(fmt, file)
+    else:
+        format_file(fmt, path, **kwargs)
+
+    fmt.summary()
+    return "".join(lines), fmt.returncode()
+
+
+@pytest.mark.parametrize(
+    "cls,sample",
+    [
+        (Formatter, "cooking_in.txt"),
+        (CookingFormatter, "cooking_in.txt"),
+        (TestFormatter, "tests_in.txt"),
+        (Formatter, "error_code.txt"),
+    ],
+)
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_parallel_same_output(cls, sample, jobs):
+    path = os.path.join(folder, sample)
+
+    expected = run_formatter(cls, path, True)
+    result = run_formatter(cls, path, False, jobs=jobs, chunksize=512)
+
+    assert result == expected
+
+
+def test_parallel_line_endings(tmp_path):
+    path = tmp_path / "mixed.log"
+    path.write_bytes(
+        b"LogInit: Display: caf\xc3\xa9\r\n"
+        b"LogInit: Warning: first\r"
+        b"[2023.02.14-13.44.00:123][  0]LogInit: Warning: first\n"
+        b"\xff not a log line\n"
+        b"LogInit: Error: last"
+    )
+
+    assert chunk_boundaries(path.read_bytes(), 16)[-1][1] == path.stat().st_size
+
+    expected = run_formatter(Formatter, str(path), True)
+    result = run_formatter(Formatter, str(path), False, jobs=2, chunksize=16)
+
+    assert result == expected
+
+
+def test_parallel_empty_file(tmp_path):
+    path = tmp_path / "empty.log"
+    path.write_bytes(b"")
+
+    assert run_formatter(Formatter, str(path), False, jobs=2) == run_formatter(
+        Formatter, str(path), True
+    )
@@ -0,0 +1,163 @@
+import io
+import json
+
+from uetools.format.cooking import CLEAR_LINE, CookingFormatter
+from uetools.format.progress import CookProgress
+from uetools.format.sink import TerminalSink
+
+cook_log = [
+    "[2023.02.14-13.00.00:000][  0]LogInit: Display: Starting",
+    "[2023.02.14-13.00.30:000][  0]LogCook: Display: Compiling global changed shaders for platform 'Windows'",
+    "[2023.02.14-13.01.00:000][  0]LogCook: Display: Discovering localized assets for cultures: en",
+    "[2023.02.14-13.02.00:000][  0]LogCook: Display: Cooked packages 0 Packages Remain 100 Total 100",
+    "[2023.02.14-13.02.30:000][  0]LogShaderCompilers: Display: 40 jobs remaining",
+    "[2023.02.14-13.03.00:000][  0]LogCook: Display: Cooked packages 30 Packages Remain 70 Total 100",
+    "[2023.02.14-13.03.30:000][  0]LogShaderCompilers: Display: 10 jobs remaining",
+    "[2023.02.14-13.04.00:000][  0]LogCook: Display: Cooked packages 90 Packages Remain 12 Total 102",
+    "[2023.02.14-13.05.00:000][  0]LogCook: Display: Finishing up...",
+    "[2023.02.14-13.05.10:000][  0]LogExit: Exiting.",
+]
+
+
+def test_cook_progress_phases():
+    fmt = CookingFormatter(24)
+    fmt.print = lambda *args, **kwargs: None
+
+    for line in cook_log:
+        fmt.match_regex(line + "\n")
+
+    progress = fmt.progress
+    assert progress.packages.done == 90
+    assert progress.packages.total == 102
+    assert progress.shaders.done == 30
+    assert progress.shaders.total == 40
+
+    assert progress.timings() == [
+        ("startup", 30),
+        ("global shaders", 30),
+        ("discovery", 60),
+        ("cook", 180),
+        ("finalize", 10),
+        ("shutdown", 0),
+    ]
+
+
+def test_cook_progress_untimed_header():
+    clock = iter(range(1000, 2000)).__next__
+    progress = CookProgress(clock=clock)
+
+    # The header of the log has no datetime, only the clock gives its time
+    progress.update(None, "LogInit", " Build: ++UE5+Release-5.1")
+    progress.update(None, "LogCook", " Compiling global changed shaders")
+
+    for line in cook_log:
+        datetime, category = line[1:24], line[30:].split(":")[0]
+        progress.update(datetime, category, line.split(": ", 2)[-1])
+
+    assert progress.timings() == [
+        ("startup", 0),
+        ("global shaders", 60),
+        ("discovery", 60),
+        ("cook", 180),
+        ("finalize", 10),
+        ("shutdown", 0),
+    ]
+
+
+def test_cook_progress_moving_window():
+    progress = CookProgress(window=60)
+
+    for minute, done in enumerate([0, 60, 120, 130, 140]):
+        progress.update(
+            f"2023.02.14-13.{minute:02d}.00:000",
+            "LogCook",
+            f" Cooked packages {done} Packages Remain {200 - done} Total 200",
+        )
+
+    # Only the last minute is used, the cook slowed down
+    assert progress.packages.rate() == 10 / 60
+    assert progress.packages.eta() == 60 * 60 / 10
+
+
+def test_cook_progress_line_on_terminal():
+    out = io.StringIO()
+    fmt = CookingFormatter(24)
+    fmt.set_sink(TerminalSink(out, color=True, delay=3600))
+
+    for line in cook_log[:6]:
+        fmt.match_regex(line + "\n")
+    fmt.flush()
+
+    # The status is the last thing on the terminal, without a newline
+    text = out.getvalue()
+    assert text.endswith("\r")
+    assert "packages 30/100 ( 30%) 0.5/s ETA 02:20" in text.splitlines()[-1]
+
+    fmt.match_regex(cook_log[6] + "\n")
+    fmt.flush()
+    assert out.getvalue()[len(text) :].startswith(CLEAR_LINE)
+
+
+def test_cook_progress_line_non_matching():
+    out = io.StringIO()
+    fmt = CookingFormatter(24)
+    fmt.set_sink(TerminalSink(out, color=True, delay=3600))
+
+    for line in cook_log[:4]:
+        fmt.match_regex(line + "\n")
+    fmt.flush()
+    text = out.getvalue()
+
+    fmt.match_regex("Running shader job\n")
+    fmt.flush()
+    assert out.getvalue()[len(text) :].startswith(CLEAR_LINE + "Running shader job\n")
+
+
+def test_cook_summary_on_terminal():
+    out = io.StringIO()
+    fmt = CookingFormatter(24)
+    fmt.set_sink(TerminalSink(out, color=True, delay=3600))
+
+    for line in cook_log:
+        fmt.match_regex(line + "\n")
+    fmt.flush()
+    text = out.getvalue()
+
+    fmt.summary()
+    summary = out.getvalue()[len(text) :]
+
+    # The progress line is erased once and not drawn over the summary
+    assert summary.startswith(CLEAR_LINE)
+    assert "\r" not in summary
+    assert "\n    Cook phases\n" in summary
+
+
+def test_cook_summary_phases():
+    output = []
+    fmt = CookingFormatter(24)
+    fmt.print = lambda *args, **kwargs: output.append(" ".join(args))
+
+    for line in cook_log:
+        fmt.match_regex(line + "\n")
+
+    output.clear()
+    fmt.summary()
+
+    assert "    Cook phases" in output
+    assert "  cook                      03:00" in output
+    assert "  total                     05:10" in output
+
+
+def test_cook_summary_record():
+    out = io.BytesIO()
+    fmt = CookingFormatter(24)
+    fmt.use_record_sink(out, "jsonl")
+
+    # Duplicate lines are not recorded but still count
+    for line in cook_log + cook_log[-2:]:
+        fmt.match_regex(line + "\n")
+    fmt.summary()
+
+    summary = json.loads(out.getvalue().splitlines()[-1])
+    assert summary["phases"]["cook"] == 180
+    assert summary["packages"] == {"done": 90, "total": 102}
@@ -0,0 +1,204 @@
+import json
+import os
+import xml.etree.ElementTree as ET
+
+import uetools.format.report as report_module
+from uetools.format.report import INCOMPLETE, TestReport
+from uetools.format.tests import TestFormatter as Formatter
+
+samples = os.path.join(os.path.dirname(__file__), "samples")
+
+tests_log = [
+    "[2023.02.14-18.44.17:000][553]LogAutomationController: Display: Test Started. Name={A} Path={Game.Suite.A}",
+    "[2023.02.14-18.44.17:500][553]LogTemp: Warning: Slow asset",
+    "[2023.02.14-18.44.18:500][556]LogAutomationController: Display: Test Completed. Result={Fail} Name={A} Path={Game.Suite.A}",
+    "[2023.02.14-18.44.18:500][556]LogAutomationController: BeginEvents: Game.Suite.A",
+    "[2023.02.14-18.44.18:500][556]LogAutomationController: Error: Expected 1 got <2>",
+    "[2023.02.14-18.44.18:500][556]LogAutomationController: EndEvents: Game.Suite.A",
+    "[2023.02.14-18.44.19:000][557]LogAutomationController: Display: Test Started. Name={B} Path={Game.Suite.B}",
+    "[2023.02.14-18.44.19:250][557]LogTemp: Warning: Slow asset",
+    "[2023.02.14-18.44.19:500][557]LogTemp: Error: Out of memory",
+]
+
+
+def run(tmp_path, lines):
+    fmt = Formatter(24)
+    fmt.print = lambda *args, **kwargs: None
+    fmt.use_report(tmp_path / "junit.xml", tmp_path / "tests.json")
+    fmt.report.clock = None
+    # Write on every event
+    fmt.report.interval = 0
+
+    for line in lines:
+        fmt.match_regex(line + "\n")
+
+    return fmt
+
+
+def test_report_partial(tmp_path):
+    # The log stops while B is running, the reports are already on disk
+    fmt = run(tmp_path, tests_log)
+
+    suite = ET.parse(tmp_path / "junit.xml").getroot()
+    assert suite.attrib["tests"] == "2"
+    assert suite.attrib["failures"] == "1"
+    assert suite.attrib["errors"] == "1"
+
+    a, b = suite.iter("testcase")
+    assert a.attrib["classname"] == "Game.Suite"
+    assert a.attrib["time"] == "1.500"
+    assert a.find("failure").text == "LogAutomationController: Expected 1 got <2>"
+    assert a.find("system-err").text == "LogTemp: Slow asset"
+    assert b.find("error") is not None
+
+    report = json.loads((tmp_path / "tests.json").read_text())
+    assert [t["result"] for t in report["testcases"]] == ["Fail", INCOMPLETE]
+    assert report["testcases"][1]["errors"] == ["LogTemp: Out of memory"]
+
+    # B is not written again once the report is closed
+    assert fmt.report.current is not None
+    fmt.report.close()
+    assert fmt.report.current is None
+    assert len(fmt.report.tests) == 2
+
+
+def test_report_sample(tmp_path):
+    with open(os.path.join(samples, "tests_in.txt"), encoding="utf-8") as file:
+        fmt = run(tmp_path, [line.rstrip("\n") for line in file])
+
+    fmt.summary()
+
+    report = json.loads((tmp_path / "tests.json").read_text())
+    assert report["tests"] == 4
+    assert report["failures"] == 0
+    assert [t["name"] for t in report["testcases"]] == [
+        "test_example",
+        "GetRelativePosition",
+        "GetRelativePosition",
+        "GetRelativePosition",
+    ]
+    assert report["testcases"][0]["duration"] == 0.085
+
+    slowest = fmt.report.slowest(1)
+    assert slowest[0].path == "Editor.Python.Gamekit.test_example"
+
+
+def test_report_without_datetime():
+    now = iter(range(100))
+    report = TestReport(clock=lambda: next(now))
+
+    report.update(
+        None, "LogAutomationController", "Display", "Test Started. Name={A} Path={A}"
+    )
+    report.update(
+        None,
+        "LogAutomationController",
+        "Display",
+        "Test Completed. Result={Success} Name={A} Path={A}",
+    )
+    report.close()
+
+    assert report.tests[0].duration == 1
+    assert not report.tests[0].failed
+
+
+def test_report_untimed_header():
+    now = iter(range(1000, 2000))
+    report = TestReport(clock=lambda: next(now))
+
+    # The first lines of the log have no datetime, A started on the clock
+    report.update(
+        None, "LogAutomationController", "Display", "Test Started. Name={A} Path={A}"
+    )
+    report.update(
+        "2023.02.14-18.44.17:000",
+        "LogAutomationController",
+        "Display",
+        "Test Completed. Result={Success} Name={A} Path={A}",
+    )
+    report.update(
+        "2023.02.14-18.44.18:000",
+        "LogAutomationController",
+        "Display",
+        "Test Started. Name={B} Path={B}",
+    )
+    report.update(None, "LogTemp", "Display", "untimed line")
+    report.update(
+        "2023.02.14-18.44.19:500",
+        "LogAutomationController",
+        "Display",
+        "Test Completed. Result={Success} Name={B} Path={B}",
+    )
+    report.close()
+
+    assert [test.duration for test in report.tests] == [None, 1.5]
+
+
+def test_report_write_interval(tmp_path, monkeypatch):
+    writes = []
+    write_atomic = report_module._write_atomic
+
+    def count_writes(path, text):
+        writes.append(path)
+        write_atomic(path, text)
+
+    monkeypatch.setattr(report_module, "_write_atomic", count_writes)
+
+    report = TestReport(tmp_path / "junit.xml", tmp_path / "tests.json", clock=None)
+
+    for i in range(200):
+        path = f"Game.Suite.T{i}"
+        report.update(
+            None,
+            "LogAutomationController",
+            "Display",
+            f"Test Started. Name={{T{i}}} Path={{{path}}}",
+        )
+        report.update(None, "LogTemp", "Warning", "warning storm")
+        report.update(
+            None,
+            "LogAutomationController",
+            "Display",
+            f"Test Completed. Result={{Success}} Name={{T{i}}} Path={{{path}}}",
+        )
+        report.update(None, "LogAutomationController", "Display", f"EndEvents: {path}")
+
+    # Only the first events were written, the others wait for the interval
+    assert len(writes) == 2
+    report.flush()
+    assert len(writes) == 2
+
+    report.close()
+    assert len(writes) == 4
+    assert json.loads((tmp_path / "tests.json").read_text())["tests"] == 200
+
+
+def test_report_write_failures(tmp_path, monkeypatch):
+    writes = []
+    write_atomic = report_module._write_atomic
+
+    def count_writes(path, text):
+        writes.append(text)
+        write_atomic(path, text)
+
+    monkeypatch.setattr(report_module, "_write_atomic", count_writes)
+
+    report = TestReport(None, tmp_path / "tests.json", clock=None)
+    report.update(
+        None, "LogAutomationController", "Display", "Test Started. Name={A} Path={A}"
+    )
+    assert len(writes) == 1
+
+    # The first error is written right away, the storm that follows is throttled
+    for _ in range(100):
+        report.update(None, "LogTemp", "Error", "error storm")
+    assert len(writes) == 2
+
+    report.update(
+        None,
+        "LogAutomationController",
+        "Display",
+        "Test Completed. Result={Fail} Name={A} Path={A}",
+    )
+    assert len(writes) == 3
+    assert json.loads(writes[-1])["testcases"][0]["result"] == "Fail"
@@ -0,0 +1,125 @@
+import io
+import json
+
+from uetools.format.base import Formatter
+from uetools.format.sink import PrefixSink, TerminalSink
+
+
+def test_terminal_sink_batches_lines():
+    out = io.StringIO()
+    fmt = Formatter(24)
+    fmt.set_sink(TerminalSink(out, color=False, delay=3600))
+
+    fmt.match_regex("LogInit: Display: first\n")
+    fmt.match_regex("LogInit: Display: second\n")
+    assert out.getvalue() == ""
+
+    # Errors are shown right away, without colors
+    fmt.match_regex("LogInit: Error: failed\n")
+    assert out.getvalue().splitlines() == [
+        "[  0][D][LogInit                 ]  first",
+        "[  0][D][LogInit                 ]  second",
+        "[  0][E][LogInit                 ]  failed",
+    ]
+
+
+def test_terminal_sink_size_threshold():
+    out = io.StringIO()
+    sink = TerminalSink(out, size=100, delay=3600)
+
+    for _ in range(9):
+        sink.print("x" * 10)
+
+    assert out.getvalue() == ""
+
+    sink.print("x" * 10)
+    assert len(out.getvalue()) == 110
+
+
+def test_sink_print_file():
+    out, err = io.StringIO(), io.StringIO()
+    sink = TerminalSink(out, color=False, delay=3600)
+
+    sink.print("first")
+    sink.print("to stderr", file=err)
+    PrefixSink(sink, "a| ").print("prefixed", file=err)
+
+    # What was buffered is written before
+    assert out.getvalue() == "first\n"
+    assert err.getvalue() == "to stderr\na| prefixed\n"
+
+
+def test_terminal_sink_keeps_collectors():
+    fmt = Formatter(24)
+    lines = []
+    fmt.print = lambda *args, **kwargs: lines.append(args)
+
+    fmt.use_terminal_sink()
+    fmt.match_regex("LogInit: Display: first\n")
+
+    assert fmt.sink is None
+    assert len(lines) == 1
+
+
+def read_msgpack(data):
+    import struct
+
+    import msgpack
+
+    records = []
+    while data:
+        (size,) = struct.unpack(">I", data[:4])
+        records.append(msgpack.unpackb(data[4 : 4 + size]))
+        data = data[4 + size :]
+    return records
+
+
+def test_record_sink_jsonl():
+    out = io.BytesIO()
+    fmt = Formatter(24)
+    fmt.use_record_sink(out, "jsonl")
+
+    fmt.match_regex("[2023.02.14-13.44.00:123][ 12]LogInit: Display: first\n")
+    fmt.match_regex("LogInit: Error: failed\n")
+    fmt.match_regex("LogInit: Error: failed\n")
+    fmt.match_regex("not a log line\n")
+    fmt.summary()
+
+    # records follow the same filters as the terminal
+    fmt.ignore.add("LogHidden")
+    fmt.match_regex("LogHidden: Display: hidden\n")
+
+    records = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert records[0] == {
+        "datetime": "2023.02.14-13.44.00:123",
+        "frame": 12,
+        "category": "LogInit",
+        "verbosity": "Display",
+        "message": " first",
+    }
+    # duplicates are suppressed like in the terminal, the summary still counts them
+    assert records[1]["message"] == " failed"
+    assert records[2] == {"message": "not a log line"}
+    assert records[3]["unique"] == 1
+    assert records[3]["total"] == 2
+    assert records[3]["summary"][0]["count"] == 2
+    assert len(records) == 4
+
+
+def test_record_sink_msgpack():
+    out = io.BytesIO()
+    fmt = Formatter(24)
+    fmt.use_record_sink(out, "msgpack")
+
+    fmt.match_regex("LogInit: Warning: été\n")
+    fmt.flush()
+
+    assert read_msgpack(out.getvalue()) == [
+        {
+            "datetime": None,
+            "frame": None,
+            "category": "LogInit",
+            "verbosity": "Warning",
+            "message": " été",
+        }
+    ]
@@ -0,0 +1,67 @@
+import glob
+import os
+
+import pytest
+
+from uetools.format.base import ERROR_PATERNS, UE_LOG_FORMAT
+from uetools.format.tokenizer import FIELDS, detect_returncode, tokenize
+
+folder = os.path.join(os.path.dirname(__file__), "samples")
+
+
+def sample_lines():
+    lines = []
+    for path in sorted(glob.glob(os.path.join(folder, "*.txt"))):
+        with open(path, encoding="utf-8") as file:
+            lines.extend(file.readlines())
+    return lines
+
+
+edge_cases = [
+    "",
+    "\n",
+    ": empty category",
+    "LogX: :empty verbosity",
+    "LogX: NotAVerbosity:message",
+    "Log1: digits are not part of categories",
+    "[2023.02.14-13.44.00:123][  0]LogX: Warning: a][ 12]LogY: greedy datetime",
+    "[2023.02.14-13.44.00:123][  0]LogX:missing space",
+    "[a][b][ 12]LogX: nested brackets",
+    "[][]LogX: empty datetime and frame",
+    "[x][ 1 2]LogX: bad frame",
+    "[x][1]\n]LogX: multi line",
+    "[x][\n]: frame spaces match new lines",
+    "[not a timestamp] LogX: message",
+]
+
+
+def regex(line):
+    result = UE_LOG_FORMAT.search(line)
+
+    if result:
+        return tuple(result.group(name) for name in FIELDS)
+
+    return None
+
+
+@pytest.mark.parametrize("line", edge_cases)
+def test_tokenizer_edge_cases(line):
+    assert tokenize(line) == regex(line)
+
+
+def test_tokenizer_samples():
+    for line in sample_lines():
+        assert tokenize(line) == regex(line), line
+
+
+def test_detect_returncode():
+    for line in sample_lines():
+        expected = None
+
+        for pattern in ERROR_PATERNS:
+            result = pattern.search(line)
+
+            if result:
+                expected = result.groupdict().get("returncode", 0)
+
+        assert detect_returncode(line) == expected, line
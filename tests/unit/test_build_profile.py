@@ -0,0 +1,72 @@
+from argparse import Namespace
+
+from uetools.commands.ubt import build
+from uetools.core.run import GroupResult
+
+
+def run_profile(monkeypatch, jobs):
+    started = []
+
+    def popen_dag(children, slots=1):
+        started.append((children, slots))
+        return GroupResult([0] * len(children), [(0, 1)] * len(children))
+
+    monkeypatch.setattr(build, "popen_dag", popen_dag)
+    monkeypatch.setattr(build, "find_project", lambda name: "/p/RTSGame.uproject")
+    monkeypatch.setattr(build, "engine_folder", lambda: "/engine")
+    monkeypatch.setattr(build, "ubt", lambda: "ubt")
+
+    args = Namespace(
+        target="RTSGame",
+        platform="Linux",
+        mode="Development",
+        profile="update-project",
+        jobs=jobs,
+    )
+    assert build.Build.execute_profile(args) == 0
+
+    ((children, slots),) = started
+    assert slots == 1
+    return children
+
+
+def test_profile_sequential(monkeypatch):
+    children = run_profile(monkeypatch, 1)
+
+    assert [child.name for child in children] == [
+        "ProjectUHT",
+        "ShaderCompileWorker",
+        "UnrealPak",
+        "EngineUHT",
+        "Editor",
+        "Game",
+    ]
+    assert children[1].args[:4] == [
+        "ubt",
+        "ShaderCompileWorker",
+        "Linux",
+        "Development",
+    ]
+
+
+def test_profile_batches(monkeypatch):
+    children = run_profile(monkeypatch, 4)
+
+    assert [child.name for child in children] == [
+        "ProjectUHT+ShaderCompileWorker+UnrealPak",
+        "EngineUHT",
+        "Editor+Game",
+    ]
+    assert children[2].after == [
+        "EngineUHT",
+        "ProjectUHT+ShaderCompileWorker+UnrealPak",
+    ]
+
+    # A single UnrealBuildTool builds the independent targets, it keeps its mutex
+    editor = children[2].args
+    assert editor[1:3] == [
+        '-Target=RTSGameEditor Linux Development -Project="/p/RTSGame.uproject"',
+        '-Target=RTSGame Linux Development -Project="/p/RTSGame.uproject"',
+    ]
+    assert "-Manifest=/engine/Intermediate/Build/Manifest.xml" in editor
+    assert not any("NoMutex" in arg for child in children for arg in child.args)
@@ -0,0 +1,323 @@
+import os
+import time
+
+import uetools.core.buildcache as buildcache
+from uetools.core.buildcache import (
+    BuildCache,
+    cache_path,
+    engine_fingerprint,
+    read_manifest,
+)
+
+
+def write(path, content):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as file:
+        file.write(content)
+
+
+def make_project(folder):
+    write(os.path.join(folder, "Game.uproject"), "{}")
+    write(os.path.join(folder, "Source", "Game.Target.cs"), "class GameTarget {}")
+    write(os.path.join(folder, "Source", "Game", "Game.cpp"), "int main() {}")
+    write(os.path.join(folder, "Source", "Game", "Game.h"), "#pragma once")
+
+    plugin = os.path.join(folder, "Plugins", "Group", "Tools")
+    write(os.path.join(plugin, "Tools.uplugin"), "{}")
+    write(os.path.join(plugin, "Source", "Tools", "Tools.cpp"), "void f() {}")
+
+    # Not an input
+    write(os.path.join(folder, "Content", "Map.umap"), "map")
+
+    product = os.path.join(folder, "Binaries", "Game")
+    write(product, "binary")
+    return product
+
+
+def build(folder, product, key=("Game", "Linux", "Development")):
+    cache = BuildCache(
+        cache_path(folder, "Game", "Linux", "Development"), folder, list(key)
+    )
+    up_to_date = cache.is_up_to_date()
+
+    if not up_to_date:
+        cache.record_products([product])
+        cache.save()
+
+    return up_to_date
+
+
+def test_buildcache_hit(tmp_path):
+    folder = str(tmp_path)
+    product = make_project(folder)
+
+    assert build(folder, product) is False
+    assert build(folder, product) is True
+
+
+def test_buildcache_inputs(tmp_path):
+    folder = str(tmp_path)
+    product = make_project(folder)
+    build(folder, product)
+
+    cache = BuildCache(cache_path(folder, "Game", "Linux", "Development"), folder, [])
+    cache.scan()
+    assert sorted(cache.inputs) == [
+        "Game.uproject",
+        "Plugins/Group/Tools/Source/Tools/Tools.cpp",
+        "Plugins/Group/Tools/Tools.uplugin",
+        "Source/Game.Target.cs",
+        "Source/Game/Game.cpp",
+        "Source/Game/Game.h",
+    ]
+
+
+def test_buildcache_unreadable_folders(tmp_path, monkeypatch):
+    folder = str(tmp_path)
+    make_project(folder)
+    write(os.path.join(folder, "Plugins", "Locked", "Locked.uplugin"), "{}")
+    write(os.path.join(folder, "Source", "Locked", "Locked.cpp"), "")
+
+    scandir, listdir = os.scandir, os.listdir
+
+    def locked(function):
+        def wrapper(path):
+            if os.path.basename(path) in ("Locked", "Source"):
+                raise PermissionError(path)
+            return function(path)
+
+        return wrapper
+
+    # The plugin folders and the modules of the project cannot be listed, they are skipped
+    monkeypatch.setattr(os, "listdir", locked(listdir))
+    monkeypatch.setattr(os, "scandir", locked(scandir))
+
+    cache = BuildCache(cache_path(folder, "Game", "Linux", "Development"), folder, [])
+    cache.scan()
+    assert "Game.uproject" in cache.inputs
+    assert not any("Locked" in name for name in cache.inputs)
+
+
+def test_buildcache_edit(tmp_path):
+    folder = str(tmp_path)
+    product = make_project(folder)
+    build(folder, product)
+
+    write(
+        os.path.join(
+            folder, "Plugins", "Group", "Tools", "Source", "Tools", "Tools.cpp"
+        ),
+        "void g() {}",
+    )
+    assert build(folder, product) is False
+    assert build(folder, product) is True
+
+    # Content is not a build input
+    write(os.path.join(folder, "Content", "Map.umap"), "other map")
+    assert build(folder, product) is True
+
+
+def test_buildcache_touch(tmp_path):
+    folder = str(tmp_path)
+    product = make_project(folder)
+    build(folder, product)
+
+    source = os.path.join(folder, "Source", "Game", "Game.cpp")
+    later = time.time() + 10
+    os.utime(source, (later, later))
+
+    # Same content, still up to date and the new time is saved
+    assert build(folder, product) is True
+
+    cache = BuildCache(cache_path(folder, "Game", "Linux", "Development"), folder, [])
+    assert cache.inputs["Source/Game/Game.cpp"][1] == os.stat(source).st_mtime_ns
+
+
+def test_buildcache_removed_while_scanning(tmp_path, monkeypatch):
+    folder = str(tmp_path)
+    product = make_project(folder)
+    build(folder, product)
+
+    source = os.path.join(folder, "Source", "Game", "Game.cpp")
+    write(source, "int main() { return 1; }")
+
+    hash_file = buildcache.hash_file
+
+    def removed(path):
+        # Saved atomically by an editor between the stat and the hash
+        if path == source:
+            raise FileNotFoundError(path)
+        return hash_file(path)
+
+    monkeypatch.setattr(buildcache, "hash_file", removed)
+    assert build(folder, product) is False
+
+    cache = BuildCache(cache_path(folder, "Game", "Linux", "Development"), folder, [])
+    assert cache.inputs["Source/Game/Game.cpp"][2] is None
+
+    # The file is back, it is hashed again
+    monkeypatch.setattr(buildcache, "hash_file", hash_file)
+    assert build(folder, product) is False
+    assert build(folder, product) is True
+
+
+def test_buildcache_stat_failed(tmp_path, monkeypatch):
+    folder = str(tmp_path)
+    make_project(folder)
+
+    class Removed:
+        name = "Gone.cpp"
+        path = os.path.join(folder, "Source", "Game", "Gone.cpp")
+
+        def is_dir(self, follow_symlinks=True):
+            return False
+
+        def stat(self):
+            raise FileNotFoundError(self.path)
+
+    scandir = os.scandir
+
+    class Entries(list):
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *args):
+            return False
+
+    monkeypatch.setattr(
+        buildcache.os,
+        "scandir",
+        lambda path: Entries(list(scandir(path)) + [Removed()])
+        if path.endswith("Game")
+        else scandir(path),
+    )
+
+    cache = BuildCache(cache_path(folder, "Game", "Linux", "Development"), folder, [])
+    cache.scan()
+    assert "Source/Game/Game.cpp" in cache.inputs
+    assert "Source/Game/Gone.cpp" not in cache.inputs
+
+
+def test_buildcache_key(tmp_path):
+    folder = str(tmp_path)
+    product = make_project(folder)
+    build(folder, product)
+
+    assert build(folder, product, key=("Game", "Linux", "Shipping")) is False
+
+
+def test_engine_fingerprint(tmp_path):
+    engine = str(tmp_path / "Engine")
+    write(os.path.join(engine, "Build", "Build.version"), '{"Changelist": 1}')
+
+    # A source engine is built along with the project
+    assert engine_fingerprint(engine) is None
+
+    write(os.path.join(engine, "Build", "InstalledBuild.txt"), "")
+    installed = engine_fingerprint(engine)
+    assert installed is not None
+    assert engine_fingerprint(engine) == installed
+
+    write(os.path.join(engine, "Build", "Build.version"), '{"Changelist": 2}')
+    upgraded = engine_fingerprint(engine)
+    assert upgraded != installed
+
+    # The manifest is rewritten by every build, it is not part of the fingerprint
+    manifest = os.path.join(engine, "Intermediate", "Build", "Manifest.xml")
+    write(manifest, "<BuildManifest/>")
+    assert engine_fingerprint(engine) == upgraded
+
+
+def test_buildcache_manifest_rewritten(tmp_path):
+    folder = str(tmp_path / "Game")
+    product = make_project(folder)
+
+    engine = str(tmp_path / "Engine")
+    write(os.path.join(engine, "Build", "Build.version"), '{"Changelist": 1}')
+    write(os.path.join(engine, "Build", "InstalledBuild.txt"), "")
+    manifest = os.path.join(engine, "Intermediate", "Build", "Manifest.xml")
+
+    def build_engine(step):
+        key = ("Game", "Linux", "Development", engine_fingerprint(engine))
+        up_to_date = build(folder, product, key=key)
+
+        # UBT writes the manifest given through -Manifest= when it builds
+        if not up_to_date:
+            write(manifest, f"<BuildManifest>{step}</BuildManifest>")
+            later = time.time() + step
+            os.utime(manifest, (later, later))
+
+        return up_to_date
+
+    assert build_engine(1) is False
+    assert build_engine(2) is True
+
+
+def test_buildcache_product_tampered(tmp_path):
+    folder = str(tmp_path)
+    product = make_project(folder)
+    build(folder, product)
+
+    write(product, "patched binary")
+    assert build(folder, product) is False
+    assert build(folder, product) is True
+
+    os.remove(product)
+    assert build(folder, product) is False
+
+
+def test_buildcache_no_products(tmp_path):
+    folder = str(tmp_path)
+    make_project(folder)
+
+    # Without any product recorded we cannot tell if the build happened
+    assert build(folder, os.path.join(folder, "missing")) is False
+    assert build(folder, os.path.join(folder, "missing")) is False
+
+
+def test_buildcache_corrupted(tmp_path):
+    folder = str(tmp_path)
+    product = make_project(folder)
+    build(folder, product)
+
+    write(cache_path(folder, "Game", "Linux", "Development"), "{not json")
+    assert build(folder, product) is False
+    assert build(folder, product) is True
+
+
+def test_buildcache_noop_time(tmp_path):
+    folder = str(tmp_path)
+    product = make_project(folder)
+
+    for module in range(20):
+        for i in range(100):
+            write(
+                os.path.join(folder, "Source", f"Module{module}", f"File{i}.cpp"),
+                f"int f{i}() {{ return {i}; }}",
+            )
+
+    build(folder, product)
+
+    start = time.perf_counter()
+    assert build(folder, product) is True
+    assert time.perf_counter() - start < 1
+
+
+def test_read_manifest(tmp_path):
+    manifest = tmp_path / "Manifest.xml"
+    manifest.write_text(
+        """<?xml version="1.0" encoding="utf-8"?>
+<BuildManifest xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" xmlns:xsd="http://www.w3.org/2001/XMLSchema">
+  <BuildProducts>
+    <string>/project/Binaries/Linux/Game</string>
+    <string>/project/Binaries/Linux/Game.target</string>
+  </BuildProducts>
+</BuildManifest>
+"""
+    )
+
+    assert read_manifest(str(manifest)) == [
+        "/project/Binaries/Linux/Game",
+        "/project/Binaries/Linux/Game.target",
+    ]
+    assert read_manifest(str(tmp_path / "missing.xml")) == []
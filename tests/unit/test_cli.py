@@ -1,3 +1,8 @@
+import json
+import os
+import subprocess
+import sys
+
 from uetools.core.cli import args, main
 
 
@@ -10,3 +15,37 @@ def test_cli():
 
     # Show the help for a command in particular
     assert main(args("editor", "editor", "--help")) == 0
+
+
+def test_cli_records_stdout(tmp_path):
+    log = tmp_path / "Build.log"
+    log.write_text(
+        "LogInit: Display: Engine is initialized\nLogInit: Warning: careful\n"
+    )
+
+    result = subprocess.run(
+        [
+            sys.executable,
+            "-m",
+            "uetools.core.cli",
+            "--output-format",
+            "jsonl",
+            "format",
+            "--file",
+            str(log),
+        ],
+        cwd=str(tmp_path),
+        env=dict(os.environ, XDG_CACHE_HOME=str(tmp_path / "cache")),
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    # Only the records are written to stdout, the epilog goes to stderr
+    records = [json.loads(line) for line in result.stdout.splitlines()]
+    assert [record.get("message") for record in records[:2]] == [
+        " Engine is initialized",
+        " careful",
+    ]
+    assert records[-1]["total"] == 1
+    assert "Runtime" in result.stderr
@@ -0,0 +1,111 @@
+import gzip
+import io
+import lzma
+import os
+
+import pytest
+
+from uetools.core.compress import _Prefixed, compression_of, open_stream
+from uetools.core.run import format_stream
+from uetools.format.cooking import CookingFormatter
+
+samples = os.path.join(os.path.dirname(__file__), "format", "samples")
+
+with open(os.path.join(samples, "cooking_in.txt"), "rb") as file:
+    log = file.read()
+
+
+class Pipe(io.RawIOBase):
+    """Non seekable stream that returns small reads, like a pipe"""
+
+    def __init__(self, data):
+        self.data = io.BytesIO(data)
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        data = self.data.read(min(len(buffer), 3))
+        buffer[: len(data)] = data
+        return len(data)
+
+
+def formatted(stream):
+    lines = []
+    fmt = CookingFormatter(24)
+    fmt.print = lambda *args, end="\n", **_: lines.append(" ".join(args) + end)
+
+    # Same as uecli fmt --file, durations only come from the log
+    if isinstance(fmt, CookingFormatter):
+        fmt.progress.clock = None
+    format_stream(fmt, stream)
+    fmt.summary()
+    return "".join(lines)
+
+
+def compressors():
+    yield "gzip", gzip.compress
+    yield "xz", lzma.compress
+
+    try:
+        import zstandard
+
+        yield "zstd", zstandard.ZstdCompressor().compress
+    except ImportError:
+        pass
+
+
+expected = formatted(io.BytesIO(log))
+
+
+@pytest.mark.parametrize("name,compress", list(compressors()))
+def test_compressed_file(tmp_path, name, compress):
+    path = tmp_path / "cooking.log.z"
+    path.write_bytes(compress(log))
+
+    assert compression_of(str(path)) == name
+
+    with open(path, "rb") as file:
+        compression, stream = open_stream(file)
+        assert compression == name
+        assert formatted(stream) == expected
+
+
+@pytest.mark.parametrize("name,compress", list(compressors()))
+def test_compressed_pipe(name, compress):
+    compression, stream = open_stream(Pipe(compress(log)))
+
+    assert compression == name
+    assert formatted(stream) == expected
+
+
+@pytest.mark.parametrize("name,compress", list(compressors()))
+def test_concatenated_frames(tmp_path, name, compress):
+    # A log compressed in chunks while it was written, e.g. zstd --stream
+    middle = log.index(b"\n", len(log) // 2) + 1
+    path = tmp_path / "cooking.log.z"
+    path.write_bytes(compress(log[:middle]) + compress(log[middle:]))
+
+    with open(path, "rb") as file:
+        compression, stream = open_stream(file)
+        assert compression == name
+        assert formatted(stream) == expected
+
+
+def test_uncompressed_pipe():
+    compression, stream = open_stream(Pipe(log))
+
+    assert compression is None
+    assert formatted(stream) == expected
+
+
+def test_short_pipe():
+    compression, stream = open_stream(Pipe(b"Lo"))
+
+    assert compression is None
+    assert stream.read() == b"Lo"
+
+
+def test_prefixed_stream():
+    stream = io.BufferedReader(_Prefixed(b"abc", io.BytesIO(b"def")))
+    assert stream.read() == b"abcdef"
@@ -1,11 +1,12 @@
 import os
+import shutil
 
 from uetools.core.cli import args, main
 
 samples = os.path.join(os.path.dirname(__file__), "format", "samples")
 
 
-def test_fmt_cooking():
+def test_fmt_cooking(capsys):
     main(
         args(
             "format",
@@ -16,6 +17,27 @@ def test_fmt_cooking():
         )
     )
 
+    # The replayed log shows the same summary as a live cook
+    assert "    Cook phases" in capsys.readouterr().out
+
+
+def test_fmt_clean_file(tmp_path, capsys):
+    log = tmp_path / "Build.log"
+    log.write_text("LogInit: Display: Engine is initialized\n")
+
+    main(args("format", "--file", str(log)))
+
+    # Nothing to summarize
+    assert "Summary" not in capsys.readouterr().out
+
+    # Neither with a query
+    main(args("format", "--file", str(log), "--verbosity", "Error"))
+    assert "Summary" not in capsys.readouterr().out
+
+    log.write_text("LogInit: Warning: careful\n")
+    main(args("format", "--file", str(log)))
+    assert "    Summary (1 clusters, 1 total)" in capsys.readouterr().out
+
 
 def test_fmt_tests():
     main(
@@ -27,3 +49,49 @@ def test_fmt_tests():
             os.path.join(samples, "tests_in.txt"),
         )
     )
+
+
+def test_fmt_index(tmp_path):
+    log = tmp_path / "cooking_in.txt"
+    shutil.copyfile(os.path.join(samples, "cooking_in.txt"), log)
+
+    main(
+        args(
+            "format",
+            "--file",
+            str(log),
+            "--index",
+            "--only",
+            "LogClass,LogCook",
+            "--verbosity",
+            "Error",
+        )
+    )
+
+    assert os.path.exists(str(log) + ".uidx")
+
+
+def test_fmt_compressed(tmp_path, capsys):
+    import gzip
+
+    with open(os.path.join(samples, "cooking_in.txt"), "rb") as file:
+        data = file.read()
+
+    plain = tmp_path / "cooking_in.txt"
+    plain.write_bytes(data)
+    log = tmp_path / "cooking_in.txt.gz"
+    log.write_bytes(gzip.compress(data))
+
+    main(args("format", "--profile", "cooking", "--file", str(log)))
+    compressed = capsys.readouterr().out
+
+    main(args("format", "--profile", "cooking", "--file", str(plain)))
+    assert compressed == capsys.readouterr().out
+
+    # Compressed logs are scanned instead of indexed
+    main(args("format", "--file", str(log), "--index", "--verbosity", "Error"))
+    compressed = capsys.readouterr().out
+
+    main(args("format", "--file", str(plain), "--index", "--verbosity", "Error"))
+    assert compressed == capsys.readouterr().out
+    assert not os.path.exists(str(log) + ".uidx")
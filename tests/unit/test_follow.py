@@ -0,0 +1,107 @@
+import os
+import time
+
+import pytest
+
+from uetools.core.follow import Follower, PollWatcher, follow
+from uetools.core.util import tailf
+from uetools.format.base import Formatter
+
+
+class Collector(Formatter):
+    def __init__(self):
+        super().__init__(24)
+        self.lines = []
+        self.suppress_duplicate_lines = False
+
+    def match_lines(self, lines):
+        self.lines.extend(lines)
+        super().match_lines(lines)
+
+
+def wait_for(predicate, timeout=10):
+    start = time.time()
+    while not predicate():
+        assert time.time() - start < timeout
+        time.sleep(0.01)
+
+
+@pytest.fixture(params=["default", "poll"])
+def watcher(request, monkeypatch):
+    if request.param == "poll":
+        monkeypatch.setattr(
+            "uetools.core.follow.new_watcher", lambda filename: PollWatcher()
+        )
+    return request.param
+
+
+def test_follow_created_later(tmp_path, watcher):
+    log = tmp_path / "Log.txt"
+    fmt = Collector()
+
+    follower, thread = follow(str(log), fmt)
+    time.sleep(0.1)
+
+    with open(log, "wb") as file:
+        file.write(b"LogInit: Display: first\r\nLogInit: Disp")
+        file.flush()
+        wait_for(lambda: len(fmt.lines) == 1)
+
+        file.write(b"lay: second\nLogInit: Error: no newline")
+        file.flush()
+        wait_for(lambda: len(fmt.lines) == 2)
+
+    follower.stop()
+    thread.join()
+
+    assert fmt.lines == [
+        "LogInit: Display: first\n",
+        "LogInit: Display: second\n",
+        "LogInit: Error: no newline",
+    ]
+    assert len(fmt.bad_logs) == 1
+
+
+def test_follow_truncate_and_rotate(tmp_path, watcher):
+    log = tmp_path / "Log.txt"
+    log.write_bytes(b"LogInit: Display: old 1\nLogInit: Display: old 2\n")
+    fmt = Collector()
+
+    follower, thread = follow(str(log), fmt)
+    wait_for(lambda: len(fmt.lines) == 2)
+
+    # Truncated
+    log.write_bytes(b"LogInit: Display: new\n")
+    wait_for(lambda: len(fmt.lines) == 3)
+
+    # Rotated
+    os.rename(log, tmp_path / "Log-backup.txt")
+    log.write_bytes(b"LogInit: Display: rotated\n")
+    wait_for(lambda: len(fmt.lines) == 4)
+
+    follower.stop()
+    thread.join()
+
+    assert fmt.lines[2:] == ["LogInit: Display: new\n", "LogInit: Display: rotated\n"]
+
+
+def test_follow_stop_without_file(tmp_path):
+    follower = Follower(str(tmp_path / "missing.txt"), Collector())
+    follower.stop()
+    follower.run()
+
+
+def test_tailf_uses_formatter(tmp_path, capsys):
+    log = tmp_path / "Log.txt"
+
+    with tailf(str(log)):
+        log.write_text(
+            "LogInit: Display: hello\nnot a log line\nLogInit: Display: hello\n"
+        )
+        time.sleep(0.2)
+
+    out = capsys.readouterr().out
+    assert "not a log line" in out
+
+    # Repeated lines are not suppressed
+    assert out.count("[  0][D][LogInit") == 2
@@ -0,0 +1,207 @@
+import argparse
+import os
+import subprocess
+import sys
+
+from argklass.command import ParentCommand
+
+from uetools.commands import discover_commands
+from uetools.commands.project.list import List
+from uetools.core import manifest
+from uetools.core.cli import build_parser, global_parser, main
+
+
+def test_command_name():
+    parser = global_parser()
+
+    assert manifest.command_name(parser, ["format", "--file", "a"]) == "format"
+    assert manifest.command_name(parser, ["-xyz", "editor", "cook"]) == "editor"
+
+    # Options with a value
+    assert manifest.command_name(parser, ["--nice", "5", "uat", "x"]) == "uat"
+    assert manifest.command_name(parser, ["--output-file=out", "ubt"]) == "ubt"
+    assert manifest.command_name(parser, ["-v", "5.3", "editor"]) == "editor"
+    assert manifest.command_name(parser, ["-v", "-xyz", "editor"]) == "editor"
+
+    # Every command is needed
+    assert manifest.command_name(parser, ["--help"]) is None
+    assert manifest.command_name(parser, ["-zyx", "editor"]) is None
+    assert manifest.command_name(parser, []) is None
+
+
+def test_manifest_stale(tmp_path, monkeypatch):
+    path = str(tmp_path / "commands.json")
+    commands = discover_commands()
+
+    manifest.save_manifest(manifest.generate_manifest(commands), path)
+
+    loaded = manifest.load_manifest(path)
+    assert loaded["commands"]["format"] == {
+        "module": "uetools.commands.fmt",
+        "cls": "Format",
+    }
+    assert loaded["commands"]["project"]["subcommands"]["list"] == {
+        "module": "uetools.commands.project.list",
+        "cls": "List",
+    }
+    assert set(loaded["commands"]) == set(commands)
+
+    # A command was added, modified or removed
+    monkeypatch.setattr(manifest, "source_fingerprint", lambda: "changed")
+    assert manifest.load_manifest(path) is None
+
+    assert manifest.load_manifest(str(tmp_path / "missing.json")) is None
+
+
+def test_lazy_commands(tmp_path, monkeypatch):
+    path = str(tmp_path / "commands.json")
+    monkeypatch.setattr(manifest, "manifest_path", lambda: path)
+
+    discovered = []
+
+    def discover():
+        discovered.append(1)
+        return discover_commands()
+
+    parser = global_parser()
+
+    # Missing manifest, every command is discovered and the manifest saved
+    assert "editor" in manifest.lazy_commands(parser, ["format"], discover)
+    assert os.path.exists(path)
+    assert len(discovered) == 1
+
+    commands = manifest.lazy_commands(parser, ["format"], discover)
+    assert list(commands) == ["format"]
+    assert isinstance(commands["format"], manifest.LazyCommand)
+    assert len(discovered) == 1
+
+    # --help shows every command
+    assert "editor" in manifest.lazy_commands(parser, ["--help"], discover)
+    assert len(discovered) == 2
+
+    monkeypatch.setenv("UETOOLS_LAZY_COMMANDS", "0")
+    assert "editor" in manifest.lazy_commands(parser, ["format"], discover)
+    assert len(discovered) == 3
+
+
+def subcommand_choices(parser, *path):
+    def subparsers(parser):
+        return next(
+            action
+            for action in parser._actions
+            if isinstance(action, argparse._SubParsersAction)
+        )
+
+    for name in path:
+        parser = subparsers(parser).choices[name]
+
+    return set(subparsers(parser).choices)
+
+
+def test_lazy_subcommands():
+    entry = {
+        "module": "parent",
+        "cls": "Parent",
+        "subcommands": {
+            "child": {
+                "module": "parent.child",
+                "cls": "Child",
+                "subcommands": {"leaf": {"module": "parent.child.leaf", "cls": "Leaf"}},
+            },
+            "other": {"module": "parent.other", "cls": "Other"},
+        },
+    }
+
+    parent = manifest.lazy_command("parent", entry, ["child", "-x", "leaf", "y"])
+    (child,) = parent.subcommands
+    (leaf,) = child.subcommands
+    assert (child.name, leaf.name, leaf.subcommands) == ("child", "leaf", None)
+
+    # Every subcommand is needed to show the help or report an unknown subcommand
+    assert manifest.lazy_command("parent", entry, ["--help"]).subcommands is None
+    assert manifest.lazy_command("parent", entry, ["unknown"]).subcommands is None
+    assert manifest.lazy_command("parent", entry, []).subcommands is None
+
+    parent = manifest.lazy_command("parent", entry, ["child", "--help", "leaf"])
+    assert parent.subcommands[0].subcommands is None
+
+
+def test_lazy_parser(tmp_path, monkeypatch):
+    path = str(tmp_path / "commands.json")
+    monkeypatch.setattr(manifest, "manifest_path", lambda: path)
+    manifest.save_manifest(manifest.generate_manifest(discover_commands()), path)
+
+    argv = ["project", "list"]
+    parser = build_parser(manifest.lazy_commands(global_parser(), argv, None))
+
+    assert subcommand_choices(parser) == {"project"}
+    assert subcommand_choices(parser, "project") == {"list"}
+    assert list(ParentCommand.dispatch) == [("uetools.commands.project", "list")]
+
+    argv = ["project", "--help"]
+    parser = build_parser(manifest.lazy_commands(global_parser(), argv, None))
+    assert "python" in subcommand_choices(parser, "project")
+
+    calls = []
+    monkeypatch.setattr(List, "execute", staticmethod(lambda args: calls.append(1)))
+
+    assert main(["project", "list"]) == 0
+    assert calls == [1]
+
+
+def test_main_lazy(tmp_path, monkeypatch):
+    path = str(tmp_path / "commands.json")
+    monkeypatch.setattr(manifest, "manifest_path", lambda: path)
+
+    log = tmp_path / "Build.log"
+    log.write_text("LogInit: Display: Engine is initialized\n")
+
+    assert main(["format", "--file", str(log)]) == 0
+    assert main(["format", "--file", str(log)]) == 0
+
+
+def test_lazy_imports_only_command(tmp_path):
+    log = tmp_path / "Build.log"
+    log.write_text("LogInit: Display: Engine is initialized\n")
+
+    script = (
+        "import sys\n"
+        "from uetools.core.cli import main\n"
+        f"main(['format', '--file', {str(log)!r}])\n"
+        "print('uetools.commands.uat' in sys.modules)\n"
+    )
+    env = dict(os.environ, XDG_CACHE_HOME=str(tmp_path / "cache"))
+
+    def imported_uat():
+        result = subprocess.run(
+            [sys.executable, "-c", script],
+            env=env,
+            stdout=subprocess.PIPE,
+            text=True,
+            check=True,
+        )
+        return result.stdout.splitlines()[-1]
+
+    # The first run generates the manifest
+    assert imported_uat() == "True"
+    assert imported_uat() == "False"
+
+
+def test_lazy_parser_nested(tmp_path, monkeypatch):
+    path = str(tmp_path / "commands.json")
+    monkeypatch.setattr(manifest, "manifest_path", lambda: path)
+    commands = discover_commands()
+    manifest.save_manifest(manifest.generate_manifest(commands), path)
+
+    argv = ["gamekit", "voice", "subtitle", "in.srt", "--voice", "2"]
+
+    eager = build_parser(commands)
+    eager_dispatch = set(ParentCommand.dispatch)
+    expected = vars(eager.parse_args(argv))
+
+    lazy = build_parser(manifest.lazy_commands(global_parser(), argv, None))
+
+    # Same arguments and subcommand fields, only the subcommands on the path are added
+    assert vars(lazy.parse_args(argv)) == expected
+    assert set(ParentCommand.dispatch) < eager_dispatch
+    assert subcommand_choices(lazy, "gamekit", "voice") == {"subtitle"}
@@ -0,0 +1,56 @@
+import sys
+
+import pytest
+
+from uetools.core import priority
+from uetools.core.run import RunOptions, configure, popen_with_format
+from uetools.format.base import Formatter
+
+# Print the policy of the process and of a child it started
+child = """
+import os, subprocess, sys
+code = "import os, psutil; p = psutil.Process(); print(f'LogTest: Display: {os.nice(0)} {int(p.ionice().ioclass)} {sorted(os.sched_getaffinity(0))}', flush=True)"
+exec(code)
+subprocess.run([sys.executable, "-c", code])
+"""
+
+
+class Collector(Formatter):
+    def __init__(self):
+        super().__init__(24)
+        self.messages = []
+        self.suppress_duplicate_lines = False
+
+    def format(self, datetime, frame, category, verbosity, message):
+        self.messages.append(message.strip())
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="linux scheduling")
+def test_popen_with_format_priority(capsys):
+    configure(RunOptions(nice=10, ionice="idle", affinity="0"))
+
+    try:
+        fmt = Collector()
+        assert popen_with_format(fmt, [sys.executable, "-c", child]) == 0
+    finally:
+        configure(RunOptions())
+
+    # The process might print before the policy was applied, its child inherits it (idle is 3)
+    assert fmt.messages[-1] == "10 3 [0]"
+
+
+def test_limit_memory(monkeypatch):
+    args = ["UnrealEditor", "-run=cook"]
+
+    assert priority.limit_memory(args, None) == args
+
+    monkeypatch.setattr(priority.sys, "platform", "linux")
+    monkeypatch.setattr(priority.shutil, "which", lambda name: "/usr/bin/" + name)
+
+    wrapped = priority.limit_memory(args, "16G")
+    assert wrapped[0] == "systemd-run"
+    assert "MemoryMax=17179869184" in wrapped
+    assert wrapped[-2:] == args
+
+    monkeypatch.setattr(priority.shutil, "which", lambda name: None)
+    assert priority.limit_memory(args, "16G") == args
@@ -0,0 +1,135 @@
+import os
+import sys
+from argparse import Namespace
+
+from uetools.commands.editor.resavepackages import ReSavePackages, find_packages
+from uetools.format.resave import ResaveFormatter
+
+# Resave the packages of the list, like the commandlet
+FAKE_RESAVE = """
+import os, sys
+args = dict(arg[1:].split("=", 1) for arg in sys.argv[1:] if "=" in arg)
+with open(args["FILE"]) as file:
+    packages = file.read().split()
+for i, path in enumerate(packages):
+    print(f"LogContentCommandlet: Display: Loading ({i + 1}/{len(packages)}) {path}", flush=True)
+    retried = os.path.exists(path + ".retried")
+    open(path + ".retried", "w").close()
+    if "Crash" in path and not retried:
+        sys.exit(3)
+    if "Broken" in path:
+        print(f"LogContentCommandlet: Error: Error saving '{path}'")
+if any("Fatal" in path for path in packages):
+    print("LogContentCommandlet: Error: Failed to finish the commandlet", flush=True)
+print("LogExit: Exiting.", flush=True)
+sys.exit(1 if any("Broken" in path or "Fatal" in path for path in packages) else 0)
+"""
+
+
+def write(path, content):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as file:
+        file.write(content)
+
+
+def read(path):
+    with open(path, encoding="utf-8") as file:
+        return file.read()
+
+
+def test_resave_formatter_failed():
+    fmt = ResaveFormatter()
+    fmt.print = lambda *args, **kwargs: None
+
+    packages = [
+        "/p/Content/A.uasset",
+        "/p/Content/B.uasset",
+        "/p/Content/C.uasset",
+        "/p/Content/D.uasset",
+    ]
+
+    for line in [
+        "LogContentCommandlet: Display: Loading (1/4) ../../../p/Content/A.uasset",
+        "LogContentCommandlet: Error: Error saving '../../../p/Content/A.uasset'",
+        "LogContentCommandlet: Display: Loading (2/4) ../../../p/Content/B.uasset",
+        "LogContentCommandlet: Display: Loading (3/4) ../../../p/Content/C.uasset",
+    ]:
+        fmt.match_regex(line + "\n")
+
+    assert fmt.failed_packages(packages, 0) == ["/p/Content/A.uasset"]
+
+    # Crashed while resaving C, D was never reached
+    assert fmt.failed_packages(packages, 3) == [
+        "/p/Content/A.uasset",
+        "/p/Content/C.uasset",
+        "/p/Content/D.uasset",
+    ]
+
+    # The commandlet returns an error because A failed, the others were saved
+    fmt.match_regex("Execution of commandlet took:  12.50 seconds\n")
+    fmt.match_regex("LogExit: Exiting.\n")
+    assert fmt.failed_packages(packages, 1) == ["/p/Content/A.uasset"]
+
+
+def make_project(folder, names):
+    for name in names:
+        write(os.path.join(folder, "Content", f"{name}.uasset"), name * 10)
+    write(os.path.join(folder, "Content", "Notes.txt"), "not a package")
+
+    project = os.path.join(folder, "Game.uproject")
+    write(project, "{}")
+    return project
+
+
+def test_resave_shards_retry(tmp_path):
+    folder = str(tmp_path)
+    project = make_project(folder, ["A", "B", "Crash", "D", "E", "Broken"])
+
+    assert len(find_packages(folder)) == 6
+
+    args = Namespace(shards=2, shard_memory="1K", retries=1)
+    cmd = [sys.executable, "-c", FAKE_RESAVE]
+
+    # The crashed shard is resaved again, Broken fails both times
+    assert ReSavePackages.execute_shards(project, cmd, args) == 1
+
+    lists = os.path.join(folder, "Saved", "uetools", "Resave")
+    retried = sorted(
+        path
+        for name in os.listdir(lists)
+        if name.startswith("Packages-1-")
+        for path in read(os.path.join(lists, name)).split()
+    )
+
+    # Only the packages that failed are given to the second attempt,
+    # the shard that crashed on Crash never reached A and D
+    assert [os.path.basename(path) for path in retried] == [
+        "A.uasset",
+        "Broken.uasset",
+        "Crash.uasset",
+        "D.uasset",
+    ]
+
+
+def test_resave_shards_success(tmp_path):
+    folder = str(tmp_path)
+    project = make_project(folder, ["A", "B", "C"])
+
+    args = Namespace(shards=3, shard_memory="1K", retries=1)
+    cmd = [sys.executable, "-c", FAKE_RESAVE]
+
+    assert ReSavePackages.execute_shards(project, cmd, args) == 0
+
+
+def test_resave_shards_unexplained_failure(tmp_path):
+    folder = str(tmp_path)
+    project = make_project(folder, ["A", "B", "Fatal"])
+
+    args = Namespace(shards=3, shard_memory="1K", retries=1)
+    cmd = [sys.executable, "-c", FAKE_RESAVE]
+
+    # No package is blamed so nothing is retried, the command still fails
+    assert ReSavePackages.execute_shards(project, cmd, args) == 1
+
+    lists = os.listdir(os.path.join(folder, "Saved", "uetools", "Resave"))
+    assert not [name for name in lists if name.startswith("Packages-1-")]
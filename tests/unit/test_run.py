@@ -0,0 +1,182 @@
+import asyncio
+import json
+import sys
+import time
+
+import pytest
+
+from uetools.core import run
+from uetools.core.run import (
+    Child,
+    RunOptions,
+    configure,
+    critical_path,
+    dag_order,
+    popen_dag,
+    popen_group,
+    popen_with_format,
+    prints_to_stderr,
+)
+from uetools.format.base import Formatter
+
+child = """
+import sys
+out = sys.stdout.buffer
+for i in range(2000):
+    out.write(f"LogTest: Display: line {i} \\xe9t\\xe9\\r\\n".encode("utf-8"))
+out.write(b"LogTest: Error: no newline at the end")
+out.flush()
+sys.exit(3)
+"""
+
+
+class Collector(Formatter):
+    def __init__(self):
+        super().__init__(24)
+        self.lines = []
+        self.suppress_duplicate_lines = False
+
+    def match_regex(self, line):
+        self.lines.append(line)
+        super().match_regex(line)
+
+
+def test_popen_with_format_small_chunks(capsys):
+    fmt = Collector()
+
+    # Small reads split lines and multi byte characters across chunks
+    rc = popen_with_format(fmt, [sys.executable, "-c", child], chunksize=7)
+
+    assert rc == 3
+    assert len(fmt.lines) == 2001
+    assert fmt.lines[0] == "LogTest: Display: line 0 \xe9t\xe9\n"
+    assert fmt.lines[1999] == "LogTest: Display: line 1999 \xe9t\xe9\n"
+    assert fmt.lines[-1] == "LogTest: Error: no newline at the end"
+    assert len(fmt.bad_logs) == 1
+
+
+def test_popen_with_format_returncode(capsys):
+    fmt = Collector()
+    code = "print('AutomationTool exiting with ExitCode=139 (139)')"
+
+    assert popen_with_format(fmt, [sys.executable, "-c", code]) == 139
+
+
+def test_popen_with_format_records(tmp_path, capsys):
+    output = tmp_path / "records.jsonl"
+    args = RunOptions(output_format="jsonl", output_file=str(output))
+    configure(args)
+
+    try:
+        rc = popen_with_format(Formatter(24), [sys.executable, "-c", child])
+    finally:
+        configure(RunOptions())
+
+    assert rc == 3
+    assert capsys.readouterr().out == ""
+
+    records = [json.loads(line) for line in output.read_text("utf-8").splitlines()]
+    assert len(records) == 2001
+    assert records[0]["message"] == " line 0 \xe9t\xe9"
+    assert records[-1]["verbosity"] == "Error"
+
+
+def test_popen_group(capsys):
+    code = "import sys; print('LogTest: Display: ' + sys.argv[1]); sys.exit(int(sys.argv[2]))"
+
+    children = [
+        Child([sys.executable, "-c", code, "server", "0"], Formatter(24), "server"),
+        Child([sys.executable, "-c", code, "client", "2"], Formatter(24)),
+        Child([sys.executable, "-c", child], Collector()),
+    ]
+    result = popen_group(children)
+
+    assert result.returncodes == [0, 2, 3]
+    assert result.returncode == 2
+    assert len(children[2].fmt.lines) == 2001
+
+    out = capsys.readouterr().out
+    assert "server| [  0][D][LogTest                 ]  server" in out
+    assert "1     | [  0][D][LogTest                 ]  client" in out
+
+
+def test_popen_group_stops_on_interrupt(capsys):
+    code = "import time; print('LogTest: Display: started', flush=True); time.sleep(60)"
+    children = [Child([sys.executable, "-c", code], Formatter(24)) for _ in range(3)]
+
+    async def interrupt():
+        group = asyncio.ensure_future(run._run_group(children, run.CHUNK_SIZE))
+        await asyncio.sleep(1)
+
+        # What asyncio.run does on Ctrl-C
+        group.cancel()
+        return await asyncio.gather(group, return_exceptions=True)
+
+    start = time.time()
+    (result,) = asyncio.run(interrupt())
+
+    # The children were killed instead of waited for
+    assert isinstance(result, asyncio.CancelledError)
+    assert time.time() - start < 30
+
+
+def test_popen_dag(capsys):
+    code = "import sys, time; time.sleep(float(sys.argv[1])); print('LogTest: Display: done'); sys.exit(int(sys.argv[2]))"
+
+    def step(name, seconds, rc=0, after=()):
+        args = [sys.executable, "-c", code, str(seconds), str(rc)]
+        return Child(args, Formatter(24), name, after=list(after))
+
+    children = [
+        step("uht", 0.5),
+        step("editor", 0.5, after=["uht"]),
+        step("worker", 0.5),
+        step("broken", 0, rc=4),
+        step("game", 0, after=["broken", "uht"]),
+        step("pak", 0, after=["game"]),
+    ]
+    result = popen_dag(children, slots=3)
+
+    # The dependents of the failure did not run, the others did
+    assert result.returncodes == [0, 0, 0, 4, None, None]
+    assert result.returncode == 4
+
+    (uht, editor, worker, _, game, _) = result.timings
+    assert editor[0] >= uht[1]
+    # worker did not wait for anything
+    assert worker[0] < uht[1]
+    assert game is None
+
+    path, length = critical_path(children, result)
+    assert path == ["uht", "editor"]
+    assert length >= 1
+
+
+def test_dag_order_errors():
+    with pytest.raises(ValueError, match="cycle: a -> b -> a"):
+        dag_order(
+            [Child([], None, "a", after=["b"]), Child([], None, "b", after=["a"])]
+        )
+
+    with pytest.raises(ValueError, match="unknown c"):
+        dag_order([Child([], None, "a", after=["c"])])
+
+
+def test_prints_to_stderr(capsys):
+    configure(RunOptions(output_format="jsonl"))
+
+    try:
+        with prints_to_stderr():
+            print("Subprocess terminated with (rc: 0)")
+            fmt = Formatter(24)
+            run.configure_output(fmt)
+            fmt.match_regex("LogInit: Display: hello\n")
+            fmt.flush()
+    finally:
+        configure(RunOptions())
+
+    out, err = capsys.readouterr()
+
+    # Only records are written to stdout
+    assert json.loads(out)["category"] == "LogInit"
+    assert err == "Subprocess terminated with (rc: 0)\n"
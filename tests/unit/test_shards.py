@@ -0,0 +1,63 @@
+from uetools.commands.editor import cook
+from uetools.commands.editor.cook import cook_process_args
+from uetools.core.shards import ShardHistory, balance, shard_count
+from uetools.format.store import LogTable
+
+
+def test_balance():
+    costs = {"a": 10, "b": 1, "c": 1, "d": 1, "e": 1, "f": 6}
+    shards = balance(list(costs), 2, costs.get)
+
+    assert sorted(sum(costs[i] for i in shard) for shard in shards) == [10, 10]
+    assert balance(["a"], 4, costs.get) == [["a"]]
+    assert balance([], 4, costs.get) == []
+
+
+def test_shard_count():
+    assert shard_count(4, "1K") == 4
+    assert shard_count(4, "1000T") == 1
+
+
+def test_history(tmp_path):
+    history = ShardHistory(str(tmp_path / "history.json"))
+    sizes = {"a": 100, "b": 300}
+
+    # Nothing known, the sizes are the costs
+    assert history.costs(["a", "b"], sizes) == {"a": 100, "b": 300}
+
+    history.seconds.update({"a": 10, "b": 30})
+    history.save()
+
+    history = ShardHistory(str(tmp_path / "history.json"))
+    assert history.seconds == {"a": 10, "b": 30}
+
+    # c was never timed, it is estimated from the seconds per byte of the others
+    costs = history.costs(["a", "b", "c"], {"a": 100, "b": 300, "c": 200})
+    assert costs == {"a": 10, "b": 30, "c": 20}
+
+
+def test_logtable_merge():
+    first, second = LogTable(), LogTable()
+
+    first.add("a", "a", example="a1")
+    second.add("a", "a", example="a2")
+    second.add("b", "b")
+
+    first.merge(second)
+    assert [(r.line, r.count, r.examples) for r in first.top()] == [
+        ("a", 2, ["a1", "a2"]),
+        ("b", 1, []),
+    ]
+    assert first.total == 3
+
+
+def test_cook_process_args(monkeypatch):
+    assert cook_process_args(1, "1K") == []
+    assert cook_process_args(4, "1K") == ["-CookProcessCount=4"]
+
+    # Not enough memory for a second process
+    assert cook_process_args(4, "100000G") == []
+
+    # A single process does not look at the memory
+    monkeypatch.setattr(cook, "shard_count", None)
+    assert cook_process_args(1, "1K") == []
@@ -0,0 +1,79 @@
+import subprocess
+import sys
+
+from uetools.core.run import RunOptions, configure, popen_with_format, sidecar_path
+from uetools.core.telemetry import Sampler, Timeline, format_summary
+from uetools.format.base import Formatter
+
+# Spawns a child so the sampler has a tree to walk
+busy = """
+import subprocess, sys, time
+child = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(0.6)"])
+data = bytearray(32 * 1024 * 1024)
+end = time.time() + 0.5
+while time.time() < end:
+    pass
+print("LogTest: Display: done", flush=True)
+child.wait()
+"""
+
+
+def test_sampler_process_tree():
+    process = subprocess.Popen([sys.executable, "-c", busy])
+    sampler = Sampler(process.pid, interval=0.05).start()
+    process.wait()
+    timeline = sampler.stop()
+
+    summary = timeline.summary()
+    assert summary["samples"] > 2
+    assert summary["peak_processes"] == 2
+    assert summary["peak_rss"] > 32 * 1024 * 1024
+    assert summary["peak_cpu"] > 0
+    assert len(format_summary(summary)) == 5
+
+
+def test_timeline_save_load(tmp_path):
+    timeline = Timeline(0.5, cpu_count=4)
+    for i in range(10):
+        timeline.append(
+            time=i * 0.5,
+            cpu=100.0 * i,
+            rss=i * 1024,
+            read_bytes=i,
+            write_bytes=2 * i,
+            threads=i + 1,
+            processes=1,
+        )
+
+    filename = tmp_path / "logs" / "Cook.log.uetel"
+    timeline.save(str(filename))
+    loaded = Timeline.load(str(filename))
+
+    assert loaded.columns == timeline.columns
+    assert loaded.summary() == timeline.summary()
+    assert loaded.summary()["utilization"] == 450 / 400
+
+
+def test_telemetry_path():
+    args = ["UnrealEditor", "-abslog=/tmp/logs/Cook.log", "-run=cook"]
+    assert sidecar_path(args, ".uetel") == "/tmp/logs/Cook.log.uetel"
+
+    configure(RunOptions(output_file="out.jsonl"))
+    try:
+        assert sidecar_path(["UnrealEditor"], ".uetel") == "out.jsonl.uetel"
+    finally:
+        configure(RunOptions())
+
+
+def test_popen_with_format_telemetry(tmp_path, capsys):
+    filename = tmp_path / "run.uetel"
+    configure(RunOptions(telemetry=0.05, telemetry_file=str(filename)))
+
+    try:
+        rc = popen_with_format(Formatter(24), [sys.executable, "-c", busy])
+    finally:
+        configure(RunOptions())
+
+    assert rc == 0
+    assert Timeline.load(str(filename)).summary()["samples"] > 2
+    assert "peak memory" in capsys.readouterr().out
@@ -0,0 +1,175 @@
+import json
+import os
+import sys
+from argparse import Namespace
+
+from uetools.commands.test import run
+from uetools.format.report import INCOMPLETE, load_tests
+from uetools.format.tests import TestListFormatter
+
+# Run the tests matching "Automation RunTests A+B", like the editor
+FAKE_EDITOR = """
+import os, sys
+commands, report, known = sys.argv[1:4]
+filters = commands.split("RunTests ", 1)[1].split("+")
+tests = [t for t in known.split("+") if any(f in t for f in filters)]
+crashed = os.path.join(report, "..", "..", "crashed")
+
+for path in tests:
+    name = path.rsplit(".", 1)[-1]
+    print(f"LogAutomationController: Display: Test Started. Name={{{name}}} Path={{{path}}}")
+    if "Crash" in path and not os.path.exists(crashed):
+        open(crashed, "w").close()
+        sys.exit(3)
+    result = "Fail" if "Failing" in path else "Success"
+    if result == "Fail":
+        print("LogAutomationController: Error: Expected true")
+    print(f"LogAutomationController: Display: Test Completed. Result={{{result}}} Name={{{name}}} Path={{{path}}}")
+    print(f"LogAutomationController: EndEvents: {path}")
+sys.exit(0)
+"""
+
+
+def shard_args(tmp_path, monkeypatch, tests):
+    project = tmp_path / "Game.uproject"
+    project.write_text("{}")
+
+    previous = tmp_path / "previous.json"
+    previous.write_text(
+        json.dumps(
+            {
+                "testcases": [
+                    {"name": t.rsplit(".", 1)[-1], "path": t, "duration": d}
+                    for t, d in tests.items()
+                ]
+            }
+        )
+    )
+
+    def fake_editor_args(project, map_name, commands, report, abslog=None):
+        return [sys.executable, "-c", FAKE_EDITOR, commands, report, "+".join(tests)]
+
+    monkeypatch.setattr(run, "editor_args", fake_editor_args)
+    monkeypatch.setattr(run, "find_project", lambda name: str(project))
+
+    return Namespace(
+        project="Game",
+        map="/Game/Maps/Test",
+        tests="Game",
+        junit=None,
+        json=None,
+        shards=2,
+        shard_memory="1K",
+        test_list=str(previous),
+    )
+
+
+def test_test_shards(tmp_path, monkeypatch):
+    tests = {"Game.A": 10, "Game.B": 6, "Game.C": 4, "Game.Failing": None}
+    args = shard_args(tmp_path, monkeypatch, tests)
+
+    assert run.RunTests.execute(args) == 1
+
+    report = tmp_path / "Saved" / "Automation" / "Report"
+    merged = load_tests(str(report / "tests.json"))
+
+    assert sorted(t.path for t in merged) == sorted(tests)
+    assert {t.path: t.result for t in merged}["Game.Failing"] == "Fail"
+    assert len(os.listdir(report / "Shards")) == 2
+
+
+def test_test_shards_name_collision(tmp_path, monkeypatch):
+    # "Game.Maps.A" also selects "Game.Maps.AB"
+    tests = {"Game.Maps.A": 5, "Game.Maps.AB": 5, "Game.Maps.C": 5, "Game.Maps.D": 5}
+    args = shard_args(tmp_path, monkeypatch, tests)
+
+    assert run.RunTests.execute(args) == 0
+
+    report = tmp_path / "Saved" / "Automation" / "Report"
+    ran = []
+    for shard in os.listdir(report / "Shards"):
+        tests_json = report / "Shards" / shard / "tests.json"
+        ran.extend(test.path for test in load_tests(str(tests_json)))
+
+    # Each test ran in a single editor
+    assert sorted(ran) == sorted(tests)
+
+
+def test_test_shards_crash(tmp_path, monkeypatch):
+    tests = {"Game.A": 1, "Game.Crash": 1, "Game.C": 1, "Game.D": 1}
+    args = shard_args(tmp_path, monkeypatch, tests)
+
+    # The shard that crashed is run again and completes
+    assert run.RunTests.execute(args) == 0
+
+    report = tmp_path / "Saved" / "Automation" / "Report"
+    merged = load_tests(str(report / "tests.json"))
+
+    assert sorted(t.path for t in merged) == sorted(tests)
+    assert all(t.result == "Success" for t in merged)
+    assert len(os.listdir(report / "Shards")) == 3
+
+    # The durations of this run balance the next one
+    with open(tmp_path / "Saved" / "uetools" / "TestShards.json") as file:
+        assert sorted(json.load(file)) == sorted(tests)
+
+
+def test_test_shards_crash_twice(tmp_path, monkeypatch):
+    tests = {"Game.A": 1, "Game.Crash": 1}
+    args = shard_args(tmp_path, monkeypatch, tests)
+
+    report = tmp_path / "Saved" / "Automation" / "Report"
+
+    # Crashes again when retried
+    monkeypatch.setattr(
+        run,
+        "editor_args",
+        lambda *a, **kw: [
+            sys.executable,
+            "-c",
+            FAKE_EDITOR.replace("not os.path.exists(crashed)", "True"),
+            a[2],
+            a[3],
+            "+".join(tests),
+        ],
+    )
+
+    assert run.RunTests.execute(args) == 3
+
+    merged = {t.path: t for t in load_tests(str(report / "tests.json"))}
+    assert merged["Game.A"].result == "Success"
+    assert merged["Game.Crash"].result == INCOMPLETE
+
+
+def test_shard_filters(tmp_path, monkeypatch):
+    tests = [f"Game.Suite{s}.Test{t:02d}" for s in range(50) for t in range(40)]
+    shards = [tests[:1000], tests[1000:1500], tests[1500:]]
+
+    filters = [run.shard_filters(shard, tests) for shard in shards]
+    assert filters[1] == [f"Game.Suite{s}." for s in range(25, 37)] + [
+        f"Game.Suite37.Test{t:02d}" for t in range(20)
+    ]
+
+    # Each shard runs its tests and only them
+    for shard, group in zip(shards, filters):
+        assert [t for t in tests if any(f in t for f in group)] == shard
+
+    # The filters match in the middle of the names too
+    tests = ["Game.Net.A", "Game.Net.B", "Replay.Game.Net.C"]
+    assert run.shard_filters(tests[:2], tests) == tests[:2]
+    assert run.shard_filters(tests[2:], tests) == ["Replay."]
+
+
+def test_test_list_formatter():
+    fmt = TestListFormatter()
+    fmt.print = lambda *args, **kwargs: None
+
+    for line in [
+        "LogAutomationCommandLine: Display: Found 2 automation tests based on 'All'",
+        "LogAutomationCommandLine: Display: \tGame.Suite.A",
+        "LogAutomationCommandLine: Display: \tGame.Suite.B",
+        "LogAutomationCommandLine: Display: Not a test name",
+    ]:
+        fmt.match_regex(line + "\n")
+
+    assert fmt.tests == ["Game.Suite.A", "Game.Suite.B"]
@@ -0,0 +1,113 @@
+import sys
+import time
+
+from uetools.core.run import (
+    STALLED_EXIT_CODE,
+    Child,
+    RunOptions,
+    configure,
+    popen_dag,
+    popen_with_format,
+)
+from uetools.format.base import Formatter
+
+# Prints a line and then hangs without using the CPU
+hangs = """
+import subprocess, sys, time
+print("LogTest: Display: before the hang", flush=True)
+child = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(60)"])
+time.sleep(60)
+"""
+
+# Silent but busy
+busy = """
+import time
+end = time.time() + 1.5
+while time.time() < end:
+    pass
+print("LogTest: Display: done", flush=True)
+"""
+
+# Ignores the graceful signal
+stubborn = """
+import signal, time
+signal.signal(signal.SIGTERM, signal.SIG_IGN)
+print("LogTest: Display: waiting", flush=True)
+time.sleep(60)
+"""
+
+
+def run_with(code, tmp_path, kind=None, **kwargs):
+    configure(
+        RunOptions(
+            stall_timeout="0.5,cook=30",
+            output_file=str(tmp_path / "records.jsonl"),
+            **kwargs,
+        )
+    )
+
+    try:
+        start = time.monotonic()
+        rc = popen_with_format(Formatter(24), [sys.executable, "-c", code], kind=kind)
+        return rc, time.monotonic() - start
+    finally:
+        configure(RunOptions())
+
+
+def test_watchdog_stops_stalled_process(tmp_path, capsys):
+    rc, elapsed = run_with(hangs, tmp_path, stall_grace=5)
+
+    assert rc == STALLED_EXIT_CODE
+    assert elapsed < 10
+
+    snapshot = (tmp_path / "records.jsonl.stall.txt").read_text()
+    assert "Process tree" in snapshot
+    assert "time.sleep(60)" in snapshot
+    assert "before the hang" in snapshot
+
+
+def test_watchdog_keeps_busy_process(tmp_path, capsys):
+    rc, _ = run_with(busy, tmp_path)
+
+    assert rc == 0
+    assert not (tmp_path / "records.jsonl.stall.txt").exists()
+
+
+def test_watchdog_kills_after_grace(tmp_path, capsys):
+    rc, elapsed = run_with(stubborn, tmp_path, stall_grace=0.5)
+
+    assert rc == STALLED_EXIT_CODE
+    assert elapsed < 10
+
+
+def test_watchdog_timeout_per_kind(tmp_path, capsys):
+    # cook processes get 30 seconds, this one finishes before
+    rc, _ = run_with(busy.replace("pass", "time.sleep(0.1)"), tmp_path, kind="cook")
+
+    assert rc == 0
+
+
+def test_watchdog_dag_children(tmp_path, capsys):
+    configure(
+        RunOptions(
+            stall_timeout="0.5,cook=30",
+            stall_grace=5,
+            output_file=str(tmp_path / "records.jsonl"),
+        )
+    )
+
+    def child(code, name, kind=None):
+        return Child([sys.executable, "-c", code], Formatter(24), name, kind=kind)
+
+    try:
+        start = time.monotonic()
+        result = popen_dag(
+            [child(hangs, "stalled"), child(hangs.replace("60", "1"), "cook", "cook")],
+            slots=2,
+        )
+    finally:
+        configure(RunOptions())
+
+    # The default timeout stopped the first shard, the cook shard finished on its own
+    assert result.returncodes == [STALLED_EXIT_CODE, 0]
+    assert time.monotonic() - start < 30
@@ -14,7 +14,11 @@ def find_command(name):
 
 
 def command_cache_status():
-    return get_cache_status("commands")
+    try:
+        return get_cache_status("commands")
+    except KeyError:
+        # The commands were loaded from the manifest, without discovery
+        return None
 
 
 def command_cache_future():
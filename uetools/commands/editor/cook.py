@@ -17,6 +17,7 @@ from uetools.core.conf import (
 )
 from uetools.core.options import projectfield
 from uetools.core.run import popen_with_format
+from uetools.core.shards import PROCESS_MEMORY, shard_count
 from uetools.core.util import command_builder
 from uetools.format.cooking import CookingFormatter
 
@@ -29,6 +30,23 @@ def build_modes():
     return choice(*get_build_modes(), default=None)
 
 
+def cook_process_args(processes, memory):
+    """Arguments splitting the cook between several processes
+
+    The editor runs the cook workers itself and merges their asset registries,
+    shader libraries and cook metadata into a single output.
+    """
+    if processes <= 1:
+        return []
+
+    count = shard_count(processes, memory)
+
+    if count <= 1:
+        return []
+
+    return [f"-CookProcessCount={count}"]
+
+
 class CookGame(Command):
     """Cook your main game
 
@@ -48,6 +66,13 @@ class CookGame(Command):
        # Build the project for development before Cooking
        uecli cook RTSGame --platform Windows --build Development
 
+       # Cook with 8 processes, as many as the memory allows
+       uecli cook RTSGame --platform Windows --shards 8 --shard-memory 12G
+
+    Sharded cooks use the multiprocess cook of the editor (``-CookProcessCount``, UE 5.2+),
+    the editor splits the packages between its workers and merges their asset registries
+    and shader libraries into ``Saved/Cooked/<Platform>``.
+
     """
 
     name: str = "cook"
@@ -63,6 +88,8 @@ class CookGame(Command):
         cookall         : bool          = True                  # Cook All the content
         unversioned     : bool          = True                  # unversioned
         WarningsAsErrors: bool          = True                  # Fail on warnings
+        shards          : int           = 1                     # Number of processes cooking a part of the packages at the same time
+        shard_memory    : str           = PROCESS_MEMORY        # Memory used by one cook process, limits the number of shards
         # fmt: on
 
     @staticmethod
@@ -72,6 +99,8 @@ class CookGame(Command):
         name = vars(args).pop("project")
         platform = vars(args).pop("platform")
         build = vars(args).pop("build")
+        shards = vars(args).pop("shards")
+        shard_memory = vars(args).pop("shard_memory")
 
         if build:
             build_args = Namespace()
@@ -79,6 +108,7 @@ class CookGame(Command):
             build_args.platform = build_platform_from_editor(platform)
             build_args.mode = build
             build_args.profile = "update-project"
+            build_args.jobs = 1
             Build.execute_profile(build_args)
 
         uproject = find_project(name)
@@ -107,13 +137,14 @@ class CookGame(Command):
             ]
             + cli_cmd
             + options
+            + cook_process_args(shards, shard_memory)
         )
 
         print(" ".join(cmd), flush=True)
 
         fmt = CookingFormatter(24)
         fmt.print_non_matching = True
-        returncode = popen_with_format(fmt, cmd)
+        returncode = popen_with_format(fmt, cmd, kind="cook")
         fmt.summary()
 
         print(f"Subprocess terminated with (rc: {returncode})")
@@ -1,3 +1,4 @@
+import os
 from dataclasses import dataclass
 from typing import Optional
 
@@ -5,8 +6,84 @@ from argklass.command import Command
 
 from uetools.core.conf import editor_commandlet, find_project
 from uetools.core.options import projectfield
-from uetools.core.run import popen_with_format
+from uetools.core.run import Child, popen_dag, popen_with_format
+from uetools.core.shards import PROCESS_MEMORY, balance, item_sizes, shard_count
 from uetools.format.base import Formatter
+from uetools.format.progress import duration
+from uetools.format.resave import ResaveFormatter
+
+PACKAGE_EXTENSIONS = (".uasset", ".umap")
+
+
+def find_packages(folder):
+    """Returns the package files of the project"""
+    packages = []
+
+    for root, _, files in os.walk(os.path.join(folder, "Content")):
+        for name in files:
+            if name.endswith(PACKAGE_EXTENSIONS):
+                packages.append(os.path.join(root, name))
+
+    return sorted(packages)
+
+
+def resave_shards(folder, packages, cmd, count, memory, attempt=0):
+    """Resave the packages with several editors, each given its own list of packages,
+    returns the packages that failed and the return code of the shards that failed without
+    naming a package"""
+    sizes = item_sizes(packages)
+    shards = balance(packages, shard_count(count, memory), sizes.get)
+
+    lists = os.path.join(folder, "Saved", "uetools", "Resave")
+    os.makedirs(lists, exist_ok=True)
+
+    children = []
+    for i, shard in enumerate(shards):
+        name = f"{attempt}-{i}"
+        filename = os.path.join(lists, f"Packages-{name}.txt")
+
+        with open(filename, "w", encoding="utf-8") as file:
+            file.write("\n".join(shard) + "\n")
+
+        shard_cmd = cmd + [
+            f"-FILE={filename}",
+            f"-abslog={folder}/Saved/Logs/Resave-{name}.txt",
+        ]
+        children.append(
+            Child(shard_cmd, ResaveFormatter(), name=f"shard{i}", kind="resave")
+        )
+
+    result = popen_dag(children, len(children))
+
+    # Every shard prints its own warnings, show them once for the whole run
+    summary = Formatter()
+    for child in children:
+        summary.bad_logs.merge(child.fmt.bad_logs)
+    summary.summary()
+
+    failed = []
+    unexplained = 0
+    print("    Shards")
+    print("=" * 80)
+    for i, (shard, child) in enumerate(zip(shards, children)):
+        returncode = result.returncodes[i]
+        timing = result.timings[i]
+        seconds = timing[1] - timing[0] if timing else 0
+
+        shard_failed = child.fmt.failed_packages(shard, returncode)
+        failed.extend(shard_failed)
+
+        # e.g. a fatal error of the commandlet, there is nothing to resave again
+        if returncode != 0 and not shard_failed:
+            unexplained = unexplained or returncode or 1
+
+        print(
+            f"  {child.name:<8} {len(shard):>7} packages {len(shard_failed):>7} failed "
+            f"{duration(seconds):>10}  rc={returncode}  Saved/Logs/Resave-{attempt}-{i}.txt"
+        )
+    print("=" * 80)
+
+    return failed, unexplained
 
 
 class ReSavePackages(Command):
@@ -17,7 +94,10 @@ class ReSavePackages(Command):
 
     .. code-block:: console
 
-       uecli gkscript RTSGame
+       uecli resavepackages RTSGame
+
+       # Split the packages between 8 editors, the packages that failed are resaved again once
+       uecli resavepackages RTSGame --shards 8 --retries 1
 
     """
 
@@ -28,6 +108,9 @@ class ReSavePackages(Command):
     class Arguments:
         project: Optional[str] = projectfield()  # Name of the the project to open
         no_input: bool = True
+        shards: int = 1                         # Number of editors resaving a part of the packages at the same time
+        shard_memory: str = PROCESS_MEMORY      # Memory used by one editor, limits the number of shards
+        retries: int = 1                        # Number of times the packages that failed are resaved again
     # fmt: on
 
     @staticmethod
@@ -39,9 +122,43 @@ class ReSavePackages(Command):
             # "-PACKAGEFOLDER="
         ]
 
+        if args.shards > 1:
+            return ReSavePackages.execute_shards(project, cmd, args)
+
         print(" ".join(cmd))
         fmt = Formatter()
-        return popen_with_format(fmt, cmd)
+        return popen_with_format(fmt, cmd, kind="resave")
+
+    @staticmethod
+    def execute_shards(project, cmd, args):
+        """Resave the packages in parallel, then retry the packages that failed"""
+        folder = os.path.dirname(project)
+        packages = find_packages(folder)
+        returncode = 0
+
+        for attempt in range(args.retries + 1):
+            if not packages:
+                break
+
+            if attempt > 0:
+                print(f"Resaving the {len(packages)} packages that failed")
+
+            packages, unexplained = resave_shards(
+                folder, packages, cmd, args.shards, args.shard_memory, attempt
+            )
+            returncode = returncode or unexplained
+
+        if returncode != 0:
+            print("Some shards failed without naming a package, see their logs")
+
+        if not packages:
+            return returncode
+
+        print(f"{len(packages)} packages failed:")
+        for path in packages:
+            print(f"  {path}")
+
+        return 1
 
 
 COMMANDS = ReSavePackages
@@ -5,9 +5,14 @@ from dataclasses import dataclass
 from argklass.arguments import add_arguments
 from argklass.command import Command, newparser
 
+from uetools.core.compress import DECOMPRESS_CHUNK_SIZE, compression_of, open_stream
+from uetools.core.run import configure_output, format_stream
 from uetools.format.base import Formatter
 from uetools.format.cooking import CookingFormatter
+from uetools.format.index import LogQuery, load_or_build, query_file
+from uetools.format.parallel import format_file
 from uetools.format.tests import TestFormatter
+from uetools.format.ubt import UBTFormatter
 
 log = logging.getLogger()
 
@@ -16,6 +21,7 @@ profiles = {
     None: Formatter,
     "cooking": CookingFormatter,
     "tests": TestFormatter,
+    "ubt": UBTFormatter,
 }
 
 
@@ -25,6 +31,21 @@ class Arguments:
     file: str = None
     fail_on_error: bool = False
     col: int = 24
+    jobs: int = 1
+    index: bool = False
+    only: str = None
+    verbosity: str = None
+    since: str = None
+    until: str = None
+    junit: str = None
+    json: str = None
+    trace: str = None
+
+
+def split(values):
+    if values is None:
+        return None
+    return [value.strip() for value in values.split(",") if value.strip()]
 
 
 class Format(Command):
@@ -33,10 +54,11 @@ class Format(Command):
     Attributes
     ----------
     profile: str
-        Formatting profile to use (None, cooking, tests)
+        Formatting profile to use (None, cooking, tests, ubt)
 
     file: str
-        File to format, if none it will use stdin
+        File to format, if none it will use stdin.
+        gzip, xz and zstd compressed logs are decompressed on the fly
 
     fail_on_error:
         the program will exit with an error code if errors were found
@@ -44,6 +66,33 @@ class Format(Command):
     col: int
         The size of the category column
 
+    jobs: int
+        Number of processes used to format ``file``, the output is the same as with a single process
+
+    index: bool
+        Build or reuse the sidecar index of ``file`` (``file.uidx``) to answer queries
+
+    only: str
+        Comma separated list of categories to show
+
+    verbosity: str
+        Comma separated list of verbosities to show (Fatal, Error, Warning, Display, Log, ...)
+
+    since: str
+        Only show lines logged after this datetime prefix (``2023.02.14-13.44``)
+
+    until: str
+        Only show lines logged before this datetime prefix
+
+    junit: str
+        Write the automation tests found in the log to a JUnit XML report (tests profile)
+
+    json: str
+        Write the automation tests found in the log to a JSON report (tests profile)
+
+    trace: str
+        Write the timeline of the UBT actions to a Chrome trace (ubt profile)
+
     Examples
     --------
 
@@ -51,6 +100,20 @@ class Format(Command):
 
        uecli fmt --profile cooking --file RTSGame.log
 
+       uecli fmt --profile cooking --file RTSGame.log --jobs 8
+
+       uecli fmt --profile cooking --file RTSGame.log.gz
+
+       zcat RTSGame.log.gz | uecli fmt --profile cooking
+
+       uecli fmt --file RTSGame.log --index --only LogCook --verbosity Error
+
+       uecli fmt --profile tests --file Tests.log --junit junit.xml
+
+       uecli fmt --profile ubt --file UBT-RTSGameEditor-Linux-Development.txt --trace ubt.json
+
+       uecli --output-format jsonl fmt --file RTSGame.log > RTSGame.jsonl
+
        ../UnrealEditor ... | uecli fmt
        [  0][L][LogWindows           ] Failed to load 'aqProf.dll' (GetLastError=126)
        [  0][L][LogWindows           ] File 'aqProf.dll' does not exist
@@ -79,26 +142,66 @@ class Format(Command):
     @staticmethod
     def execute(args):
         fmt = profiles.get(args.profile, Formatter)(args.col)
+        configure_output(fmt)
+
+        query = LogQuery(
+            split(args.only), split(args.verbosity), args.since, args.until
+        )
+
+        if isinstance(fmt, TestFormatter) and (args.junit or args.json):
+            fmt.use_report(args.junit, args.json)
+
+        if isinstance(fmt, UBTFormatter) and args.trace:
+            fmt.use_trace(args.trace)
+
+        compression = None
+        if args.file is not None:
+            compression = compression_of(args.file)
+
+            # Durations come from the datetimes of the log, not from how fast we read it
+            if isinstance(fmt, CookingFormatter):
+                fmt.progress.clock = None
+            elif isinstance(fmt, TestFormatter) and fmt.report is not None:
+                fmt.report.clock = None
+            elif isinstance(fmt, UBTFormatter):
+                fmt.timeline.clock = None
+
+            # The warnings and errors are only summarized if there were any
+            fmt.print_empty_summary = False
+
+        if args.file is not None and (query or args.index):
+            index = None
+            if args.index and compression is None:
+                index = load_or_build(fmt, args.file)
+            elif args.index:
+                log.warning("Compressed logs cannot be indexed, scanning the file")
+
+            query_file(fmt, args.file, query, index)
+            fmt.summary()
+
+            if args.fail_on_error and len(fmt.bad_logs) > 0:
+                return 1
+            return 0
 
         if args.file is not None:
-            with open(args.file, encoding="utf-8") as file:
-                for line in file:
-                    fmt.match_regex(line)
+            if args.jobs > 1 and compression is None:
+                format_file(fmt, args.file, args.jobs)
+            else:
+                with open(args.file, "rb") as file:
+                    _, stream = open_stream(file)
+                    format_stream(fmt, stream, DECOMPRESS_CHUNK_SIZE)
+
+            # Closes the test report and shows the cook phases, slowest tests and actions
+            fmt.summary()
 
             if args.fail_on_error and len(fmt.bad_logs) > 0:
                 return 1
             return 0
 
-        for line in sys.stdin:
-            fmt.match_regex(line)
+        _, stream = open_stream(sys.stdin.buffer)
+        format_stream(fmt, stream, DECOMPRESS_CHUNK_SIZE)
 
-        print("-" * 80)
-        print("    Summary")
-        print("=" * 80)
-        for line in fmt.bad_logs:
-            print("  - ", end="")
-            Formatter.format(fmt, **line)
-        print("=" * 80)
+        fmt.summary()
 
         if args.fail_on_error and len(fmt.bad_logs) > 0:
             return 1
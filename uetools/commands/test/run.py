@@ -1,12 +1,178 @@
 import os
+from bisect import bisect_right
+from collections import Counter
 from dataclasses import dataclass
+from itertools import accumulate
 
 from argklass.command import Command
 
 from uetools.core.conf import editor_cmd, find_project
 from uetools.core.options import projectfield
-from uetools.core.run import popen_with_format
-from uetools.format.tests import TestFormatter
+from uetools.core.run import Child, popen_dag, popen_with_format
+from uetools.core.shards import PROCESS_MEMORY, ShardHistory, balance, shard_count
+from uetools.format.report import INCOMPLETE, TestCase, load_tests
+from uetools.format.tests import TestFormatter, TestListFormatter
+
+# Number of times the tests of a shard that crashed are run again
+SHARD_RETRIES = 1
+
+
+def editor_args(project, map_name, commands, report, abslog=None):
+    """Returns the command that runs automation ``commands`` in the editor"""
+    # # E:\UnrealEngine\Engine\Source\Developer\AutomationController\Private\AutomationCommandline.cpp
+    # Valid automation commands
+    #  Automation StartRemoteSession <sessionid>
+    #  Automation List
+    #  Automation RunTests <test string>
+    #  Automation RunAll
+    #  Automation RunFilter <Engine|Smoke|Stress|Perf|Product|All>
+    #  Automation SetFilter <filter name>
+    #  Automation Quit
+    args = [
+        editor_cmd(),
+        project,
+        map_name,
+        "-stdout",
+        "-FullStdOutLogOutput",
+        "-utf8output",
+        "-Unattended",
+        "-NullRHI",
+        "-NoSplash",
+        # "-abslog=E:/uetools/tests/format/samples/tests_in.txt",
+        "-NoSound",
+        "-NoPause",
+        "-noP4",
+        f'-ReportExportPath="{report}"',
+        "-allmaps",
+        "-WarningsAsErrors",
+        # This will make UE quit successfully (i.e no error code)
+        "-TestExit=Automation Test Queue Empty",
+        # Quit will force the engine to quit with a error code
+        # if a test failed
+        f"-ExecCmds=Automation {commands}; Quit",
+    ]
+
+    if abslog is not None:
+        args.append(f"-abslog={abslog}")
+
+    return args
+
+
+def _prefixes(test):
+    """Groups of a test, shortest first
+
+    >>> _prefixes("Game.Maps.Arena")
+    ['Game.', 'Game.Maps.']
+
+    """
+    parts = test.split(".")[:-1]
+    return [".".join(parts[: i + 1]) + "." for i in range(len(parts))]
+
+
+def shard_filters(shard, tests):
+    """Filters of ``RunTests`` selecting the tests of ``shard`` and none of the other ``tests``
+
+    A group is used instead of its tests when the shard has all of them,
+    so the command line stays short for large suites.
+
+    Examples
+    --------
+
+    >>> tests = ["Game.Maps.A", "Game.Maps.B", "Game.Unit.C", "Game.Unit.D"]
+    >>> shard_filters(["Game.Maps.A", "Game.Maps.B", "Game.Unit.C"], tests)
+    ['Game.Maps.', 'Game.Unit.C']
+
+    """
+    selected = set(shard)
+    total = Counter(prefix for test in tests for prefix in _prefixes(test))
+    inside = Counter(prefix for test in shard for prefix in _prefixes(test))
+
+    # The filters match anywhere in the name of a test
+    safe = {}
+
+    def is_safe(prefix):
+        if prefix not in safe:
+            safe[prefix] = not any(
+                prefix in test and test not in selected for test in tests
+            )
+        return safe[prefix]
+
+    filters = []
+    for test in shard:
+        group = next(
+            (
+                prefix
+                for prefix in _prefixes(test)
+                if inside[prefix] == total[prefix] and is_safe(prefix)
+            ),
+            test,
+        )
+
+        if group not in filters:
+            filters.append(group)
+
+    return filters
+
+
+def collision_groups(tests):
+    """Group the tests whose name contains the name of another test
+
+    The filters of ``RunTests`` match anywhere in the name of a test, so a test is always
+    selected along with the tests containing its name, they have to run in the same shard.
+
+    Examples
+    --------
+
+    >>> collision_groups(["Game.Maps.A", "Game.Maps.B", "Game.Maps.AB", "Replay.Game.Maps.B"])
+    [['Game.Maps.A', 'Game.Maps.AB'], ['Game.Maps.B', 'Replay.Game.Maps.B']]
+
+    """
+    text = "\n".join(tests)
+    starts = list(accumulate((len(test) + 1 for test in tests[:-1]), initial=0))
+    parent = list(range(len(tests)))
+
+    def root(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    # Search each name in all the names at once instead of comparing every pair
+    for i, test in enumerate(tests):
+        position = text.find(test)
+
+        while position != -1:
+            j = bisect_right(starts, position) - 1
+
+            if j != i:
+                parent[root(j)] = root(i)
+
+            position = text.find(test, position + 1)
+
+    groups = {}
+    for i, test in enumerate(tests):
+        groups.setdefault(root(i), []).append(test)
+
+    return list(groups.values())
+
+
+def discover_tests(project, map_name, sections):
+    """List the tests of the project that match one of the test sections"""
+    folder = os.path.dirname(project)
+    report = os.path.join(folder, "Saved", "Automation", "Report", "List")
+
+    fmt = TestListFormatter(24)
+    returncode = popen_with_format(fmt, editor_args(project, map_name, "List", report))
+
+    if returncode != 0:
+        print(f"Listing the tests failed (rc: {returncode})")
+
+    sections = [section.lower() for section in sections]
+    return [
+        test
+        for test in fmt.tests
+        if any(section in test.lower() for section in sections)
+    ]
 
 
 class RunTests(Command):
@@ -23,11 +189,21 @@ class RunTests(Command):
        # Runs all the map tests that have a functional tests
        uecli tests RTSGame /Game/Maps/AbilityTest/AbilityTest Project.Functional
 
+       # Split the tests between 4 editors, balanced with the durations of the previous runs
+       uecli tests RTSGame /Game/Maps/AbilityTest/AbilityTest Project.Functional --shards 4
+
 
     Notes
     -----
 
     You should build your project first.
+
+    Sharded runs list the tests with ``Automation List``, or read them from ``--test-list``,
+    a JSON report of a previous run. Every editor writes its own reports in
+    ``Saved/Automation/Report/Shards``, the uetools reports (``--junit``, ``--json``)
+    of the shards are merged. The reports of the editor (``index.json``) are not merged,
+    each shard keeps its own. The tests a shard did not complete because the editor crashed
+    are run again once.
     """
 
     name: str = "run"
@@ -38,11 +214,19 @@ class RunTests(Command):
         map         : str                               # map name
         tests       : str           = "uetools"         # Test section to run
         project     : str           = projectfield()  # Name of the project to modify.
+        junit       : str           = None              # JUnit XML report (default: Saved/Automation/Report/junit.xml), merged from the shards
+        json        : str           = None              # JSON report (default: Saved/Automation/Report/tests.json), merged from the shards
+        shards      : int           = 1                 # Number of editors running a part of the tests at the same time
+        shard_memory: str           = PROCESS_MEMORY    # Memory used by one editor, limits the number of shards
+        test_list   : str           = None              # JSON report of a previous run with the tests to split between the shards
         # fmt: on
 
     @staticmethod
     def execute(args):
-        RunTests.execute_editor(args)
+        if args.shards > 1:
+            return RunTests.execute_shards(args)
+
+        return RunTests.execute_editor(args)
 
     @staticmethod
     def execute_editor(args):
@@ -56,50 +240,157 @@ class RunTests(Command):
         # it get stuck in a loop but if I run them sequentially it works as expected
         cmd = "; ".join(f"RunTests {name}" for name in args.tests.split(","))
 
-        # # E:\UnrealEngine\Engine\Source\Developer\AutomationController\Private\AutomationCommandline.cpp
-        # Valid automation commands
-        #  Automation StartRemoteSession <sessionid>
-        #  Automation List
-        #  Automation RunTests <test string>
-        #  Automation RunAll
-        #  Automation RunFilter <Engine|Smoke|Stress|Perf|Product|All>
-        #  Automation SetFilter <filter name>
-        #  Automation Quit
-
-        args = [
-            editor_cmd(),
-            project,
-            args.map,
-            "-stdout",
-            "-FullStdOutLogOutput",
-            "-utf8output",
-            "-Unattended",
-            "-NullRHI",
-            "-NoSplash",
-            # "-abslog=E:/uetools/tests/format/samples/tests_in.txt",
-            "-NoSound",
-            "-NoPause",
-            "-noP4",
-            f'-ReportExportPath="{folder}/Saved/Automation/Report"',
-            "-allmaps",
-            "-WarningsAsErrors",
-            # This will make UE quit successfully (i.e no error code)
-            "-TestExit=Automation Test Queue Empty",
-            # Quit will force the engine to quit with a error code
-            # if a test failed
-            f"-ExecCmds=Automation {cmd}; Quit",
-        ]
+        # Written after every test so they survive a crash of the editor
+        report = os.path.join(folder, "Saved", "Automation", "Report")
+        os.makedirs(report, exist_ok=True)
+        junit = args.junit or os.path.join(report, "junit.xml")
+        json = args.json or os.path.join(report, "tests.json")
 
         fmt = TestFormatter(24)
         fmt.print_non_matching = True
+        fmt.use_report(junit, json)
 
-        returncode = popen_with_format(fmt, args)
+        returncode = popen_with_format(
+            fmt, editor_args(project, args.map, cmd, report), kind="tests"
+        )
 
         fmt.summary()
 
         print(f"Subprocess terminated with (rc: {returncode})")
+        print(f"Test reports: {junit} {json}")
+
+        return returncode
+
+    @staticmethod
+    def execute_shards(args):
+        """Run the tests with several editors, then merge their reports"""
+        project = find_project(args.project)
+        folder = os.path.dirname(project)
+
+        report = os.path.join(folder, "Saved", "Automation", "Report")
+        os.makedirs(report, exist_ok=True)
+        junit = args.junit or os.path.join(report, "junit.xml")
+        json = args.json or os.path.join(report, "tests.json")
+
+        history = ShardHistory(
+            os.path.join(folder, "Saved", "uetools", "TestShards.json")
+        )
+
+        if args.test_list is not None:
+            previous = load_tests(args.test_list)
+            tests = [test.path for test in previous]
+
+            for test in previous:
+                if test.duration is not None:
+                    history.seconds.setdefault(test.path, test.duration)
+        else:
+            tests = discover_tests(project, args.map, args.tests.split(","))
+
+        if not tests:
+            print("No tests to run")
+            return 1
+
+        # Tests never timed cost as much as the average test
+        costs = history.costs(tests, {test: 1 for test in tests})
+        # The tests selected by the same filter run in the same shard
+        groups = balance(
+            collision_groups(tests),
+            shard_count(args.shards, args.shard_memory),
+            lambda group: sum(costs[test] for test in group),
+        )
+        shards = [[test for group in shard for test in group] for shard in groups]
+
+        fmt = TestFormatter(24)
+        fmt.use_report(junit, json)
+
+        returncodes = run_test_shards(project, args.map, report, shards, fmt)
+
+        for test in fmt.report.tests:
+            if test.duration is not None and test.result != INCOMPLETE:
+                history.seconds[test.path] = test.duration
+        history.save()
+
+        fmt.summary()
+
+        print(f"Shards terminated with (rc: {returncodes})")
+        print(f"Test reports: {junit} {json}")
+
+        returncode = next((rc for rc in returncodes if rc), 0)
+        if returncode == 0 and any(test.failed for test in fmt.report.tests):
+            return 1
 
         return returncode
 
 
+def run_test_shards(project, map_name, report, shards, fmt):
+    """Run each shard in its own editor, the tests of a shard that crashed are run again once.
+
+    The results are added to the report of ``fmt``, returns the exit code of each shard
+    """
+    tests = [test for shard in shards for test in shard]
+    pending = list(enumerate(shards))
+    returncodes = [None] * len(shards)
+    results = {}
+
+    for attempt in range(SHARD_RETRIES + 1):
+        children = []
+
+        for i, shard in pending:
+            folder = os.path.join(report, "Shards", f"{attempt}-{i}")
+            os.makedirs(folder, exist_ok=True)
+
+            child = TestFormatter(24)
+            child.print_non_matching = True
+            child.use_report(
+                os.path.join(folder, "junit.xml"), os.path.join(folder, "tests.json")
+            )
+
+            cmd = editor_args(
+                project,
+                map_name,
+                "RunTests " + "+".join(shard_filters(shard, tests)),
+                folder,
+                os.path.join(folder, "Tests.log"),
+            )
+            children.append(Child(cmd, child, name=f"shard{i}", kind="tests"))
+
+        result = popen_dag(children, len(children))
+
+        retry = []
+        for (i, shard), child, returncode in zip(pending, children, result.returncodes):
+            child.fmt.report.close()
+            fmt.bad_logs.merge(child.fmt.bad_logs)
+            returncodes[i] = returncode
+
+            for test in child.fmt.report.tests:
+                results[test.path] = test
+
+            completed = {
+                test.path
+                for test in child.fmt.report.tests
+                if test.result != INCOMPLETE
+            }
+            remaining = [test for test in shard if test not in completed]
+
+            # The editor crashed before the end of its tests
+            if returncode != 0 and remaining:
+                retry.append((i, remaining))
+
+        if not retry or attempt == SHARD_RETRIES:
+            break
+
+        for i, remaining in retry:
+            print(
+                f"shard{i} did not complete, running its {len(remaining)} remaining tests again"
+            )
+
+        pending = retry
+
+    # A test that never started is reported as incomplete
+    fmt.report.extend(
+        [results.get(path) or TestCase(path.rsplit(".", 1)[-1], path) for path in tests]
+    )
+    return returncodes
+
+
 COMMANDS = RunTests
@@ -142,7 +142,6 @@ class CookGameUAT(Command):
     def update_arguments(args, profile, default_type):
         defaults = default_type()
         for k, v in profile.items():
-
             if k not in args:
                 args[k] = v
                 continue
@@ -195,7 +194,7 @@ class CookGameUAT(Command):
         returncode = 0
         fmt = CookingFormatter(24)
         fmt.print_non_matching = True
-        returncode = popen_with_format(fmt, cmd, shell=False)
+        returncode = popen_with_format(fmt, cmd, shell=False, kind="cook")
         fmt.summary()
 
         return returncode
@@ -54,7 +54,7 @@ class RunTestsUAT(Command):
 
         fmt = TestFormatter(24)
         fmt.print_non_matching = True
-        returncode = popen_with_format(fmt, cmd)
+        returncode = popen_with_format(fmt, cmd, kind="tests")
         fmt.summary()
         return returncode
 
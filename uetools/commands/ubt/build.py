@@ -1,20 +1,34 @@
 import os
+import time
 from dataclasses import dataclass
 from typing import Optional
 
 from argklass.arguments import choice
 from argklass.command import Command
 
+from uetools.core.buildcache import (
+    BuildCache,
+    cache_path,
+    engine_fingerprint,
+    read_manifest,
+)
 from uetools.core.conf import (
     engine_folder,
     find_project,
     get_build_modes,
     get_build_platforms,
     guess_platform,
+    retrieve_exact_engine_version,
     ubt,
 )
-from uetools.core.run import popen_with_format
+from uetools.core.run import (
+    Child,
+    critical_path,
+    popen_dag,
+    popen_with_format,
+)
 from uetools.format.base import Formatter
+from uetools.format.ubt import UBTFormatter
 
 project_uht = [
     "UnrealHeaderTool",
@@ -32,8 +46,8 @@ engine_uht = [
     "UnrealHeaderTool",
     "{PLATFORM}",
     "{MODE}",
-    "-NoUBTMakefiles"
-    "-Manifest={ENGINE_FOLDER}/Intermediate/Build/Manifest.xml"
+    "-NoUBTMakefiles",
+    "-Manifest={ENGINE_FOLDER}/Intermediate/Build/Manifest.xml",
     "-NoHotReload",
     '-abslog="{ENGINE_FOLDER}/Programs/AutomationTool/Saved/Logs/UBT-UnrealHeaderTool-{PLATFORM}-{MODE}.txt"',
 ]
@@ -97,25 +111,34 @@ bootstrap = [
 
 
 # This is the build commands issued by UAT when using BuildCookRun.
-build_update_project = [
-    project_uht,
-    engine_uht,
-    project_editor,
-    shader_compile_worker,
-    unrealpak,
-    project,
-    bootstrap,
-]
+# name: (command, names of the steps that need to be built first)
+build_update_project = {
+    "ProjectUHT": (project_uht, []),
+    "EngineUHT": (engine_uht, ["ProjectUHT"]),
+    "Editor": (project_editor, ["ProjectUHT", "EngineUHT"]),
+    "ShaderCompileWorker": (shader_compile_worker, []),
+    "UnrealPak": (unrealpak, []),
+    "Game": (project, ["ProjectUHT", "EngineUHT"]),
+    "BootstrapPackagedGame": (bootstrap, []),
+}
 
 
-short_update = [
-    project_editor,
-    shader_compile_worker,
-]
+short_update = {
+    "Editor": (project_editor, []),
+    "ShaderCompileWorker": (shader_compile_worker, []),
+}
 
 
 profiles = {"update-project": build_update_project, "short-update": short_update}
 
+# Options of a UBT invocation building the targets of several steps
+batch_options = [
+    "-NoUBTMakefiles",
+    "-Manifest={ENGINE_FOLDER}/Intermediate/Build/Manifest.xml",
+    "-NoHotReload",
+    '-abslog="{ENGINE_FOLDER}/Programs/AutomationTool/Saved/Logs/UBT-{STEPS}-{PLATFORM}-{MODE}.txt"',
+]
+
 
 def replace_variables(command, variables):
     """Replace variables in a command"""
@@ -128,6 +151,104 @@ def replace_variables(command, variables):
     return cmd
 
 
+def target_cache(uproject, target, platform, mode, cmd):
+    """Returns the build cache of a project target, None if the engine is not an installed build"""
+    engine_path = engine_folder()
+    folder = os.path.dirname(uproject)
+
+    engine = engine_fingerprint(engine_path)
+    if engine is None:
+        return None
+
+    key = [
+        target,
+        platform,
+        mode,
+        retrieve_exact_engine_version(engine_path, ignore_patch=False),
+        engine,
+        cmd,
+    ]
+
+    return BuildCache(cache_path(folder, target, platform, mode), folder, key)
+
+
+def target_argument(command):
+    """``-Target=`` argument building the target of a step, UBT accepts several of them
+
+    Examples
+    --------
+
+    >>> target_argument(["UnrealPak", "Linux", "Development", "-Project=/p/G.uproject", "/p/G.uproject", "-NoHotReload"])
+    '-Target=UnrealPak Linux Development -Project="/p/G.uproject"'
+
+    """
+    target, platform, mode, *options = command
+
+    project = [
+        f'-Project="{arg[len("-Project="):]}"'
+        for arg in options
+        if arg.startswith("-Project=")
+    ]
+    return "-Target=" + " ".join([target, platform, mode] + project)
+
+
+def batch_steps(commands, jobs):
+    """Group the steps in batches of at most ``jobs`` steps that do not depend on each other,
+    every step comes after the batches of the steps it needs
+
+    Examples
+    --------
+
+    >>> batch_steps({"UHT": ([], []), "Editor": ([], ["UHT"]), "Pak": ([], []), "Worker": ([], [])}, 2)
+    [['UHT', 'Pak'], ['Worker'], ['Editor']]
+
+    """
+    done = set()
+    remaining = list(commands)
+    batches = []
+
+    while remaining:
+        ready = [
+            name
+            for name in remaining
+            if all(dep in done or dep not in commands for dep in commands[name][1])
+        ]
+
+        if not ready:
+            raise ValueError(f"Dependency cycle between {', '.join(remaining)}")
+
+        for i in range(0, len(ready), max(jobs, 1)):
+            batches.append(ready[i : i + max(jobs, 1)])
+
+        done.update(ready)
+        remaining = [name for name in remaining if name not in done]
+
+    return batches
+
+
+def show_schedule(children, result):
+    """Show when each step ran and the critical path of the profile"""
+    print("-" * 80)
+    print(f"  {'Step':<24} {'Status':>8} {'Start':>8} {'Time':>8}")
+    print("=" * 80)
+
+    for child, rc, timing in zip(children, result.returncodes, result.timings):
+        if rc is None:
+            print(f"  {child.name:<24} {'skipped':>8}")
+            continue
+
+        start, end = timing
+        status = "ok" if rc == 0 else f"rc={rc}"
+        print(f"  {child.name:<24} {status:>8} {start:8.1f} {end - start:8.1f}")
+
+    wall = max((end for _, end in filter(None, result.timings)), default=0)
+    path, length = critical_path(children, result)
+
+    print("=" * 80)
+    print(f"  {'wall time':<24} {wall:8.1f} s")
+    print(f"  {'critical path':<24} {length:8.1f} s {' > '.join(path)}")
+
+
 class Build(Command):
     """Execute UnrealBuildTool for a specified target
 
@@ -143,6 +264,9 @@ class Build(Command):
        # Runs all the command UAT would execute to compile the project (i.e compiles ShaderCompileWorker and others)
        uecli build RTSGame --profile update-project
 
+       # Shows the slowest compiles and links, the timeline can be opened in chrome://tracing
+       uecli build RTSGameEditor --trace ubt.trace.json
+
     Notes
     -----
 
@@ -160,6 +284,9 @@ class Build(Command):
         platform: str = choice(*get_build_platforms(), default=guess_platform())  # Platform to build for, defaults to current platform (Win64, Linux, etc..)
         mode    : str = choice(*get_build_modes(), default="Development")  # Build mode (Tests, Debug, Development, Shipping)
         profile : Optional[str] = None  # Build multiple targets using a configuration
+        jobs    : int = 1                # Number of targets of the profile built by the same UnrealBuildTool invocation
+        no_cache: bool = False           # Always run UnrealBuildTool, even if the inputs did not change (the cache needs an installed engine)
+        trace   : str = None             # Time the UBT actions and write their Chrome trace to this file
     # fmt: on
 
     @staticmethod
@@ -182,21 +309,51 @@ class Build(Command):
             "ENGINE_FOLDER": engine_folder(),
         }
 
-        rc = 0
-        for command in commands:
-            # Temporary fix `BootstrapPackagedGame` is Windows only
-            if "BootstrapPackagedGame" in command and args.platform != "Windows":
-                continue
-
-            cmd = replace_variables(command, variables)
-
-            cmd = [ubt()] + cmd
-            print(" ".join(cmd), flush=True)
-
-            fmt = Formatter()
-            rc += popen_with_format(fmt, cmd)
-
-        return rc
+        # Temporary fix `BootstrapPackagedGame` is Windows only
+        if args.platform != "Windows":
+            commands = {
+                name: step
+                for name, step in commands.items()
+                if name != "BootstrapPackagedGame"
+            }
+
+        # UBT allows a single instance per engine, the steps that can be built at the same time
+        # are given to the same invocation which runs their actions in parallel
+        children = []
+        batch_of = {}
+        for names in batch_steps(commands, args.jobs):
+            if len(names) == 1:
+                cmd = replace_variables(commands[names[0]][0], variables)
+            else:
+                cmd = [
+                    target_argument(replace_variables(commands[name][0], variables))
+                    for name in names
+                ] + replace_variables(
+                    batch_options, dict(variables, STEPS="+".join(names))
+                )
+
+            batch = "+".join(names)
+            after = {
+                batch_of[dep]
+                for name in names
+                for dep in commands[name][1]
+                if dep in batch_of
+            }
+            batch_of.update({name: batch for name in names})
+
+            children.append(
+                Child(
+                    [ubt()] + cmd,
+                    Formatter(),
+                    name=batch,
+                    after=sorted(after),
+                    kind="build",
+                )
+            )
+
+        result = popen_dag(children, 1)
+        show_schedule(children, result)
+        return result.returncode
 
     @staticmethod
     def execute(args):
@@ -230,9 +387,11 @@ class Build(Command):
         if uproject is not None:
             cmd += [f"-Project={uproject}", uproject]
 
+        manifest = f"{engine_path}/Intermediate/Build/Manifest.xml"
+
         cmd.append("-NoUBTMakefiles")
         cmd.append("-NoHotReload")
-        cmd.append(f"-Manifest={engine_path}/Intermediate/Build/Manifest.xml")
+        cmd.append(f"-Manifest={manifest}")
         cmd.append(f"-abslog={logfile}")
 
         # Tools
@@ -249,10 +408,37 @@ class Build(Command):
         #
         #
         cmd = [ubt()] + cmd
+
+        cache = None
+        if uproject is not None and not args.no_cache:
+            cache = target_cache(uproject, target, platform, mode, cmd)
+
+        if cache is not None:
+            start = time.perf_counter()
+            if cache.is_up_to_date():
+                elapsed = time.perf_counter() - start
+                print(f"{target} is up to date ({elapsed:.2f} s), skipping UBT")
+                return 0
+
         print(" ".join(cmd), flush=True)
 
-        fmt = Formatter()
-        return popen_with_format(fmt, cmd)
+        if args.trace is not None:
+            fmt = UBTFormatter()
+            fmt.use_trace(args.trace)
+        else:
+            fmt = Formatter()
+
+        returncode = popen_with_format(fmt, cmd, kind="build")
+
+        # Writes the trace and shows the slowest actions
+        if args.trace is not None:
+            fmt.summary()
+
+        if cache is not None and returncode == 0:
+            cache.record_products(read_manifest(manifest))
+            cache.save()
+
+        return returncode
 
 
 COMMANDS = Build
@@ -0,0 +1,347 @@
+"""Skip UnrealBuildTool when nothing changed since the last successful build.
+
+The inputs of a project target (its sources, build rules, plugins and ``.uproject``),
+the engine build and the build command are reduced to a single fingerprint.
+Files are only hashed when their size or modification time changed since the last check,
+so checking an unchanged project only costs a ``stat`` per file.
+The files are scanned and hashed by a pool of threads.
+
+The build products listed in the UBT manifest are recorded after a successful build,
+a product that was modified or removed since then forces a build.
+
+Only installed engines are supported. The engine modules of a source build are rebuilt
+along with the project and their sources are not part of the fingerprint.
+"""
+import hashlib
+import json
+import os
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor
+
+CACHE_VERSION = 1
+
+# Folders of a project or plugin that hold build inputs
+INPUT_FOLDERS = ("Source",)
+
+# Files of a project or plugin folder that are build inputs
+INPUT_EXTENSIONS = (".uproject", ".uplugin")
+
+# Written by BuildGraph in the installed builds of the engine
+INSTALLED_BUILD = os.path.join("Build", "InstalledBuild.txt")
+
+# Engine files identifying its build (version, changelist), they are not written by UBT.
+# The engine manifest is not one of them, ``uecli build`` passes it to UBT which rewrites it
+ENGINE_FILES = (os.path.join("Build", "Build.version"), INSTALLED_BUILD)
+
+# Size of the reads when hashing a file
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def hash_file(path):
+    digest = hashlib.blake2b(digest_size=16)
+
+    with open(path, "rb") as file:
+        while chunk := file.read(HASH_CHUNK_SIZE):
+            digest.update(chunk)
+
+    return digest.hexdigest()
+
+
+def _try_hash_file(path):
+    """Returns the hash of a file, None if it cannot be read"""
+    try:
+        return hash_file(path)
+    except OSError:
+        return None
+
+
+def engine_fingerprint(engine_folder):
+    """Returns the fingerprint of the build of an installed engine, None for a source engine"""
+    if not os.path.exists(os.path.join(engine_folder, INSTALLED_BUILD)):
+        return None
+
+    digest = hashlib.blake2b(digest_size=16)
+
+    for name in ENGINE_FILES:
+        try:
+            digest.update(
+                f"{name}\0{hash_file(os.path.join(engine_folder, name))}\n".encode()
+            )
+        except OSError:
+            digest.update(f"{name}\0missing\n".encode())
+
+    return digest.hexdigest()
+
+
+def _scan_folder(folder):
+    """Returns the path, size and modification time of every file below ``folder``"""
+    files = []
+    stack = [folder]
+
+    while stack:
+        try:
+            entries = os.scandir(stack.pop())
+        except OSError:
+            continue
+
+        with entries:
+            for entry in entries:
+                if entry.name.startswith("."):
+                    continue
+
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                    continue
+
+                # Removed or renamed while we scan, it is not an input anymore
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+
+                files.append((entry.path, stat.st_size, stat.st_mtime_ns))
+
+    return files
+
+
+def _input_roots(project_folder):
+    """Returns the folders to scan and the files to check of a project and its plugins"""
+    folders = []
+    files = []
+
+    def add(folder):
+        try:
+            entries = list(os.scandir(folder))
+        except OSError:
+            return
+
+        for entry in entries:
+            if entry.is_file() and entry.name.endswith(INPUT_EXTENSIONS):
+                files.append(entry.path)
+
+            elif entry.is_dir() and entry.name in INPUT_FOLDERS:
+                try:
+                    modules = list(os.scandir(entry.path))
+                except OSError:
+                    continue
+
+                # Each module is scanned on its own so the pool is kept busy
+                for module in modules:
+                    if module.is_dir():
+                        folders.append(module.path)
+                    else:
+                        files.append(module.path)
+
+    add(project_folder)
+
+    plugins = os.path.join(project_folder, "Plugins")
+    stack = [plugins]
+    while stack:
+        try:
+            entries = list(os.scandir(stack.pop()))
+        except OSError:
+            continue
+
+        for entry in entries:
+            if not entry.is_dir():
+                continue
+
+            try:
+                names = os.listdir(entry.path)
+            except OSError:
+                continue
+
+            # A plugin folder, or a folder grouping plugins
+            if any(name.endswith(".uplugin") for name in names):
+                add(entry.path)
+            else:
+                stack.append(entry.path)
+
+    return folders, files
+
+
+class BuildCache:
+    """Fingerprint of the inputs and products of the last successful build of a target
+
+    Parameters
+    ----------
+    filename: str
+        File where the fingerprints are saved
+
+    project_folder: str
+        Folder of the ``.uproject``
+
+    key: list
+        Everything besides the files that changes the build (target, platform, engine build, command)
+
+    """
+
+    def __init__(self, filename, project_folder, key, jobs=None):
+        self.filename = filename
+        self.project_folder = project_folder
+        self.key = key
+        self.jobs = jobs or min(32, (os.cpu_count() or 1) + 4)
+        # relative path => [size, mtime_ns, hash]
+        self.inputs = {}
+        # path => [size, mtime_ns]
+        self.products = {}
+        self.fingerprint = None
+        self.previous = None
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.filename, encoding="utf-8") as file:
+                data = json.load(file)
+        except (OSError, ValueError):
+            return
+
+        if data.get("version") != CACHE_VERSION:
+            return
+
+        self.previous = data
+        self.inputs = data.get("inputs", {})
+
+    def scan(self):
+        """Update the fingerprint of the inputs, only the files that changed are hashed"""
+        folders, files = _input_roots(self.project_folder)
+
+        with ThreadPoolExecutor(self.jobs) as pool:
+            stats = []
+            for found in pool.map(_scan_folder, folders):
+                stats.extend(found)
+
+            for path in files:
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                stats.append((path, stat.st_size, stat.st_mtime_ns))
+
+            inputs = {}
+            changed = []
+            for path, size, mtime in stats:
+                name = os.path.relpath(path, self.project_folder).replace("\\", "/")
+                known = self.inputs.get(name)
+
+                # A file that could not be hashed is hashed again
+                if (
+                    known is not None
+                    and known[0] == size
+                    and known[1] == mtime
+                    and known[2] is not None
+                ):
+                    inputs[name] = known
+                else:
+                    inputs[name] = [size, mtime, None]
+                    changed.append((name, path))
+
+            # A file removed since its stat gets no hash, the fingerprint changes and UBT runs
+            for (name, _), digest in zip(
+                changed, pool.map(_try_hash_file, [path for _, path in changed])
+            ):
+                inputs[name][2] = digest
+
+        self.inputs = inputs
+
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(json.dumps(self.key).encode("utf-8"))
+
+        for name in sorted(inputs):
+            digest.update(f"{name}\0{inputs[name][2]}\n".encode())
+
+        self.fingerprint = digest.hexdigest()
+        return self.fingerprint
+
+    def products_changed(self):
+        """Returns the first build product that was modified or removed, None if they are intact"""
+        for path, (size, mtime) in self.previous.get("products", {}).items():
+            try:
+                stat = os.stat(path)
+            except OSError:
+                return path
+
+            if stat.st_size != size or stat.st_mtime_ns != mtime:
+                return path
+
+        return None
+
+    def is_up_to_date(self):
+        """Returns true if the last build used the same inputs and its products are intact"""
+        fingerprint = self.scan()
+
+        if self.previous is None or self.previous.get("fingerprint") != fingerprint:
+            return False
+
+        if not self.previous.get("products"):
+            return False
+
+        if self.products_changed() is not None:
+            return False
+
+        # Touched files were hashed again, save their new times so they are not next time
+        self.products = self.previous["products"]
+        if self.inputs != self.previous["inputs"]:
+            self.save()
+
+        return True
+
+    def record_products(self, paths):
+        self.products = {}
+
+        for path in paths:
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+
+            self.products[path] = [stat.st_size, stat.st_mtime_ns]
+
+    def save(self):
+        """Save the fingerprints of a successful build"""
+        data = {
+            "version": CACHE_VERSION,
+            "key": self.key,
+            "fingerprint": self.fingerprint,
+            "inputs": self.inputs,
+            "products": self.products,
+        }
+
+        os.makedirs(os.path.dirname(self.filename), exist_ok=True)
+
+        # Replaced at once so an interrupted save does not leave a corrupted cache
+        tmp = self.filename + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as file:
+            json.dump(data, file)
+
+        os.replace(tmp, self.filename)
+
+    def invalidate(self):
+        try:
+            os.remove(self.filename)
+        except OSError:
+            pass
+
+
+def read_manifest(path):
+    """Returns the build products listed in a UBT manifest"""
+    try:
+        root = ET.parse(path).getroot()
+    except (OSError, ET.ParseError):
+        return []
+
+    products = root.find("BuildProducts")
+    if products is None:
+        return []
+
+    return [item.text for item in products if item.text]
+
+
+def cache_path(project_folder, target, platform, mode):
+    return os.path.join(
+        project_folder,
+        "Intermediate",
+        "uetools",
+        "BuildCache",
+        f"{target}-{platform}-{mode}.json",
+    )
@@ -2,9 +2,10 @@
 from __future__ import annotations
 
 import argparse
+import sys
 import time
 import traceback
-from contextlib import contextmanager
+from contextlib import contextmanager, redirect_stdout
 
 from argklass.argformat import DumpParserAction, HelpAction, HelpActionException
 from argklass.command import ParentCommand
@@ -18,34 +19,117 @@ from uetools.commands import (
 )
 
 from .conf import BadConfig, select_engine_version
+from .manifest import lazy_commands
 from .perf import show_timings, timeit
+from .run import configure, prints_to_stderr, records_on_stdout
 from .util import deduce_project_plugin
 
 
+def global_parser():
+    """Parser of the options shared by every command"""
+    parser = argparse.ArgumentParser(
+        add_help=False, description="Unreal Engine Utility"
+    )
+    parser.add_argument(
+        "-h", "--help", action=HelpAction, help="show this help message and exit"
+    )
+    parser.add_argument("-zyx", action=DumpParserAction, help="")
+    parser.add_argument(
+        "-v",
+        "--engine-version",
+        nargs="?",
+        type=str,
+        default=None,
+        help="Engine version to use if you have multiple installed",
+    )
+    parser.add_argument(
+        "-xyz",
+        action="store_true",
+        default=False,
+        help="Show perf timing",
+    )
+    parser.add_argument(
+        "--output-format",
+        choices=["text", "jsonl", "msgpack"],
+        default="text",
+        help="Output of the log formatters, jsonl and msgpack write one record per line",
+    )
+    parser.add_argument(
+        "--output-file",
+        type=str,
+        default=None,
+        help="Write the records to this file instead of stdout",
+    )
+    parser.add_argument(
+        "--telemetry",
+        type=float,
+        default=None,
+        metavar="SECONDS",
+        help="Sample the CPU, memory and I/O of the processes at this interval",
+    )
+    parser.add_argument(
+        "--telemetry-file",
+        type=str,
+        default=None,
+        help="Save the samples to this file instead of next to the log",
+    )
+    parser.add_argument(
+        "--stall-timeout",
+        type=str,
+        default=None,
+        help="Stop the processes that show no output and no CPU activity for this many seconds, "
+        "per kind of command: 1800,cook=3600,build=2400,tests=900",
+    )
+    parser.add_argument(
+        "--stall-cpu",
+        type=float,
+        default=5.0,
+        help="Percent of one core below which the processes are idle",
+    )
+    parser.add_argument(
+        "--stall-signal",
+        choices=["term", "int", "none"],
+        default="term",
+        help="Signal sent to a stalled process before it is killed",
+    )
+    parser.add_argument(
+        "--stall-grace",
+        type=float,
+        default=60,
+        help="Seconds given to a stalled process to exit before it is killed",
+    )
+    parser.add_argument(
+        "--nice",
+        type=int,
+        default=None,
+        help="Priority of the processes, from -20 (highest) to 19 (lowest)",
+    )
+    parser.add_argument(
+        "--ionice",
+        choices=["idle", "low", "normal"],
+        default=None,
+        help="I/O priority of the processes",
+    )
+    parser.add_argument(
+        "--affinity",
+        type=str,
+        default=None,
+        help="CPUs the processes can run on, e.g. 0-7,16-23",
+    )
+    parser.add_argument(
+        "--memory-limit",
+        type=str,
+        default=None,
+        help="Memory ceiling of the processes, e.g. 16G (linux, needs systemd-run)",
+    )
+
+    return parser
+
+
 # Argument Parser cannot be pickled
 def build_parser(commands):
     with timeit("build_parser"):
-        parser = argparse.ArgumentParser(
-            add_help=False, description="Unreal Engine Utility"
-        )
-        parser.add_argument(
-            "-h", "--help", action=HelpAction, help="show this help message and exit"
-        )
-        parser.add_argument("-zyx", action=DumpParserAction, help="")
-        parser.add_argument(
-            "-v",
-            "--engine-version",
-            nargs="?",
-            type=str,
-            default=None,
-            help="Engine version to use if you have multiple installed",
-        )
-        parser.add_argument(
-            "-xyz",
-            action="store_true",
-            default=False,
-            help="Show perf timing",
-        )
+        parser = global_parser()
 
         subparsers = parser.add_subparsers(dest="command")
 
@@ -68,6 +152,8 @@ def parse_args(commands, argv):
         select_engine_version(args.engine_version)
         args.engine_version = None
 
+    configure(args)
+
     return args
 
 
@@ -118,7 +204,10 @@ def main(argv=None):
 
     with with_cache_location(uetools.core.__name__):
         with timeit("discover_commands"):
-            commands = discover_commands()
+            if argv is None:
+                argv = sys.argv[1:]
+
+            commands = lazy_commands(global_parser(), argv, discover_commands)
 
         with timeit("parse_args"):
             try:
@@ -136,7 +225,7 @@ def main(argv=None):
         print(f"Action `{cmd_name}` not implemented")
         return -1
 
-    with timeit("command.execute"):
+    with timeit("command.execute"), prints_to_stderr():
         returncode = command.execute(parsed_args)
 
     if returncode is None:
@@ -165,7 +254,15 @@ def profiler(enabled=False):
             sortby = pstats.SortKey.CUMULATIVE
             ps = pstats.Stats(profile, stream=s).sort_stats(sortby)
             ps.print_stats(25)
-            print(s.getvalue())
+            print(s.getvalue(), file=diagnostics_stream())
+
+
+def diagnostics_stream():
+    """Stream of the epilog and timings, stderr when the records are written to stdout"""
+    if records_on_stdout():
+        return sys.stderr
+
+    return sys.stdout
 
 
 def epilog():
@@ -180,8 +277,6 @@ def epilog():
 
 
 def main_force(argv=None):
-    import sys
-
     should_profile = "-xyz" in sys.argv
     # should_profile = False
 
@@ -190,9 +285,10 @@ def main_force(argv=None):
 
     shutdown()
 
-    epilog()
+    with redirect_stdout(diagnostics_stream()):
+        epilog()
 
-    show_timings()
+        show_timings()
 
     sys.exit(r)
 
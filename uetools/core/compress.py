@@ -0,0 +1,120 @@
+"""Read compressed logs as a stream, without decompressing them to disk first.
+
+The compression is detected from the first bytes of the stream so it works
+for files and for pipes (``cat RTSGame.log.gz | uecli fmt``).
+gzip and xz are supported by the standard library, zstd needs ``zstandard``.
+"""
+import gzip
+import io
+import lzma
+
+# Size of the decompressed blocks given to the formatter
+DECOMPRESS_CHUNK_SIZE = 1024 * 1024
+
+MAGIC = [
+    (b"\x1f\x8b", "gzip"),
+    (b"\xfd7zXZ\x00", "xz"),
+    (b"\x28\xb5\x2f\xfd", "zstd"),
+]
+
+MAGIC_SIZE = max(len(magic) for magic, _ in MAGIC)
+
+
+def detect(header):
+    """Returns the compression of a stream starting with ``header``, None if it is not compressed
+
+    Examples
+    --------
+
+    >>> detect(gzip.compress(b"LogInit: Display: hello"))
+    'gzip'
+    >>> detect(b"LogInit: Display: hello") is None
+    True
+
+    """
+    for magic, name in MAGIC:
+        if header.startswith(magic):
+            return name
+
+    return None
+
+
+class _Prefixed(io.RawIOBase):
+    """Put back the bytes read to detect the compression in front of the stream"""
+
+    def __init__(self, prefix, stream):
+        super().__init__()
+        self.prefix = prefix
+        self.stream = stream
+        self.read_more = getattr(stream, "read1", stream.read)
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        if self.prefix:
+            size = min(len(buffer), len(self.prefix))
+            buffer[:size] = self.prefix[:size]
+            self.prefix = self.prefix[size:]
+            return size
+
+        data = self.read_more(len(buffer))
+        buffer[: len(data)] = data
+        return len(data)
+
+
+def _zstd_reader(stream):
+    try:
+        import zstandard
+    except ImportError as err:
+        raise RuntimeError(
+            "zstandard is required to read zstd logs: pip install uetools[zstd]"
+        ) from err
+
+    # Logs compressed while they were written are made of several frames
+    return zstandard.ZstdDecompressor().stream_reader(
+        stream, read_size=DECOMPRESS_CHUNK_SIZE, read_across_frames=True
+    )
+
+
+def compression_of(path):
+    """Returns the compression of a file, None if it is not compressed"""
+    with open(path, "rb") as file:
+        return detect(file.read(MAGIC_SIZE))
+
+
+def open_stream(stream):
+    """Returns the stream decompressed if it is compressed.
+
+    The stream is read from the start, it does not need to be seekable.
+    Returns the compression that was detected along with the readable stream.
+    """
+    header = b""
+
+    # read on a pipe can return less than asked
+    while len(header) < MAGIC_SIZE:
+        data = stream.read(MAGIC_SIZE - len(header))
+
+        if not data:
+            break
+
+        header += data
+
+    compression = detect(header)
+
+    if stream.seekable():
+        stream.seek(-len(header), io.SEEK_CUR)
+        raw = stream
+    else:
+        raw = io.BufferedReader(_Prefixed(header, stream), DECOMPRESS_CHUNK_SIZE)
+
+    if compression == "gzip":
+        return compression, gzip.GzipFile(fileobj=raw, mode="rb")
+
+    if compression == "xz":
+        return compression, lzma.LZMAFile(raw, mode="rb")
+
+    if compression == "zstd":
+        return compression, _zstd_reader(raw)
+
+    return compression, raw
@@ -0,0 +1,237 @@
+"""Follow a log file as it is written, like ``tail -F``.
+
+The follower sleeps until the file is created or grows, using inotify on linux
+and a polling loop with an exponential backoff everywhere else.
+Truncated files are read again from the start, rotated files are reopened.
+New lines are given to a :class:`~uetools.format.base.Formatter`.
+"""
+import ctypes
+import ctypes.util
+import os
+import select
+import threading
+
+from uetools.core.conf import LINUX
+from uetools.core.run import CHUNK_SIZE, LineSplitter
+
+# Longest time we sleep without looking at the file,
+# in case the file system does not send notifications (network shares)
+MAX_WAIT = 1
+
+# Polling delays
+MIN_DELAY = 0.01
+MAX_DELAY = 1
+
+# inotify flags, from <sys/inotify.h>
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = (
+    IN_MODIFY
+    | IN_ATTRIB
+    | IN_CLOSE_WRITE
+    | IN_MOVED_FROM
+    | IN_MOVED_TO
+    | IN_CREATE
+    | IN_DELETE
+)
+
+
+class PollWatcher:
+    """Sleep a bit longer every time nothing happened"""
+
+    def __init__(self, min_delay=MIN_DELAY, max_delay=MAX_DELAY):
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.delay = min_delay
+        self.woken = threading.Event()
+
+    def wait(self):
+        self.woken.wait(self.delay)
+        self.delay = min(self.delay * 2, self.max_delay)
+
+    def reset(self):
+        self.delay = self.min_delay
+
+    def wake(self):
+        self.woken.set()
+
+    def close(self):
+        pass
+
+
+class InotifyWatcher:
+    """Sleep until something changes inside the folder of the file"""
+
+    def __init__(self, folder):
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno))
+
+        watch = libc.inotify_add_watch(self.fd, os.fsencode(folder), WATCH_MASK)
+        if watch < 0:
+            errno = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(errno, os.strerror(errno))
+
+        # Written to by wake() to interrupt the select
+        self.wakeup_read, self.wakeup_write = os.pipe()
+
+    def wait(self):
+        ready, _, _ = select.select([self.fd, self.wakeup_read], [], [], MAX_WAIT)
+
+        if self.fd in ready:
+            # We only need to know that something happened, discard the events
+            try:
+                while os.read(self.fd, 4096):
+                    pass
+            except BlockingIOError:
+                pass
+
+    def reset(self):
+        pass
+
+    def wake(self):
+        os.write(self.wakeup_write, b"\0")
+
+    def close(self):
+        for fd in (self.fd, self.wakeup_read, self.wakeup_write):
+            os.close(fd)
+
+
+def new_watcher(filename):
+    """Returns the most efficient watcher available for this file"""
+    folder = os.path.dirname(os.path.abspath(filename))
+
+    if LINUX and os.path.isdir(folder):
+        try:
+            return InotifyWatcher(folder)
+        except (OSError, AttributeError):
+            pass
+
+    return PollWatcher()
+
+
+class Follower:
+    """Read the lines of a file as they are written and send them to a formatter.
+
+    Parameters
+    ----------
+    filename: str
+        File to follow, it does not need to exist yet
+
+    fmt: Formatter
+        Formatter that receives the lines
+
+    """
+
+    def __init__(self, filename, fmt, chunksize=CHUNK_SIZE):
+        self.filename = filename
+        self.fmt = fmt
+        self.chunksize = chunksize
+        self.stopped = threading.Event()
+        self.watcher = new_watcher(filename)
+        self.file = None
+        self.inode = None
+        self.splitter = None
+
+    def stop(self):
+        """Read what is left and return from :meth:`run`"""
+        self.stopped.set()
+        self.watcher.wake()
+
+    def _open(self):
+        try:
+            # Read until the file is rotated or the follower stops, closed by _close
+            self.file = open(self.filename, "rb")  # noqa: SIM115
+        except OSError:
+            return False
+
+        self.inode = os.fstat(self.file.fileno()).st_ino
+        self.splitter = LineSplitter()
+        return True
+
+    def _close(self):
+        self.fmt.match_lines(self.splitter.finish())
+        self.fmt.flush()
+        self.file.close()
+        self.file = None
+
+    def _read(self):
+        """Read everything that was written, returns true if something was read"""
+        got_data = False
+
+        while True:
+            chunk = self.file.read(self.chunksize)
+
+            if not chunk:
+                break
+
+            got_data = True
+            self.fmt.match_lines(self.splitter.feed(chunk))
+
+        if got_data:
+            self.fmt.flush()
+
+        return got_data
+
+    def _replaced(self):
+        """Returns true if the file was truncated or rotated"""
+        if os.fstat(self.file.fileno()).st_size < self.file.tell():
+            return True
+
+        try:
+            return os.stat(self.filename).st_ino != self.inode
+        except OSError:
+            # Removed, keep the old file until a new one is created
+            return False
+
+    def run(self):
+        try:
+            while True:
+                stopping = self.stopped.is_set()
+
+                if self.file is None and not self._open():
+                    if stopping:
+                        break
+
+                    self.watcher.wait()
+                    continue
+
+                if self._read():
+                    self.watcher.reset()
+                    continue
+
+                if self._replaced():
+                    self._close()
+                    continue
+
+                if stopping:
+                    break
+
+                self.watcher.wait()
+        finally:
+            if self.file is not None:
+                self._close()
+
+            self.watcher.close()
+
+
+def follow(filename, fmt, chunksize=CHUNK_SIZE):
+    """Start following a file in a background thread, returns the follower and its thread"""
+    follower = Follower(filename, fmt, chunksize)
+
+    thread = threading.Thread(target=follower.run, daemon=True)
+    thread.start()
+
+    return follower, thread
@@ -0,0 +1,304 @@
+"""Only import the module of the command being executed.
+
+Discovering the commands imports every module of ``uetools.commands`` and ``uetools.plugins``,
+some of them import heavy dependencies that most commands never use.
+The manifest maps the name of every command, and subcommand, to the module and class implementing it,
+it is generated by a full discovery the first time ``uecli`` runs and saved in the user cache.
+
+The command path is resolved from the arguments first, then only the arguments of the commands
+on that path are added to the parser. ``--help`` and ``-zyx`` still build every command.
+
+The manifest is stale when a file of the command packages was added, removed or modified,
+or when uetools was upgraded. It is then generated again.
+
+Set ``UETOOLS_LAZY_COMMANDS=0`` to always import every command.
+"""
+import hashlib
+import importlib
+import json
+import os
+
+from appdirs import user_cache_dir
+from argklass.command import ParentCommand
+
+import uetools.core
+from uetools.core.conf import AUTHOR, NAME
+
+MANIFEST_VERSION = 2
+
+# Options of ``uecli`` that show or dump every command
+ALL_COMMANDS = ("-h", "--help", "-zyx")
+
+
+def lazy_enabled():
+    return os.environ.get("UETOOLS_LAZY_COMMANDS", "1").lower() not in ("0", "false")
+
+
+def command_packages():
+    import uetools.commands
+    import uetools.plugins
+
+    return [uetools.commands, uetools.plugins]
+
+
+def source_fingerprint():
+    """Hash of the name, size and modification time of the files of the command packages"""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(uetools.core.__version__.encode("utf-8"))
+
+    for package in command_packages():
+        for folder in package.__path__:
+            stack = [folder]
+
+            while stack:
+                try:
+                    entries = sorted(os.scandir(stack.pop()), key=lambda e: e.name)
+                except OSError:
+                    continue
+
+                for entry in entries:
+                    if entry.is_dir():
+                        if entry.name != "__pycache__":
+                            stack.append(entry.path)
+                        continue
+
+                    if entry.name.endswith(".py"):
+                        stat = entry.stat()
+                        digest.update(
+                            f"{entry.path}\0{stat.st_size}\0{stat.st_mtime_ns}\n".encode()
+                        )
+
+    return digest.hexdigest()
+
+
+def manifest_path():
+    """The cache is shared by every installation of uetools, each gets its own manifest"""
+    location = os.path.dirname(os.path.abspath(uetools.core.__file__))
+    key = hashlib.blake2b(location.encode("utf-8"), digest_size=4).hexdigest()
+    return os.path.join(user_cache_dir(NAME, AUTHOR), f"commands-{key}.json")
+
+
+def _entry(cls):
+    entry = {"module": cls.__module__, "cls": cls.__qualname__}
+
+    if issubclass(cls, ParentCommand):
+        entry["subcommands"] = {
+            subcmd.name: _entry(subcmd) for subcmd in cls.fetch_commands()
+        }
+
+    return entry
+
+
+def generate_manifest(commands):
+    """Returns the manifest of the commands found by a full discovery"""
+    return {
+        "version": MANIFEST_VERSION,
+        "fingerprint": source_fingerprint(),
+        "commands": {name: _entry(type(command)) for name, command in commands.items()},
+    }
+
+
+def save_manifest(manifest, path=None):
+    path = path or manifest_path()
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    # Several uecli can start at the same time, the manifest is replaced at once
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as file:
+        json.dump(manifest, file, indent=1)
+
+    os.replace(tmp, path)
+
+
+def load_manifest(path=None):
+    """Returns the manifest if it matches the installed commands, None otherwise"""
+    try:
+        with open(path or manifest_path(), encoding="utf-8") as file:
+            manifest = json.load(file)
+    except (OSError, ValueError):
+        return None
+
+    if manifest.get("version") != MANIFEST_VERSION:
+        return None
+
+    if manifest.get("fingerprint") != source_fingerprint():
+        return None
+
+    return manifest
+
+
+class LazyCommand:
+    """Stands for a command until it is used, then imports its module
+
+    ``subcommands`` are the only subcommands of a :class:`ParentCommand` added to the parser,
+    all of them are added when it is None.
+    """
+
+    def __init__(self, name, module, cls, subcommands=None):
+        self.name = name
+        self.module = module
+        self.cls = cls
+        self.subcommands = subcommands
+        self._command = None
+
+    def command_class(self):
+        obj = importlib.import_module(self.module)
+
+        for attr in self.cls.split("."):
+            obj = getattr(obj, attr)
+
+        # Set by the discovery for the commands without a name
+        if not hasattr(obj, "name"):
+            obj.name = self.name
+
+        return obj
+
+    def load(self):
+        if self._command is None:
+            self._command = self.command_class()()
+
+        return self._command
+
+    def arguments(self, subparsers):
+        cls = self.command_class()
+
+        if self.subcommands is None or not issubclass(cls, ParentCommand):
+            return cls.arguments(subparsers)
+
+        return parent_arguments(cls, subparsers, self.subcommands)
+
+    def execute(self, args):
+        return self.load().execute(args)
+
+    def __call__(self):
+        # ParentCommand.register instantiates the subcommands it dispatches to
+        return self
+
+    def __getattr__(self, attr):
+        return getattr(self.load(), attr)
+
+
+def parent_arguments(cls, subparsers, subcommands):
+    """``ParentCommand.arguments`` with only ``subcommands`` added to the parser
+
+    ``fetch_commands`` is the argklass hook returning the subcommands of a parent,
+    it returns ``subcommands`` while the arguments are added.
+    """
+    original = cls.__dict__.get("fetch_commands")
+    cls.fetch_commands = classmethod(lambda _: subcommands)
+
+    try:
+        return cls.arguments(subparsers)
+    finally:
+        if original is None:
+            del cls.fetch_commands
+        else:
+            cls.fetch_commands = original
+
+
+def lazy_command(name, entry, argv):
+    """Returns the command ``name`` with only the subcommands named in ``argv``.
+
+    Every subcommand of a parent is added when the help of the parent is requested
+    or the subcommand is unknown, so argparse can list them.
+    """
+    subcommands = None
+
+    for i, arg in enumerate(argv):
+        if "subcommands" not in entry or arg in ALL_COMMANDS:
+            break
+
+        if not arg.startswith("-"):
+            subentry = entry["subcommands"].get(arg)
+
+            if subentry is not None:
+                subcommands = [lazy_command(arg, subentry, argv[i + 1 :])]
+            break
+
+    return LazyCommand(name, entry["module"], entry["cls"], subcommands)
+
+
+def _takes_value(parser, option):
+    """Returns how many values an option of ``parser`` consumes (0, 1 or ``?``)"""
+    action = parser._option_string_actions.get(option)
+
+    if action is None or action.nargs == 0:
+        return 0
+
+    if action.nargs == "?":
+        return "?"
+
+    return 1
+
+
+def command_index(parser, argv):
+    """Find the command in the arguments, without parsing them.
+
+    Returns None if an option asks for every command (``--help``) or no command is given.
+    """
+    i = 0
+    while i < len(argv):
+        arg = argv[i]
+
+        if not arg.startswith("-"):
+            return i
+
+        if arg in ALL_COMMANDS:
+            return None
+
+        if "=" not in arg:
+            values = _takes_value(parser, arg)
+
+            # Skip the value of the option, optional values never start with a dash
+            optional = values == "?" and i + 1 < len(argv)
+            if values == 1 or (optional and not argv[i + 1].startswith("-")):
+                i += 1
+
+        i += 1
+
+    return None
+
+
+def command_name(parser, argv):
+    index = command_index(parser, argv)
+
+    if index is None:
+        return None
+
+    return argv[index]
+
+
+def lazy_commands(parser, argv, discover):
+    """Returns the commands needed to parse ``argv``
+
+    Only the invoked command and subcommands are imported and added to the parser
+    when the manifest is up to date, otherwise every command is discovered
+    and the manifest is written again.
+    """
+    if not lazy_enabled():
+        return discover()
+
+    manifest = load_manifest()
+
+    if manifest is None:
+        commands = discover()
+
+        try:
+            save_manifest(generate_manifest(commands))
+        except OSError:
+            pass
+
+        return commands
+
+    index = command_index(parser, argv)
+    entry = None
+
+    if index is not None:
+        entry = manifest["commands"].get(argv[index])
+
+    # Unknown commands and --help need every command
+    if entry is None:
+        return discover()
+
+    name = argv[index]
+    return {name: lazy_command(name, entry, argv[index + 1 :])}
@@ -0,0 +1,155 @@
+"""Lower the priority of the processes we start so they do not slow down interactive work.
+
+The policy is applied to the process right after it started,
+the processes it starts afterwards (ShaderCompileWorker, compilers, ...) inherit it.
+The memory ceiling uses a transient systemd scope on linux,
+every process of the scope counts toward the limit.
+"""
+import logging
+import shutil
+import sys
+
+import psutil
+
+log = logging.getLogger(__name__)
+
+IONICE = ("idle", "low", "normal")
+
+
+def parse_cpus(spec):
+    """Parse a list of CPUs like ``taskset``
+
+    Examples
+    --------
+
+    >>> parse_cpus("0-3,8,10-11")
+    [0, 1, 2, 3, 8, 10, 11]
+
+    """
+    cpus = set()
+
+    for item in spec.split(","):
+        item = item.strip()
+
+        if not item:
+            continue
+
+        first, _, last = item.partition("-")
+        cpus.update(range(int(first), int(last or first) + 1))
+
+    return sorted(cpus)
+
+
+def parse_memory(spec):
+    """Parse a memory size with an optional K, M, G or T suffix into bytes
+
+    Examples
+    --------
+
+    >>> parse_memory("16G")
+    17179869184
+    >>> parse_memory("512m")
+    536870912
+
+    """
+    units = "KMGT"
+    spec = spec.strip().upper().rstrip("B")
+
+    if spec and spec[-1] in units:
+        return int(float(spec[:-1]) * 1024 ** (units.index(spec[-1]) + 1))
+
+    return int(spec)
+
+
+def _windows_priority(nice):
+    """Closest windows priority class of a nice level"""
+    if nice >= 15:
+        return psutil.IDLE_PRIORITY_CLASS
+    if nice >= 5:
+        return psutil.BELOW_NORMAL_PRIORITY_CLASS
+    if nice > -5:
+        return psutil.NORMAL_PRIORITY_CLASS
+    if nice > -15:
+        return psutil.ABOVE_NORMAL_PRIORITY_CLASS
+    return psutil.HIGH_PRIORITY_CLASS
+
+
+def _set_nice(process, nice):
+    if sys.platform == "win32":
+        process.nice(_windows_priority(nice))
+    else:
+        process.nice(nice)
+
+
+def _set_ionice(process, ionice):
+    if sys.platform == "win32":
+        levels = {
+            "idle": psutil.IOPRIO_VERYLOW,
+            "low": psutil.IOPRIO_LOW,
+            "normal": psutil.IOPRIO_NORMAL,
+        }
+        process.ionice(levels[ionice])
+        return
+
+    if ionice == "idle":
+        process.ionice(psutil.IOPRIO_CLASS_IDLE)
+    else:
+        # best effort, 0 is the highest priority and 7 the lowest
+        process.ionice(psutil.IOPRIO_CLASS_BE, 7 if ionice == "low" else 4)
+
+
+def apply_policy(pid, nice=None, ionice=None, affinity=None):
+    """Set the priority of a process and of the children it already started"""
+    try:
+        root = psutil.Process(pid)
+        tree = [root] + root.children(recursive=True)
+    except psutil.NoSuchProcess:
+        return
+
+    cpus = parse_cpus(affinity) if affinity else None
+
+    for process in tree:
+        try:
+            if nice is not None:
+                _set_nice(process, nice)
+
+            if ionice is not None:
+                _set_ionice(process, ionice)
+
+            if cpus is not None:
+                process.cpu_affinity(cpus)
+
+        except AttributeError:
+            # ionice and cpu_affinity are not available on macOS
+            log.warning("Process priority is not fully supported on %s", sys.platform)
+            return
+
+        except psutil.AccessDenied:
+            # Raising the priority needs more privileges
+            log.warning("Not allowed to change the priority of process %d", process.pid)
+
+        except psutil.NoSuchProcess:
+            continue
+
+
+def limit_memory(args, limit):
+    """Returns the command to run so the process tree cannot use more than ``limit`` memory"""
+    if not limit:
+        return args
+
+    if not sys.platform.startswith("linux") or shutil.which("systemd-run") is None:
+        log.warning("A memory limit needs systemd-run, running without it")
+        return args
+
+    return [
+        "systemd-run",
+        "--user",
+        "--scope",
+        "--quiet",
+        "-p",
+        f"MemoryMax={parse_memory(limit)}",
+        # Do not move the memory over the limit to swap
+        "-p",
+        "MemorySwapMax=0",
+        "--",
+    ] + list(args)
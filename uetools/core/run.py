@@ -1,34 +1,696 @@
+import asyncio
+import codecs
+import io
+import queue
 import subprocess
+import sys
+import threading
+import time
+from contextlib import contextmanager, redirect_stdout
+from dataclasses import dataclass, field
+
+from uetools.format.sink import PrefixSink, TerminalSink
 
 # This is a bit of future proofing in case I start to need to wrap it
 run = subprocess.run
 
+# Size of the reads done on the output pipe of the child process
+CHUNK_SIZE = 64 * 1024
+
+# Time we keep reading after the child exited, if a grand child
+# inherited the pipe it might never be closed
+DRAIN_TIMEOUT = 1
+
+# Returned when the process was stopped by the watchdog, like timeout(1)
+STALLED_EXIT_CODE = 124
+
+
+@dataclass
+class RunOptions:
+    """Options shared by every command that runs a process through :func:`popen_with_format`,
+    they are set from the command line by :func:`configure`"""
+
+    # text, jsonl or msgpack
+    output_format: str = "text"
+    # write the records to this file instead of stdout
+    output_file: str = None
+    # seconds between two samples of the resources used by the process tree, None to disable
+    telemetry: float = None
+    # where the samples are saved, defaults to next to the log
+    telemetry_file: str = None
+    # seconds without output and CPU activity before a process is stopped,
+    # a default and overrides per kind of command: 1800,cook=3600,tests=900
+    stall_timeout: str = None
+    # percent of one core below which the process tree is idle
+    stall_cpu: float = 5.0
+    # signal sent before killing a stalled process: term, int or none
+    stall_signal: str = "term"
+    # seconds between the signal and the kill
+    stall_grace: float = 60
+    # priority of the processes, -20 (highest) to 19 (lowest)
+    nice: int = None
+    # I/O priority: idle, low or normal
+    ionice: str = None
+    # CPUs the processes can run on: 0-7,16-23
+    affinity: str = None
+    # memory ceiling of the process tree (linux only): 16G
+    memory_limit: str = None
+
+
+options = RunOptions()
+
+_output_files = {}
+
+# stdout of the records while the prints of the command are sent to stderr
+_records_stdout = None
+
+
+def configure(args):
+    """Update the run options with the values of the parsed command line"""
+    for name in RunOptions.__dataclass_fields__:
+        if hasattr(args, name):
+            setattr(options, name, getattr(args, name))
+
+
+def records_on_stdout():
+    """Returns true if the records are written to stdout"""
+    return options.output_format != "text" and options.output_file is None
+
+
+@contextmanager
+def prints_to_stderr():
+    """Send the prints of the command to stderr when stdout holds the records,
+    so only records are written to stdout"""
+    global _records_stdout
+
+    if not records_on_stdout():
+        yield
+        return
+
+    _records_stdout = sys.stdout.buffer
+    try:
+        with redirect_stdout(sys.stderr):
+            yield
+    finally:
+        _records_stdout = None
+
+
+def _output_stream(path):
+    if path is None:
+        return _records_stdout
+
+    # Every formatter of the command appends to the same file, it stays open until exit
+    stream = _output_files.get(path)
+
+    if stream is None:
+        stream = open(path, "ab")  # noqa: SIM115
+        _output_files[path] = stream
+
+    return stream
+
+
+def configure_output(fmt, name=None, prefix=None, sink=None):
+    """Select the output of the formatter, text or records, from the run options.
+
+    When several processes are running, ``prefix`` tells their lines apart
+    and ``sink`` is the terminal sink they share, records are tagged with ``name``.
+    """
+    if options.output_format != "text":
+        fmt.use_record_sink(
+            _output_stream(options.output_file), options.output_format, name
+        )
+        return
+
+    if prefix is None:
+        fmt.use_terminal_sink()
+        return
+
+    if fmt.print is print:
+        fmt.set_sink(PrefixSink(sink or TerminalSink(), prefix))
+
+
+class LineSplitter:
+    """Decode chunks of bytes into lines, with the same newline translation as text mode
+
+    Examples
+    --------
+
+    >>> splitter = LineSplitter()
+    >>> splitter.feed(b"LogInit: first\\r\\nLogInit: sec")
+    ['LogInit: first\\n']
+    >>> splitter.feed(b"ond\\n\\xc3")
+    ['LogInit: second\\n']
+    >>> splitter.feed(b"\\xa9t\\xc3\\xa9")
+    []
+    >>> splitter.finish()
+    ['été']
+
+    """
+
+    def __init__(self, encoding="utf-8", errors="replace"):
+        decoder = codecs.getincrementaldecoder(encoding)(errors=errors)
+        self.decoder = io.IncrementalNewlineDecoder(decoder, translate=True)
+        self.pending = ""
+
+    def feed(self, chunk, final=False):
+        """Decode a chunk and returns the lines it completed, lines keep their trailing newline"""
+        text = self.pending + self.decoder.decode(chunk, final=final)
+
+        lines = text.split("\n")
+        self.pending = lines.pop()
+
+        lines = [line + "\n" for line in lines]
+
+        if final and self.pending:
+            lines.append(self.pending)
+            self.pending = ""
+
+        return lines
+
+    def finish(self):
+        """Returns the last line even if it did not end with a newline"""
+        return self.feed(b"", final=True)
+
+
+def _read_chunks(stream, chunks, chunksize):
+    """Read the pipe as fast as possible so the child is never blocked on its output"""
+    # Buffered streams would wait for a full chunk
+    read = getattr(stream, "read1", stream.read)
+
+    try:
+        while True:
+            chunk = read(chunksize)
+
+            if not chunk:
+                break
+
+            chunks.put(chunk)
+    except (OSError, ValueError):
+        pass
+    finally:
+        chunks.put(None)
+
 
-def popen_with_format(fmt, args, shell=False):
-    """Execute a command with the given formatter."""
+def format_stream(fmt, stream, chunksize=CHUNK_SIZE, process=None):
+    """Read a binary stream in chunks and feed its lines to the formatter in batches.
 
-    print(" ".join(args))
+    If ``process`` is given, stop reading when the stream stays idle after the process exited.
+    """
+    chunks = queue.Queue()
+    splitter = LineSplitter()
+
+    reader = threading.Thread(
+        target=_read_chunks, args=(stream, chunks, chunksize), daemon=True
+    )
+    reader.start()
+
+    while True:
+        try:
+            chunk = chunks.get(timeout=DRAIN_TIMEOUT)
+        except queue.Empty:
+            # The child exited, but something is still holding the pipe
+            if process is not None and process.poll() is not None:
+                break
+
+            # Idle, write what was delayed
+            fmt.flush()
+            continue
+
+        if chunk is None:
+            break
+
+        fmt.match_lines(splitter.feed(chunk))
+
+        # Nothing else to process, show what we have
+        if chunks.empty():
+            fmt.flush()
+
+    fmt.match_lines(splitter.finish())
+    fmt.flush()
+
+
+def sidecar_path(args, extension):
+    """Returns the path of a file saved next to the log of a command
+
+    Examples
+    --------
+
+    >>> sidecar_path(["UnrealEditor", "-abslog=/logs/Cook.log", "-run=cook"], ".uetel")
+    '/logs/Cook.log.uetel'
+
+    """
+    for arg in args:
+        arg = str(arg)
+
+        if arg.lower().startswith("-abslog="):
+            return arg.split("=", 1)[1].strip('"') + extension
+
+    if options.output_file is not None:
+        return options.output_file + extension
+
+    return f"uetools-{time.strftime('%Y%m%d-%H%M%S')}{extension}"
+
+
+def popen_with_format(fmt, args, shell=False, chunksize=CHUNK_SIZE, kind=None):
+    """Execute a command with the given formatter.
+
+    The output is read in large binary chunks, decoded once per chunk
+    and given to the formatter as batches of lines.
+    The pipe is drained completely before returning.
+
+    ``kind`` (cook, build, tests, ...) selects the stall timeout of the command.
+    """
+
+    configure_output(fmt)
+    args = _limit_memory(args)
+
+    # Keep stdout for the records
+    if fmt.records is not None:
+        print(" ".join(args), file=sys.stderr)
+    else:
+        print(" ".join(args))
 
     with subprocess.Popen(
         args,
         stdout=subprocess.PIPE,
         stderr=subprocess.STDOUT,
-        # This is needed because without lines might not be recognized as such
-        text=True,
+        # Unbuffered, each read returns as soon as some output is available
+        bufsize=0,
         shell=shell,
     ) as process:
+        _apply_policy(process.pid)
+        sampler = _start_telemetry(process)
+        watchdog = _start_watchdog(process, args, kind)
+        stream = process.stdout if watchdog is None else watchdog.watch(process.stdout)
+
         try:
-            while process.poll() is None:
-                # sys.stdout.flush()
+            format_stream(fmt, stream, chunksize, process)
 
-                line = process.stdout.readline()
+            returncode = process.wait() + fmt.returncode()
 
-                if len(line) > 0:
-                    fmt.match_regex(line)
+            if watchdog is not None and watchdog.stalled:
+                return STALLED_EXIT_CODE
 
-            return process.poll() + fmt.returncode()
+            return returncode
         except KeyboardInterrupt:
+            fmt.flush()
             print("Stopping due to user interrupt")
             process.kill()
+        finally:
+            if watchdog is not None:
+                watchdog.stop()
+
+            _stop_telemetry(fmt, sampler, args)
 
         return -1
+
+
+def _limit_memory(args):
+    if not options.memory_limit:
+        return args
+
+    from uetools.core.priority import limit_memory
+
+    return limit_memory(args, options.memory_limit)
+
+
+def _apply_policy(pid, affinity=None):
+    """Apply the scheduling options to a process we just started"""
+    affinity = affinity or options.affinity
+
+    if options.nice is None and options.ionice is None and affinity is None:
+        return
+
+    from uetools.core.priority import apply_policy
+
+    apply_policy(pid, options.nice, options.ionice, affinity)
+
+
+def _start_watchdog(process, args, kind):
+    if not options.stall_timeout:
+        return None
+
+    from uetools.core.watchdog import Watchdog, parse_timeouts
+
+    timeouts = parse_timeouts(options.stall_timeout)
+    timeout = timeouts.get(kind, timeouts.get(None))
+
+    if not timeout:
+        return None
+
+    return Watchdog(
+        process,
+        timeout,
+        snapshot=sidecar_path(args, ".stall.txt"),
+        cpu=options.stall_cpu,
+        grace=options.stall_grace,
+        sig=options.stall_signal,
+    ).start()
+
+
+def _start_telemetry(process):
+    if not options.telemetry:
+        return None
+
+    from uetools.core.telemetry import Sampler
+
+    return Sampler(process.pid, options.telemetry).start()
+
+
+def _stop_telemetry(fmt, sampler, args):
+    """Save the samples and show the peak usage"""
+    if sampler is None:
+        return
+
+    from uetools.core.telemetry import format_summary
+
+    timeline = sampler.stop()
+    filename = options.telemetry_file or sidecar_path(args, ".uetel")
+    timeline.save(filename)
+
+    summary = timeline.summary()
+
+    if fmt.records is not None:
+        fmt.records.write({"telemetry": summary, "file": filename}, flush=True)
+        return
+
+    for line in format_summary(summary):
+        fmt.print(line)
+    fmt.print(f"  {'timeline':<16} {filename}")
+    fmt.flush()
+
+
+@dataclass
+class Child:
+    """A process started by :func:`popen_group`"""
+
+    args: list
+    fmt: object
+    # Shown in front of every line of this process, defaults to its index
+    name: str = None
+    shell: bool = False
+    # CPUs this process can run on, overrides the run options: 0-7
+    affinity: str = None
+    # Names of the children that need to succeed before this one starts, see popen_dag
+    after: list = field(default_factory=list)
+    # Kind of command (cook, build, tests, ...), selects the stall timeout
+    kind: str = None
+
+
+@dataclass
+class GroupResult:
+    """Return codes of the processes started by :func:`popen_group`, in order"""
+
+    # None for the processes that did not run because a dependency failed
+    returncodes: list = field(default_factory=list)
+    # (start, end) of each process in seconds since the group started
+    timings: list = field(default_factory=list)
+
+    @property
+    def returncode(self):
+        """First failure of the group, 0 if every process succeeded"""
+        for code in self.returncodes:
+            if code is not None and code != 0:
+                return code
+        return 0
+
+
+class _AsyncProcess:
+    """The subprocess.Popen methods used by the watchdog, for an asyncio process"""
+
+    def __init__(self, process):
+        self.process = process
+        self.pid = process.pid
+
+    def poll(self):
+        return self.process.returncode
+
+    def send_signal(self, sig):
+        self.process.send_signal(sig)
+
+
+async def _format_child(child, chunksize):
+    args = _limit_memory(child.args)
+
+    if child.shell:
+        process = await asyncio.create_subprocess_shell(
+            " ".join(args),
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+        )
+    else:
+        process = await asyncio.create_subprocess_exec(
+            *args,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+        )
+
+    _apply_policy(process.pid, child.affinity)
+    watchdog = _start_watchdog(_AsyncProcess(process), args, child.kind)
+
+    fmt = child.fmt
+    splitter = LineSplitter()
+
+    try:
+        while True:
+            try:
+                chunk = await asyncio.wait_for(
+                    process.stdout.read(chunksize), DRAIN_TIMEOUT
+                )
+            except asyncio.TimeoutError:
+                # The child exited, but something is still holding the pipe
+                if process.returncode is not None:
+                    break
+                continue
+
+            if not chunk:
+                break
+
+            if watchdog is not None:
+                watchdog.output(chunk)
+
+            fmt.match_lines(splitter.feed(chunk))
+            fmt.flush()
+
+        fmt.match_lines(splitter.finish())
+        fmt.flush()
+
+        returncode = await process.wait() + fmt.returncode()
+
+        if watchdog is not None and watchdog.stalled:
+            return STALLED_EXIT_CODE
+
+        return returncode
+
+    except asyncio.CancelledError:
+        # Ctrl-C or another child failed, stop the process with the group
+        if process.returncode is None:
+            process.kill()
+            await process.wait()
+        raise
+
+    finally:
+        if watchdog is not None:
+            watchdog.stop()
+
+        # Close the pipes while the event loop is still running,
+        # the transport would try to do it after the loop is closed otherwise
+        # pylint: disable=protected-access
+        process._transport.close()
+
+
+async def _run_group(children, chunksize):
+    tasks = [asyncio.ensure_future(_format_child(c, chunksize)) for c in children]
+
+    try:
+        return await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+
+
+def dag_order(children):
+    """Returns the indices of the children sorted so every child comes after its dependencies,
+    raises a ValueError if a dependency is unknown or if they form a cycle
+
+    Examples
+    --------
+
+    >>> dag_order([Child([], None, "link", after=["a", "b"]), Child([], None, "a"), Child([], None, "b", after=["a"])])
+    [1, 2, 0]
+
+    """
+    index = {child.name: i for i, child in enumerate(children)}
+    state = [0] * len(children)  # 0: new, 1: visiting, 2: done
+    order = []
+
+    def visit(i, path):
+        if state[i] == 2:
+            return
+
+        if state[i] == 1:
+            cycle = " -> ".join(
+                path[path.index(children[i].name) :] + [children[i].name]
+            )
+            raise ValueError(f"Dependency cycle: {cycle}")
+
+        state[i] = 1
+        for name in children[i].after:
+            if name not in index:
+                raise ValueError(f"{children[i].name} depends on unknown {name}")
+
+            visit(index[name], path + [children[i].name])
+
+        state[i] = 2
+        order.append(i)
+
+    for i in range(len(children)):
+        visit(i, [])
+
+    return order
+
+
+def critical_path(children, result):
+    """Returns the chain of dependencies that took the most time and its duration"""
+    index = {child.name: i for i, child in enumerate(children)}
+    longest = {}
+
+    for i in dag_order(children):
+        start, end = result.timings[i] or (0, 0)
+        before = max(
+            (longest[index[name]] for name in children[i].after),
+            key=lambda item: item[0],
+            default=(0, []),
+        )
+        longest[i] = (before[0] + end - start, before[1] + [children[i].name])
+
+    duration, names = max(longest.values(), key=lambda item: item[0], default=(0, []))
+    return names, duration
+
+
+async def _run_dag(children, slots, chunksize):
+    index = {child.name: i for i, child in enumerate(children)}
+    slots = asyncio.Semaphore(slots)
+    timings = [None] * len(children)
+    started = time.monotonic()
+    tasks = [None] * len(children)
+
+    async def run(i):
+        child = children[i]
+
+        # A failed dependency stops its dependents, the other children keep going
+        for name in child.after:
+            if await tasks[index[name]] != 0:
+                return None
+
+        async with slots:
+            start = time.monotonic() - started
+            try:
+                return await _format_child(child, chunksize)
+            finally:
+                timings[i] = (start, time.monotonic() - started)
+
+    for i in dag_order(children):
+        tasks[i] = asyncio.ensure_future(run(i))
+
+    try:
+        returncodes = await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+
+    return GroupResult(list(returncodes), timings)
+
+
+def _prepare_group(children):
+    """Name the children and send their output to a shared terminal"""
+    sink = TerminalSink()
+
+    for i, child in enumerate(children):
+        if child.name is None:
+            child.name = str(i)
+
+    width = max(len(child.name) for child in children)
+
+    for child in children:
+        prefix = f"{child.name:<{width}}| "
+        configure_output(child.fmt, child.name, prefix, sink)
+
+        if child.fmt.records is not None:
+            print(" ".join(child.args), file=sys.stderr)
+        else:
+            print(prefix + " ".join(child.args))
+
+
+def popen_dag(children, slots=1, chunksize=CHUNK_SIZE):
+    """Execute commands that depend on each other, at most ``slots`` at the same time.
+
+    A child starts once all the children named in its ``after`` succeeded,
+    the children that depend on a failure are not started and their return code is None.
+    The output is multiplexed like :func:`popen_group`.
+
+    Examples
+    --------
+
+    .. code-block:: python
+
+       result = popen_dag([
+           Child(uht_args, Formatter(), name="UHT"),
+           Child(editor_args, Formatter(), name="Editor", after=["UHT"]),
+           Child(worker_args, Formatter(), name="ShaderCompileWorker"),
+       ], slots=2)
+
+    """
+    _prepare_group(children)
+
+    # Fail before starting anything
+    dag_order(children)
+
+    try:
+        return asyncio.run(_run_dag(children, max(slots, 1), chunksize))
+    except KeyboardInterrupt:
+        for child in children:
+            child.fmt.flush()
+
+        print("Stopping due to user interrupt")
+
+    return GroupResult([-1] * len(children), [None] * len(children))
+
+
+def popen_group(children, chunksize=CHUNK_SIZE):
+    """Execute several commands side by side, each with its own formatter.
+
+    The pipes are read concurrently by a single event loop, every line is prefixed
+    by the name of its process. Ctrl-C stops the whole group.
+    With records output, the name is saved in the ``process`` field instead.
+
+    Examples
+    --------
+
+    .. code-block:: python
+
+       result = popen_group([
+           Child(server_args, Formatter(), name="server"),
+           Child(client_args, Formatter(), name="client"),
+       ])
+
+       print(result.returncodes)
+
+    """
+    _prepare_group(children)
+
+    try:
+        return GroupResult(list(asyncio.run(_run_group(children, chunksize))))
+    except KeyboardInterrupt:
+        for child in children:
+            child.fmt.flush()
+
+        print("Stopping due to user interrupt")
+
+    return GroupResult([-1] * len(children))
@@ -0,0 +1,129 @@
+"""Split a list of work items (packages, tests) across several processes.
+
+The items are given a cost, the time they took in a previous run when it is known
+or their size otherwise, and are assigned to shards so every shard gets about the same cost.
+The number of shards is limited by the memory available, so starting
+several editors does not push the machine into swap.
+"""
+import heapq
+import json
+import logging
+import os
+
+log = logging.getLogger(__name__)
+
+# Memory used by an editor running a commandlet, used when none is given
+PROCESS_MEMORY = "8G"
+
+
+def balance(items, count, cost):
+    """Split ``items`` in at most ``count`` shards of about the same total cost
+
+    The most expensive items are assigned first, each to the cheapest shard so far.
+
+    Examples
+    --------
+
+    >>> costs = dict(a=5, b=4, c=3, d=3, e=2, f=1)
+    >>> balance(list(costs), 2, costs.get)
+    [['a', 'd', 'f'], ['b', 'c', 'e']]
+
+    """
+    count = max(min(count, len(items)), 1)
+    shards = [[] for _ in range(count)]
+
+    # (total cost, shard index), the index keeps the order stable on ties
+    heap = [(0, i) for i in range(count)]
+
+    for item in sorted(items, key=cost, reverse=True):
+        total, i = heapq.heappop(heap)
+        shards[i].append(item)
+        heapq.heappush(heap, (total + cost(item), i))
+
+    return [shard for shard in shards if shard]
+
+
+def shard_count(requested, process_memory=PROCESS_MEMORY):
+    """Number of processes that can run at the same time without running out of memory"""
+    import psutil
+
+    from uetools.core.priority import parse_memory
+
+    requested = max(requested, 1)
+    available = psutil.virtual_memory().available
+    fits = max(available // parse_memory(process_memory), 1)
+
+    if fits < requested:
+        log.warning(
+            "Only %d of the %d shards fit in the available memory", fits, requested
+        )
+
+    return min(requested, fits)
+
+
+def item_sizes(paths):
+    """Size of each file, 0 for the files that do not exist"""
+    sizes = {}
+
+    for path in paths:
+        try:
+            sizes[path] = os.path.getsize(path)
+        except OSError:
+            sizes[path] = 0
+
+    return sizes
+
+
+class ShardHistory:
+    """Time taken by each item in previous runs, used to balance the next run
+
+    Parameters
+    ----------
+    filename: str
+        File where the timings are kept between runs
+
+    """
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.seconds = {}
+
+        try:
+            with open(filename, encoding="utf-8") as file:
+                self.seconds = json.load(file)
+        except (OSError, ValueError):
+            pass
+
+    def costs(self, items, sizes):
+        """Estimated seconds of each item, items never timed are estimated from their size"""
+        known = [item for item in items if item in self.seconds]
+        known_bytes = sum(sizes.get(item, 0) for item in known)
+
+        # seconds per byte of the items we know
+        rate = None
+        if known and known_bytes > 0:
+            rate = sum(self.seconds[item] for item in known) / known_bytes
+
+        costs = {}
+        for item in items:
+            if item in self.seconds:
+                costs[item] = self.seconds[item]
+            elif rate is not None:
+                costs[item] = sizes.get(item, 0) * rate
+            elif known:
+                # The items that were timed have no size
+                costs[item] = sum(self.seconds[i] for i in known) / len(known)
+            else:
+                # Nothing was timed, every cost is a size
+                costs[item] = sizes.get(item, 0)
+
+        return costs
+
+    def save(self):
+        os.makedirs(os.path.dirname(os.path.abspath(self.filename)), exist_ok=True)
+
+        tmp = f"{self.filename}.tmp"
+        with open(tmp, "w", encoding="utf-8") as file:
+            json.dump(self.seconds, file, indent=1, sort_keys=True)
+
+        os.replace(tmp, self.filename)
@@ -0,0 +1,291 @@
+"""Sample the resources used by a process and all its children.
+
+A UE cook or build starts many processes (shader workers, compilers, ...),
+the sampler sums their CPU, memory, I/O and thread count at a fixed interval
+so we can tell if the run was CPU bound, I/O bound or short on memory.
+
+The samples are kept in arrays, one per column, and saved
+as a small json header followed by the raw arrays.
+"""
+import json
+import os
+import threading
+import time
+from array import array
+
+import psutil
+
+TELEMETRY_MAGIC = b"UETEL"
+TELEMETRY_VERSION = 1
+
+# Seconds between two samples
+INTERVAL = 1.0
+
+# name: array typecode
+COLUMNS = {
+    # seconds since the sampler started
+    "time": "d",
+    # sum of the CPU usage of the processes, 100 is one core
+    "cpu": "f",
+    "rss": "Q",
+    # bytes read and written since the process started, including the exited children
+    "read_bytes": "Q",
+    "write_bytes": "Q",
+    "threads": "I",
+    "processes": "I",
+}
+
+
+def size(value):
+    """Format a number of bytes for humans
+
+    Examples
+    --------
+
+    >>> size(3 * 1024 ** 3)
+    '3.0 GiB'
+    >>> size(512)
+    '512 B'
+
+    """
+    for unit in ("B", "KiB", "MiB", "GiB"):
+        if value < 1024 or unit == "GiB":
+            break
+        value /= 1024
+
+    if unit == "B":
+        return f"{value:.0f} {unit}"
+
+    return f"{value:.1f} {unit}"
+
+
+class Timeline:
+    """Samples stored column by column"""
+
+    def __init__(self, interval=INTERVAL, cpu_count=None):
+        self.interval = interval
+        self.cpu_count = cpu_count or psutil.cpu_count() or 1
+        self.columns = {name: array(code) for name, code in COLUMNS.items()}
+
+    def __len__(self):
+        return len(self.columns["time"])
+
+    def append(self, **sample):
+        for name, values in self.columns.items():
+            values.append(sample[name])
+
+    def save(self, filename):
+        """Write a json header followed by the columns"""
+        os.makedirs(os.path.dirname(os.path.abspath(filename)), exist_ok=True)
+
+        header = {
+            "version": TELEMETRY_VERSION,
+            "interval": self.interval,
+            "cpu_count": self.cpu_count,
+            "count": len(self),
+            "columns": COLUMNS,
+        }
+
+        with open(filename, "wb") as file:
+            file.write(TELEMETRY_MAGIC + b"\n")
+            file.write(json.dumps(header).encode("utf-8") + b"\n")
+
+            for values in self.columns.values():
+                values.tofile(file)
+
+    @staticmethod
+    def load(filename):
+        """Read a timeline written by :meth:`save`"""
+        with open(filename, "rb") as file:
+            if file.readline() != TELEMETRY_MAGIC + b"\n":
+                raise ValueError(f"{filename} is not a telemetry file")
+
+            header = json.loads(file.readline())
+
+            if header.get("version") != TELEMETRY_VERSION:
+                raise ValueError(f"{filename} has an unsupported version")
+
+            timeline = Timeline(header["interval"], header["cpu_count"])
+
+            for name, code in header["columns"].items():
+                values = array(code)
+                values.fromfile(file, header["count"])
+                timeline.columns[name] = values
+
+        return timeline
+
+    def summary(self):
+        """Peak and average usage over the whole run"""
+        count = len(self)
+
+        if count == 0:
+            return {"samples": 0}
+
+        columns = self.columns
+        cpu = columns["cpu"]
+        mean_cpu = sum(cpu) / count
+
+        return {
+            "samples": count,
+            "duration": columns["time"][-1],
+            "peak_rss": max(columns["rss"]),
+            "mean_cpu": mean_cpu,
+            "peak_cpu": max(cpu),
+            # Fraction of the machine that was used
+            "utilization": mean_cpu / (100 * self.cpu_count),
+            "cpu_count": self.cpu_count,
+            "read_bytes": columns["read_bytes"][-1],
+            "write_bytes": columns["write_bytes"][-1],
+            "peak_threads": max(columns["threads"]),
+            "peak_processes": max(columns["processes"]),
+        }
+
+
+def format_summary(summary):
+    """Returns the summary as lines of text"""
+    if summary["samples"] == 0:
+        return ["    Resources: no samples"]
+
+    return [
+        f"    Resources ({summary['samples']} samples over {summary['duration']:.1f} s)",
+        f"  {'peak memory':<16} {size(summary['peak_rss'])}",
+        (
+            f"  {'cpu':<16} mean {summary['mean_cpu']:.0f}% peak {summary['peak_cpu']:.0f}% "
+            f"({100 * summary['utilization']:.0f}% of {summary['cpu_count']} cores)"
+        ),
+        f"  {'io':<16} read {size(summary['read_bytes'])} write {size(summary['write_bytes'])}",
+        (
+            f"  {'threads':<16} peak {summary['peak_threads']} "
+            f"in {summary['peak_processes']} processes"
+        ),
+    ]
+
+
+class Sampler:
+    """Sample the process tree of ``pid`` in a background thread until :meth:`stop` is called
+
+    Examples
+    --------
+
+    .. code-block:: python
+
+       sampler = Sampler(process.pid, interval=1).start()
+       process.wait()
+       timeline = sampler.stop()
+       timeline.save("Cook.log.uetel")
+
+    """
+
+    def __init__(self, pid, interval=INTERVAL):
+        self.pid = pid
+        self.interval = interval
+        self.timeline = Timeline(interval)
+        self.stopped = threading.Event()
+        self.thread = None
+        self.start_time = None
+        # pid => psutil.Process, cpu_percent needs the same object between samples
+        self.processes = {}
+        # pid => (read_bytes, write_bytes) of the last sample
+        self.io = {}
+        # I/O of the processes that exited
+        self.io_done = [0, 0]
+
+    def start(self):
+        try:
+            self.processes[self.pid] = psutil.Process(self.pid)
+        except psutil.NoSuchProcess:
+            return self
+
+        self.start_time = time.monotonic()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        """Stop sampling and returns the timeline"""
+        self.stopped.set()
+
+        if self.thread is not None:
+            self.thread.join()
+
+        return self.timeline
+
+    def run(self):
+        # The first cpu_percent of a process is always 0, it only starts the measure
+        self.sample()
+
+        while not self.stopped.wait(self.interval):
+            if not self.sample():
+                break
+
+    def _tree(self):
+        try:
+            root = self.processes[self.pid]
+            children = root.children(recursive=True)
+        except psutil.NoSuchProcess:
+            return []
+
+        tree = [root]
+        for child in children:
+            # Keep the process we already know so its cpu_percent is relative to the last sample
+            tree.append(self.processes.setdefault(child.pid, child))
+
+        alive = {process.pid for process in tree}
+        for pid in list(self.processes):
+            if pid not in alive:
+                del self.processes[pid]
+
+        return tree
+
+    def sample(self):
+        """Add a sample to the timeline, returns false once the process exited"""
+        cpu = 0
+        rss = 0
+        threads = 0
+        io = {}
+
+        tree = self._tree()
+        measured = 0
+
+        for process in tree:
+            try:
+                with process.oneshot():
+                    cpu += process.cpu_percent(None)
+                    rss += process.memory_info().rss
+                    threads += process.num_threads()
+
+                    try:
+                        counters = process.io_counters()
+                        io[process.pid] = (counters.read_bytes, counters.write_bytes)
+                    except (AttributeError, psutil.AccessDenied):
+                        # not available on macOS
+                        pass
+
+                measured += 1
+            except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+                continue
+
+        # Keep the I/O of the processes that exited since the last sample
+        for pid, (read, write) in self.io.items():
+            if pid not in io:
+                self.io_done[0] += read
+                self.io_done[1] += write
+        self.io = io
+
+        if not tree:
+            return False
+
+        # The process exited but was not waited on yet
+        if measured == 0:
+            return True
+
+        self.timeline.append(
+            processes=measured,
+            time=time.monotonic() - self.start_time,
+            cpu=cpu,
+            rss=rss,
+            read_bytes=self.io_done[0] + sum(read for read, _ in io.values()),
+            write_bytes=self.io_done[1] + sum(write for _, write in io.values()),
+            threads=threads,
+        )
+        return True
@@ -8,8 +8,6 @@ from copy import deepcopy
 from dataclasses import asdict, is_dataclass
 from functools import lru_cache
 from pathlib import Path
-import time
-import threading
 
 from uetools.core.perf import timeit
 
@@ -171,37 +169,28 @@ def _command_builder(cmd, args, ignore):
             _command_builder(cmd, asdict(v), ignore)
 
 
-def _tailf(filename, condition):
-    while not os.path.exists(filename):
-        pass
-
-    try:
-        with open(filename, "r") as fp:
-            while not condition.is_set():
-                line = fp.readline()
-
-                if line:
-                    print(line, end="")
-
-                else:
-                    time.sleep(0.1)
-
-    except Exception as err:
-        print(err)
-
-
 @contextmanager
-def tailf(filename):
-    condition = threading.Event()
-    showlog = threading.Thread(target=_tailf, args=(filename, condition))
-    showlog.start()
-    # condition.wait()
-    # condition.clear()
+def tailf(filename, fmt=None):
+    """Show the lines written to a file while the context is active"""
+    # util is imported by the cli on startup, only load this when needed
+    from uetools.core.follow import follow
+    from uetools.core.run import configure_output
+    from uetools.format.base import Formatter
+
+    if fmt is None:
+        fmt = Formatter()
+        fmt.print_non_matching = True
+        # Show every line of the file, like tail
+        fmt.suppress_duplicate_lines = False
+        configure_output(fmt)
+
+    follower, thread = follow(filename, fmt)
 
-    yield
-
-    condition.set()
-    showlog.join()
+    try:
+        yield follower
+    finally:
+        follower.stop()
+        thread.join()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,278 @@
+"""Stop a process that stopped making progress.
+
+A process is stalled when it did not print anything and its process tree
+did not use any CPU for longer than the timeout. A process waiting on a lock,
+on the network or a crashed ShaderCompileWorker stays in that state forever,
+while a long phase that is busy compiling shaders keeps the CPU active.
+
+When the process stalls, the process tree and the last lines of its output are saved
+to a file, the process receives a signal so it can exit cleanly and is killed
+with all its children if it is still running after a grace period.
+"""
+import os
+import signal
+import sys
+import threading
+import time
+from collections import deque
+
+import psutil
+
+# Seconds between two checks
+CHECK_INTERVAL = 5
+
+# Percent of one core used by the process tree below which it is considered idle
+STALL_CPU = 5.0
+
+# Seconds between the graceful signal and the kill
+STALL_GRACE = 60
+
+# Number of bytes of output kept for the snapshot
+TAIL_SIZE = 64 * 1024
+TAIL_LINES = 100
+
+SIGNALS = {
+    "term": signal.SIGTERM,
+    "int": signal.SIGINT,
+    "none": None,
+}
+
+
+def parse_timeouts(spec):
+    """Parse the stall timeouts of the command line, a default and an override per kind of command
+
+    Examples
+    --------
+
+    >>> parse_timeouts("1800,cook=3600,tests=900")
+    {None: 1800.0, 'cook': 3600.0, 'tests': 900.0}
+    >>> parse_timeouts(None)
+    {}
+
+    """
+    timeouts = {}
+
+    if not spec:
+        return timeouts
+
+    for item in spec.split(","):
+        item = item.strip()
+
+        if not item:
+            continue
+
+        kind, _, value = item.rpartition("=")
+        timeouts[kind.strip() or None] = float(value)
+
+    return timeouts
+
+
+class WatchedStream:
+    """Records when the process last wrote something, and keeps the tail of its output"""
+
+    def __init__(self, stream, watchdog):
+        self.stream = stream
+        self.watchdog = watchdog
+
+    def read(self, size=-1):
+        data = self.stream.read(size)
+
+        if data:
+            self.watchdog.output(data)
+
+        return data
+
+
+class Watchdog:
+    """Monitor a process from a background thread, stop it if it stalls
+
+    Parameters
+    ----------
+    process: subprocess.Popen
+        Process to monitor
+
+    timeout: float
+        Seconds without output and CPU activity after which the process is stalled
+
+    snapshot: str
+        File where the process tree and the tail of the output are written when it stalls
+
+    """
+
+    # pylint: disable=too-many-arguments
+    def __init__(
+        self,
+        process,
+        timeout,
+        snapshot=None,
+        cpu=STALL_CPU,
+        grace=STALL_GRACE,
+        sig="term",
+        interval=CHECK_INTERVAL,
+    ):
+        self.process = process
+        self.timeout = timeout
+        self.snapshot = snapshot
+        self.cpu = cpu
+        self.grace = grace
+        self.signal = SIGNALS[sig]
+        self.interval = min(interval, timeout / 2)
+        self.stopped = threading.Event()
+        self.stalled = False
+        self.thread = None
+
+        now = time.monotonic()
+        self.last_output = now
+        self.last_active = now
+        self.tail = deque()
+        self.tail_size = 0
+
+        # pid => (psutil.Process, cpu seconds at the last check)
+        self.cpu_times = {}
+
+    def start(self):
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.stopped.set()
+
+        if self.thread is not None:
+            self.thread.join()
+
+    def watch(self, stream):
+        """Returns the output stream of the process, wrapped to record its activity"""
+        return WatchedStream(stream, self)
+
+    def output(self, data):
+        self.last_output = time.monotonic()
+        self.tail.append(data)
+        self.tail_size += len(data)
+
+        while self.tail_size - len(self.tail[0]) >= TAIL_SIZE:
+            self.tail_size -= len(self.tail.popleft())
+
+    def _tree(self):
+        try:
+            root = psutil.Process(self.process.pid)
+            return [root] + root.children(recursive=True)
+        except psutil.NoSuchProcess:
+            return []
+
+    def cpu_used(self):
+        """Seconds of CPU used by the process tree since the last check"""
+        used = 0
+        times = {}
+
+        for process in self._tree():
+            known, previous = self.cpu_times.get(process.pid, (process, 0))
+
+            try:
+                cpu = sum(known.cpu_times()[:2])
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                continue
+
+            used += max(cpu - previous, 0)
+            times[process.pid] = (known, cpu)
+
+        self.cpu_times = times
+        return used
+
+    def idle(self):
+        """Seconds since the process last showed some activity"""
+        return time.monotonic() - max(self.last_output, self.last_active)
+
+    def run(self):
+        self.cpu_used()
+        last_check = time.monotonic()
+
+        while not self.stopped.wait(self.interval):
+            if self.process.poll() is not None:
+                return
+
+            now = time.monotonic()
+            used = self.cpu_used()
+
+            if used > (now - last_check) * self.cpu / 100:
+                self.last_active = now
+            last_check = now
+
+            if self.idle() >= self.timeout:
+                self.stalled = True
+                self.on_stall()
+                return
+
+    def on_stall(self):
+        message = (
+            f"Process {self.process.pid} stalled, no output and no CPU activity "
+            f"for {self.idle():.0f} s"
+        )
+        print(message, file=sys.stderr, flush=True)
+
+        if self.snapshot is not None:
+            self.save_snapshot(message)
+            print(f"Snapshot saved to {self.snapshot}", file=sys.stderr, flush=True)
+
+        if self.signal is not None:
+            try:
+                self.process.send_signal(self.signal)
+            except (OSError, ValueError):
+                # windows only supports a few signals
+                pass
+
+            if self.wait(self.grace):
+                return
+
+        self.kill()
+
+    def wait(self, timeout):
+        """Returns true if the process exited before the timeout"""
+        deadline = time.monotonic() + timeout
+
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                return True
+            time.sleep(0.1)
+
+        return self.process.poll() is not None
+
+    def kill(self):
+        """Kill the process and its children, the children could keep the output pipe open"""
+        tree = self._tree()
+
+        for process in reversed(tree):
+            try:
+                process.kill()
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                pass
+
+        psutil.wait_procs(tree, timeout=5)
+
+    def tail_lines(self, count=TAIL_LINES):
+        # the reader thread is still appending
+        text = b"".join(tuple(self.tail)).decode("utf-8", errors="replace")
+        return text.splitlines()[-count:]
+
+    def save_snapshot(self, message):
+        """Write the process tree and the last lines of output"""
+        lines = [message, "", "Process tree", "=" * 80]
+
+        for process in self._tree():
+            try:
+                with process.oneshot():
+                    cpu = sum(process.cpu_times()[:2])
+                    lines.append(
+                        f"{process.pid:>7} {process.ppid():>7} {process.status():<10} "
+                        f"cpu={cpu:.1f}s rss={process.memory_info().rss // 2**20}MiB "
+                        f"threads={process.num_threads()} {' '.join(process.cmdline())}"
+                    )
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                continue
+
+        lines += ["", f"Last {TAIL_LINES} lines", "=" * 80]
+        lines += self.tail_lines()
+
+        os.makedirs(os.path.dirname(os.path.abspath(self.snapshot)), exist_ok=True)
+        with open(self.snapshot, "w", encoding="utf-8") as file:
+            file.write("\n".join(lines) + "\n")
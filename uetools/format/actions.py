@@ -0,0 +1,304 @@
+"""Rebuild the timeline of the actions UnrealBuildTool executed from its output.
+
+UBT prints one ``[n/m] Description`` line per action (compile, link, ...) when it completes.
+The line is timestamped as it is streamed, or from the elapsed time UBT prefixes it with
+when ``-Timestamps`` is used. The start of an action is not printed, it is rebuilt
+by assigning each action to the lane of the executor that was free the earliest,
+which is how the executor schedules its actions when it has enough work for all its lanes.
+
+The timeline can be exported as a Chrome trace (``chrome://tracing``, https://ui.perfetto.dev)
+with one row per lane.
+"""
+import json
+import os
+import re
+import time
+from dataclasses import dataclass
+
+# Elapsed time UBT prints before each line with ``-Timestamps``
+ELAPSED = re.compile(r"^\s*\[(?P<elapsed>\d+(?::\d{2}){1,2}(?:\.\d+)?)\]\s*")
+
+ACTION = re.compile(r"^\s*\[(?P<index>\d+)/(?P<total>\d+)\]\s+(?P<description>.+?)\s*$")
+
+# Number of actions executed at the same time, depends on the executor and the UE version
+PARALLELISM = [
+    re.compile(r"Building \d+ actions? with (?P<slots>\d+) process"),
+    re.compile(r"Performing \d+ actions? \((?P<slots>\d+) in parallel\)"),
+    re.compile(r"Executing up to (?P<slots>\d+) processes"),
+]
+
+# Architecture or tool shown next to the kind of action, ``Compile [x64]``, ``Link (lld)``
+TAG = re.compile(r"^(?:\[[^\]]*\]|\([^)]*\))\s*")
+
+COMPILE_KINDS = ("Compile",)
+COMPILE_EXTENSIONS = (".cpp", ".c", ".cc", ".cxx", ".ispc", ".rc")
+
+LINK_KINDS = ("Link", "Lib", "Archive")
+
+TRACE_PROCESS = 1
+
+
+def parse_elapsed(value):
+    """Returns the number of seconds of an elapsed time
+
+    Examples
+    --------
+
+    >>> parse_elapsed("1:02:05")
+    3725.0
+    >>> parse_elapsed("02:05.5")
+    125.5
+
+    """
+    seconds = 0.0
+
+    for part in value.split(":"):
+        seconds = seconds * 60 + float(part)
+
+    return seconds
+
+
+def parse_description(description):
+    """Split the description of an action into its kind and its target
+
+    Examples
+    --------
+
+    >>> parse_description("Compile [x64] Module.Engine.cpp")
+    ('Compile', 'Module.Engine.cpp')
+    >>> parse_description("Link (lld) libUnrealEditor-RTSGame.so")
+    ('Link', 'libUnrealEditor-RTSGame.so')
+    >>> parse_description("Module.Engine.cpp")
+    ('Compile', 'Module.Engine.cpp')
+
+    """
+    kind, _, target = description.partition(" ")
+
+    if not target or not kind.isalpha():
+        # Older versions only print the file name
+        kind, target = "", description
+
+    target = TAG.sub("", target.strip()).strip() or target.strip()
+
+    if not kind and target.lower().endswith(COMPILE_EXTENSIONS):
+        kind = "Compile"
+
+    return kind or "Action", target
+
+
+@dataclass
+class Action:
+    """An action executed by UBT"""
+
+    index: int
+    total: int
+    kind: str
+    target: str
+    start: float = None
+    end: float = None
+    lane: int = None
+
+    @property
+    def duration(self):
+        if self.start is None or self.end is None:
+            return None
+        return self.end - self.start
+
+    @property
+    def category(self):
+        if self.kind in COMPILE_KINDS:
+            return "compile"
+
+        if self.kind in LINK_KINDS:
+            return "link"
+
+        return "other"
+
+
+class ActionTimeline:
+    """Collect the actions of a UBT run and rebuild their parallel lanes
+
+    Parameters
+    ----------
+    slots: int
+        Number of actions executed at the same time, if UBT does not print it
+
+    clock:
+        Time of the lines without elapsed time, None to only use the times printed by UBT
+
+    """
+
+    def __init__(self, slots=None, clock=time.monotonic):
+        self.slots = slots
+        self.clock = clock
+        self.actions = []
+        self.start = None
+        # An elapsed time was seen, the clock is not used anymore
+        self._elapsed = False
+        # Time at which each lane finished its last action
+        self.lanes = []
+
+    def _time(self, elapsed):
+        if elapsed is not None:
+            if not self._elapsed:
+                self._drop_clock()
+
+            return parse_elapsed(elapsed)
+
+        # Do not mix the clock with the elapsed times printed by UBT
+        if self.clock is not None and not self._elapsed:
+            return self.clock()
+
+        return None
+
+    def _drop_clock(self):
+        """Forget the times given by the clock, the elapsed times of UBT are used from now on"""
+        self._elapsed = True
+        self.start = None
+        self.lanes = []
+
+        for action in self.actions:
+            action.start = action.end = action.lane = None
+
+    def update(self, line):
+        """Process a line of output, returns the action it completed if any"""
+        elapsed = None
+
+        if "[" in line:
+            result = ELAPSED.match(line)
+
+            if result:
+                elapsed = result["elapsed"]
+                line = line[result.end() :]
+
+        # UBT started before its first action, the first lanes start there.
+        # The first elapsed time replaces the start given by the clock
+        if self.start is None or (elapsed is not None and not self._elapsed):
+            self.start = self._time(elapsed)
+
+        result = ACTION.match(line) if "[" in line else None
+        if result is None:
+            if not self.lanes:
+                self._parallelism(line, elapsed)
+            return None
+
+        now = self._time(elapsed)
+        kind, target = parse_description(result["description"])
+
+        action = Action(int(result["index"]), int(result["total"]), kind, target)
+        self.actions.append(action)
+
+        if now is not None:
+            self._schedule(action, now)
+
+        return action
+
+    def _parallelism(self, line, elapsed):
+        """The executor prints how many actions it runs at the same time before it starts"""
+        for pattern in PARALLELISM:
+            result = pattern.search(line)
+
+            if result:
+                self.slots = int(result["slots"])
+                self.start = self._time(elapsed)
+                return
+
+    def _schedule(self, action, now):
+        if not self.lanes:
+            start = now if self.start is None else self.start
+            self.lanes = [start] * (self.slots or os.cpu_count() or 1)
+
+        # The lane that was free the earliest picked up this action
+        lane = min(range(len(self.lanes)), key=self.lanes.__getitem__)
+
+        action.lane = lane
+        action.start = min(self.lanes[lane], now)
+        action.end = now
+        self.lanes[lane] = now
+
+    @property
+    def timed(self):
+        return [action for action in self.actions if action.duration is not None]
+
+    def wall_time(self):
+        timed = self.timed
+        if not timed:
+            return 0
+
+        return max(a.end for a in timed) - min(a.start for a in timed)
+
+    def occupancy(self):
+        """Fraction of the time the lanes were busy, idle lanes show the executor was starved"""
+        wall = self.wall_time()
+
+        if wall <= 0 or not self.lanes:
+            return None
+
+        busy = sum(action.duration for action in self.timed)
+        return busy / (wall * len(self.lanes))
+
+    def slowest(self, category=None, n=10):
+        """Returns the longest actions of a category (compile, link, other)"""
+        timed = [
+            action
+            for action in self.timed
+            if category is None or action.category == category
+        ]
+        return sorted(timed, key=lambda a: a.duration, reverse=True)[:n]
+
+    def to_trace(self):
+        """Returns the timeline in the Chrome trace event format"""
+        timed = self.timed
+        origin = min((a.start for a in timed), default=0)
+
+        events = [
+            {
+                "name": "process_name",
+                "ph": "M",
+                "pid": TRACE_PROCESS,
+                "args": {"name": "UnrealBuildTool"},
+            }
+        ]
+
+        for lane in sorted({action.lane for action in timed}):
+            events.append(
+                {
+                    "name": "thread_name",
+                    "ph": "M",
+                    "pid": TRACE_PROCESS,
+                    "tid": lane,
+                    "args": {"name": f"Lane {lane}"},
+                }
+            )
+
+        for action in timed:
+            events.append(
+                {
+                    "name": action.target,
+                    "cat": action.category,
+                    "ph": "X",
+                    # microseconds
+                    "ts": round((action.start - origin) * 1e6),
+                    "dur": round(action.duration * 1e6),
+                    "pid": TRACE_PROCESS,
+                    "tid": action.lane,
+                    "args": {
+                        "kind": action.kind,
+                        "index": action.index,
+                        "total": action.total,
+                    },
+                }
+            )
+
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def save_trace(self, filename):
+        """Write the Chrome trace, replaced at once so a viewer never reads half a file"""
+        folder = os.path.dirname(os.path.abspath(filename))
+        os.makedirs(folder, exist_ok=True)
+
+        tmp = f"{filename}.tmp"
+        with open(tmp, "w", encoding="utf-8") as file:
+            json.dump(self.to_trace(), file)
+
+        os.replace(tmp, filename)
@@ -6,6 +6,21 @@ import colorama
 from colorama import Fore, Style
 
 from uetools.core.conf import load_conf, update_conf
+from uetools.format.fingerprint import fingerprint
+from uetools.format.sink import RecordSink, TerminalSink
+from uetools.format.store import (
+    DEFAULT_FINGERPRINT_MEMORY,
+    DEFAULT_TABLE_CAPACITY,
+    FingerprintStore,
+    LogTable,
+)
+from uetools.format.tokenizer import (
+    FIELDS,
+    UAT_ERROR_1,
+    UAT_ERROR_2,
+    detect_returncode,
+    tokenize,
+)
 
 log = logging.getLogger()
 
@@ -20,13 +35,6 @@ UE_STDOUT_FORMAT = re.compile(
     r"^(?P<category>[A-Za-z]*): ((?P<verbosity>[A-Za-z]*):)?(?P<message>.*)"
 )
 
-UAT_ERROR_1 = re.compile(
-    r"^RunUAT ERROR: AutomationTool was unable to run successfully. Exited with code: (?P<returncode>[0-9]*)"
-)
-UAT_ERROR_2 = re.compile(
-    r"^AutomationTool exiting with ExitCode=(?P<returncode>[0-9]*) \((?P<message>[a-zA-Z0-9]*)\)"
-)
-
 ERROR_PATERNS = [
     UAT_ERROR_1,
     UAT_ERROR_2,
@@ -79,6 +87,21 @@ def colored(text, color, attrs=None):
     return COLORAMA[color.lower()] + text + Style.RESET_ALL
 
 
+def parse_line(regex, line):
+    """Split a log line into a tuple of (datetime, frame, category, verbosity, message)
+    using the tokenizer, or ``regex`` if the line uses a non standard format"""
+    if regex is UE_LOG_FORMAT:
+        return tokenize(line)
+
+    result = regex.search(line)
+
+    if result:
+        data = result.groupdict()
+        return tuple(data.get(name) for name in FIELDS)
+
+    return None
+
+
 # The logging format is specified in the follorwing function calls
 # Logf_InternalImpl(File, Line, Category, Verbosity, Fmt, Args...);
 # FPlatformMisc::LowLevelOutputDebugStringf(TEXT("%s%s"),
@@ -105,17 +128,29 @@ class Formatter:
         # This is needed for windows
         colorama.init()
 
+        conf = load_conf()
+
         self.col = col
-        self.longest_category = load_conf().get("longest_category", 0)
-        self.longest_name = load_conf().get("longest_name", "")
+        self.longest_category = conf.get("longest_category", 0)
+        self.longest_name = conf.get("longest_name", "")
         self.regex = UE_LOG_FORMAT
         self.print_non_matching = False
-        self.bad_logs = []
+        # Unique warnings and errors with their occurrence count
+        self.bad_logs = LogTable(conf.get("summary_capacity", DEFAULT_TABLE_CAPACITY))
+        self.summary_size = 25
+        # Print the summary frame even when no warning or error was seen
+        self.print_empty_summary = True
         self.ignore = set()
         self.only = set()
         self.return_codes = []
         self.print = print
-        self.line_hash = set()
+        self.sink = None
+        self.records = None
+        self.color = True
+        self.line_hash = FingerprintStore(
+            conf.get("fingerprint_memory", DEFAULT_FINGERPRINT_MEMORY),
+            conf.get("fingerprint_policy", "lru"),
+        )
         self.suppress_duplicate_lines = True
         self.prev_hash = None
         self.duplicate_count = 0
@@ -132,48 +167,180 @@ class Formatter:
             category if len(category) > len(self.longest_name) else self.longest_name
         )
 
-    def summary(self):
-        """Print a summary of warnings and errors that got parsed during the formatting process"""
+    def summary(self, top=None):
+        """Print the most frequent warnings and errors that got parsed during the formatting process"""
+        if top is None:
+            top = self.summary_size
+
+        if self.records is not None:
+            self.records.write(self.summary_record(top), flush=True)
+            return
+
+        if len(self.bad_logs) == 0 and not self.print_empty_summary:
+            return
+
         self.print("-" * 80)
-        self.print("    Summary")
+        self.print(
+            f"    Summary ({len(self.bad_logs)} clusters, {self.bad_logs.total} total)"
+        )
         self.print("=" * 80)
-        for line in set(self.bad_logs):
-            self.print("  - ", end="")
-            Formatter.format(self, **asdict(line))
+        self.print(f"  {'#':>3}  {'Count':>6}  Message")
+
+        for rank, record in enumerate(self.bad_logs.top(top), start=1):
+            line = record.line
+            message = self.cluster_message(record)
+
+            prefix = f"  {rank:>3}  {record.count:>6d}  "
+            self.print(prefix, end="")
+            Formatter.format(
+                self, line.datetime, line.frame, line.category, line.verbosity, message
+            )
+
+            if len(record.examples) > 1:
+                # Align the examples with the message column, format() pads
+                # the category after it was measured so read its width afterwards
+                frame = int(line.frame or 0)
+                header = f"[{frame:3d}][ ][{' ' * self.longest_category}] "
+                indent = " " * len(prefix + header)
+
+                for example in record.examples:
+                    self.print(f"{indent}e.g. {example.strip()}")
+
+        hidden = len(self.bad_logs) - top
+        if hidden > 0:
+            self.print(f"  ... {hidden} more")
+
+        if self.bad_logs.evicted > 0:
+            self.print(f"  ... {self.bad_logs.evicted} occurrences were not kept")
         self.print("=" * 80)
+        self.flush()
+
+    @staticmethod
+    def cluster_message(record):
+        """Message shown for a cluster, its fingerprint if it groups different messages"""
+        if len(record.examples) > 1:
+            return fingerprint(record.line.message)
+
+        return record.line.message
+
+    def summary_record(self, top):
+        """Summary as a machine readable record"""
+        return {
+            "summary": [
+                {
+                    "count": record.count,
+                    "pattern": self.cluster_message(record),
+                    "examples": record.examples,
+                    **asdict(record.line),
+                }
+                for record in self.bad_logs.top(top)
+            ],
+            "unique": len(self.bad_logs),
+            "total": self.bad_logs.total,
+            "evicted": self.bad_logs.evicted,
+        }
+
+    def set_sink(self, sink):
+        """Send the formatted lines to a sink instead of printing them one by one"""
+        self.sink = sink
+        self.print = sink.print
+        self.color = sink.color
+
+    def use_terminal_sink(self):
+        """Buffer the output, unless ``print`` was replaced by something else"""
+        if self.print is print:
+            self.set_sink(TerminalSink())
+
+    # pylint: disable=redefined-builtin
+    def use_record_sink(self, stream=None, format="jsonl", process=None):
+        """Output one record per line instead of the formatted text"""
+        self.records = RecordSink(stream, format, process=process)
+
+    def flush(self):
+        """Write the lines that are still buffered"""
+        if self.sink is not None:
+            self.sink.flush()
+
+        if self.records is not None:
+            self.records.flush()
+
+    def colored(self, text, color, attrs=None):
+        """Returns a colored text, unless the output does not support colors"""
+        if not self.color:
+            return text
+
+        return colored(text, color, attrs)
 
     def __del__(self):
         update_conf(longest_category=self.longest_category)
 
+    def parse(self, line):
+        """Split a log line into a tuple of (datetime, frame, category, verbosity, message),
+        returns None if the line is not a log line"""
+        return parse_line(self.regex, line)
+
     def match_regex(self, line):
-        """Parse a log line using regex"""
-        result = self.regex.search(line)
+        """Parse a log line and format it"""
+        self.match_tokens(line, self.parse(line))
 
-        if result:
-            data = result.groupdict()
+        # Error detection
+        rc = detect_returncode(line)
 
-            if data["verbosity"] is None:
-                data["verbosity"] = "Log"
+        if rc is not None and rc != 0:
+            self.return_codes.append(int(rc))
 
-            if data["verbosity"] not in log_verbosity:
-                msg = data["verbosity"]
-                data["verbosity"] = "Log"
-                data["message"] = f"{msg}: " + data["message"]
+    def match_tokens(self, line, data):
+        """Format a line that was already parsed"""
+        if data:
+            datetime, frame, category, verbosity, message = data
 
-            # Kepp track of bad logs and show a summary at the end
-            if data["verbosity"] in bad_logs:
-                self.bad_logs.append(LogLine(**data))
+            if verbosity is None:
+                verbosity = "Log"
 
-            if self.suppress_duplicate_lines:
-                h = hash(LogLine(**data))
+            elif verbosity not in log_verbosity:
+                message = f"{verbosity}: " + message
+                verbosity = "Log"
 
-                # Line is not duplicate
-                if h not in self.line_hash:
-                    self.format(**data)
-                    self.line_hash.add(h)
-                    self.prev_hash = h
-            else:
-                self.format(**data)
+            # Kepp track of bad logs and show a summary at the end
+            if verbosity in bad_logs:
+                # Messages that only differ by a path or a number are counted together
+                self.bad_logs.add(
+                    (category, verbosity, fingerprint(message)),
+                    LogLine(datetime, frame, category, verbosity, message),
+                    frame,
+                    message,
+                )
+
+            if self.filtered(category):
+                return
+
+            # Same as hash(LogLine(...)) without building the dataclass
+            if self.suppress_duplicate_lines:
+                h = hash(category + message + verbosity)
+
+                # Line is duplicate
+                if h in self.line_hash:
+                    return
+
+                self.line_hash.add(h)
+                self.prev_hash = h
+
+            if self.records is not None:
+                self.records.write(
+                    {
+                        "datetime": datetime,
+                        "frame": int(frame) if frame else None,
+                        "category": category,
+                        "verbosity": verbosity,
+                        "message": message,
+                    },
+                    flush=verbosity in bad_logs,
+                )
+                return
+
+            self.format(datetime, frame, category, verbosity, message)
+        elif self.records is not None:
+            self.records.write({"message": line.rstrip("\n")})
         else:
             if self.print_non_matching:
                 self.print(line, end="")
@@ -181,16 +348,19 @@ class Formatter:
                 log.debug("    Line did not match anything")
                 log.debug("        - `%s`", line)
 
-        # Error detection
-        for error_pat in ERROR_PATERNS:
-            result = error_pat.search(line)
+    def filtered(self, category):
+        """True if the lines of this category are hidden by ``ignore`` or ``only``"""
+        if category in self.ignore:
+            return True
 
-            if result:
-                data = result.groupdict()
+        return len(self.only) > 0 and category not in self.only
 
-                rc = data.get("returncode", 0)
-                if rc != 0:
-                    self.return_codes.append(int(rc))
+    def match_lines(self, lines):
+        """Parse and format a batch of log lines"""
+        match = self.match_regex
+
+        for line in lines:
+            match(line)
 
     def returncode(self):
         if self.return_codes:
@@ -222,10 +392,7 @@ class Formatter:
             log message
 
         """
-        if category in self.ignore:
-            return
-
-        if len(self.only) > 0 and category not in self.only:
+        if self.filtered(category):
             return
 
         self._meta(category)
@@ -241,6 +408,8 @@ class Formatter:
         if frame is None:
             frame = 0
 
+        # warnings and errors are shown right away
         self.print(
-            f"[{int(frame):3d}][{verb}][{category}] {colored(message, color=color)}"
+            f"[{int(frame):3d}][{verb}][{category}] {self.colored(message, color=color)}",
+            flush=color is not None,
         )
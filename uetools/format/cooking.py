@@ -1,6 +1,11 @@
 import logging
 
-from uetools.format.base import Formatter, colored, colors, short
+from uetools.format.base import Formatter, colors, short
+from uetools.format.progress import CookProgress, duration
+from uetools.format.sink import TerminalSink
+
+# Erase the current line of the terminal
+CLEAR_LINE = "\x1b[2K"
 
 log = logging.getLogger()
 
@@ -12,6 +17,40 @@ class CookingFormatter(Formatter):
         super().__init__(col)
         self.summary_starts = 0
         self.print_non_matching = True
+        self.progress = CookProgress()
+        self.status_shown = False
+        self.status_changed = False
+        # The progress line is not drawn again below the summary
+        self.summary_started = False
+
+    @property
+    def interactive(self):
+        """The progress line is only shown on a terminal"""
+        return isinstance(self.sink, TerminalSink) and self.sink.color
+
+    def hide_status(self):
+        """Returns the prefix that erases the progress line"""
+        if not self.status_shown:
+            return ""
+
+        self.status_shown = False
+        return CLEAR_LINE
+
+    def flush(self):
+        # The progress line stays below the last line until it is overwritten
+        if (
+            self.interactive
+            and not self.summary_started
+            and (self.status_changed or not self.status_shown)
+        ):
+            status = self.progress.status()
+
+            if status:
+                self.print(self.hide_status() + status, end="\r")
+                self.status_shown = True
+                self.status_changed = False
+
+        super().flush()
 
     # pylint: disable=too-many-arguments,unused-argument
     def default_format(
@@ -27,7 +66,25 @@ class CookingFormatter(Formatter):
 
         color = colors.get(verb)
 
-        self.print(f"[{verb}][{category}] {colored(message, color=color)}")
+        self.print(
+            f"{self.hide_status()}[{verb}][{category}] {self.colored(message, color=color)}",
+            flush=color is not None,
+        )
+
+    def match_tokens(self, line, data):
+        # Before the records and the duplicate lines return early, so every line counts
+        if data:
+            datetime, _, category, _, message = data
+
+            if self.progress.update(datetime, category, message):
+                self.status_changed = True
+
+        # The lines that are not from the log (shader workers, UAT) also erase the progress line
+        elif self.records is None and self.print_non_matching:
+            self.print(self.hide_status() + line, end="")
+            return
+
+        super().match_tokens(line, data)
 
     # pylint: disable=too-many-arguments
     def format(
@@ -51,3 +108,42 @@ class CookingFormatter(Formatter):
             return
 
         self.default_format(datetime, frame, category, verbosity, message)
+
+    def summary(self, top=None):
+        """Print the warnings and errors followed by the duration of each phase of the cook"""
+        self.summary_started = True
+
+        if self.status_shown:
+            self.print(self.hide_status(), end="")
+
+        super().summary(top)
+
+        if self.records is not None:
+            return
+
+        timings = self.progress.timings()
+        if len(timings) <= 1 and not self.progress.packages.total:
+            return
+
+        self.print("    Cook phases")
+        self.print("=" * 80)
+        for phase, seconds in timings:
+            self.print(f"  {phase:<20} {duration(seconds):>10}")
+
+        self.print(f"  {'total':<20} {duration(sum(s for _, s in timings)):>10}")
+
+        status = self.progress.status()
+        if status:
+            self.print(f"  {status}")
+
+        self.print("=" * 80)
+        self.flush()
+
+    def summary_record(self, top):
+        record = super().summary_record(top)
+        record["phases"] = dict(self.progress.timings())
+        record["packages"] = {
+            "done": self.progress.packages.done,
+            "total": self.progress.packages.total,
+        }
+        return record
@@ -0,0 +1,65 @@
+"""Normalize log messages so near identical warnings are counted together.
+
+A cook prints the same warning for every asset, only the path, the GUID
+or a number changes. The fingerprint of a message masks those parts,
+messages with the same fingerprint belong to the same cluster.
+
+Examples
+--------
+
+>>> fingerprint("Failed to load /Game/Maps/Level_2.Level_2 (GUID=0B5A6DF84A4A3C2F8B2E9E2C3F1D4A5B)")
+'Failed to load <path> (GUID=<guid>)'
+
+>>> fingerprint("Texture 'T_Rock_04' took 0.25s, 3 mips at 0x7ff6a1b2")
+"Texture 'T_Rock_04' took <n>s, <n> mips at <hex>"
+
+>>> fingerprint("/Game/Blueprints/BP_PlayerPawn.uasset: [Compiler] Node 12 is deprecated")
+'<path>: [Compiler] Node <n> is deprecated'
+
+>>> fingerprint("Spawned /Game/Maps/Arena.Arena:PersistentLevel.Actor_3")
+'Spawned <path>'
+
+"""
+import re
+from functools import lru_cache
+
+# Applied in order, the first rules mask the values that contain digits
+RULES = [
+    (
+        "<guid>",
+        (
+            r"\b[0-9A-Fa-f]{8}-[0-9A-Fa-f]{4}-[0-9A-Fa-f]{4}-[0-9A-Fa-f]{4}-[0-9A-Fa-f]{12}\b"
+            r"|\b[0-9A-Fa-f]{32}\b"
+        ),
+    ),
+    (
+        "<path>",
+        # /Game/Maps/Level.Level, ../../Engine/Source/File.cpp, C:/UnrealEngine/Engine,
+        # a ":" is part of the path when it names a sub-object, not when it ends the path
+        r"(?<![\w.])(?:[A-Za-z]:|\.{1,2})?"
+        r"(?:[\\/](?:[^\s'\"\\/,;:()\[\]{}<>]|:(?=[^\s:]))+){2,}[\\/]?",
+    ),
+    ("<hex>", r"\b0[xX][0-9A-Fa-f]+\b"),
+    # Numbers that are not part of an identifier (Actor_3, UE5 or x64 are kept)
+    ("<n>", r"(?<![A-Za-z_\d.])[-+]?\d+(?:\.\d+)*"),
+]
+
+COMPILED_RULES = [(re.compile(pattern), mask) for mask, pattern in RULES]
+
+# Nothing to mask without a digit or a path separator
+_MAYBE_VARIABLE = re.compile(r"[\d\\/]")
+
+# Number of distinct messages whose fingerprint is cached
+CACHE_SIZE = 64 * 1024
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def fingerprint(message):
+    """Returns the message with its variable parts masked"""
+    if not _MAYBE_VARIABLE.search(message):
+        return message
+
+    for pattern, mask in COMPILED_RULES:
+        message = pattern.sub(mask, message)
+
+    return message
@@ -0,0 +1,317 @@
+"""Sidecar index of a log file, to query it without parsing it again.
+
+The index is built in a single pass over the file, it records the byte offset
+of every log line grouped by category, verbosity and time bucket.
+It is saved next to the log (``RTSGame.log.uidx``) and is rebuilt
+when the size or the modification time of the log changes.
+
+Queries read only the candidate lines and check them again with the formatter
+so the result is the same as filtering a full scan.
+
+.. code-block:: console
+
+   uecli fmt --file RTSGame.log --index --only LogCook --verbosity Error
+
+"""
+import json
+import os
+from array import array
+
+from uetools.core.compress import open_stream
+from uetools.core.run import CHUNK_SIZE, LineSplitter
+from uetools.format.base import log_verbosity
+from uetools.format.parallel import split_lines
+
+INDEX_VERSION = 1
+INDEX_MAGIC = b"UEIDX"
+INDEX_SUFFIX = ".uidx"
+
+# Grouping keys of the index
+DIMENSIONS = ("category", "verbosity", "bucket")
+
+# Length of the datetime prefix used as a time bucket, ``2023.02.14-13.44`` (one minute)
+BUCKET_SIZE = 16
+
+
+def index_path(path):
+    return path + INDEX_SUFFIX
+
+
+def _file_stamp(path):
+    stat = os.stat(path)
+    return stat.st_size, stat.st_mtime_ns
+
+
+def normalize(data):
+    """Returns the category, verbosity and time bucket of a parsed line,
+    the verbosity is the one the formatter would use"""
+    datetime, _, category, verbosity, _ = data
+
+    if verbosity not in log_verbosity:
+        verbosity = "Log"
+
+    bucket = datetime[:BUCKET_SIZE] if datetime else None
+    return category, verbosity, bucket
+
+
+class LogQuery:
+    """Select log lines by category, verbosity and time range.
+
+    ``since`` and ``until`` are datetime prefixes compared against the datetime of the line,
+    ``2023.02.14-13.44`` selects everything logged during that minute.
+
+    Examples
+    --------
+
+    >>> query = LogQuery(only=["LogCook"], verbosity=["Error"])
+    >>> query.match(("2023.02.14-13.44.00:123", "0", "LogCook", "Error", " failed"))
+    True
+    >>> query.match((None, None, "LogCook", "Warning", " oops"))
+    False
+
+    """
+
+    def __init__(self, only=None, verbosity=None, since=None, until=None):
+        self.categories = set(only or [])
+        self.verbosities = set(verbosity or [])
+        self.since = since
+        self.until = until
+
+    def __bool__(self):
+        return bool(self.categories or self.verbosities or self.since or self.until)
+
+    def match(self, data):
+        """Returns true if the parsed line is selected"""
+        if not data:
+            return False
+
+        category, verbosity, _ = normalize(data)
+        datetime = data[0]
+
+        if self.categories and category not in self.categories:
+            return False
+
+        if self.verbosities and verbosity not in self.verbosities:
+            return False
+
+        if self.since is not None or self.until is not None:
+            if not datetime:
+                return False
+
+            if self.since is not None and datetime[: len(self.since)] < self.since:
+                return False
+
+            if self.until is not None and datetime[: len(self.until)] > self.until:
+                return False
+
+        return True
+
+    def match_bucket(self, bucket):
+        """Returns true if the time bucket can hold selected lines"""
+        if bucket is None:
+            return False
+
+        size = min(len(bucket), BUCKET_SIZE)
+
+        if self.since is not None and bucket < self.since[:size]:
+            return False
+
+        return self.until is None or bucket <= self.until[:size]
+
+
+class LogIndex:
+    """Byte offsets of the log lines of a file, grouped by category, verbosity and time bucket"""
+
+    def __init__(self, path, size=0, mtime=0, keys=None):
+        self.path = path
+        self.size = size
+        self.mtime = mtime
+        # dimension => value => array of offsets
+        self.keys = keys or {name: {} for name in DIMENSIONS}
+
+    @staticmethod
+    def build(path, fmt):
+        """Read the file once and record where each log line starts"""
+        size, mtime = _file_stamp(path)
+        index = LogIndex(path, size, mtime)
+        offset = 0
+
+        with open(path, "rb") as file:
+            for raw in file:
+                for line in split_lines(raw):
+                    data = fmt.parse(line)
+
+                    if data:
+                        index.add(offset, normalize(data))
+
+                offset += len(raw)
+
+        return index
+
+    def add(self, offset, values):
+        """Record a line starting at ``offset``"""
+        for name, value in zip(DIMENSIONS, values):
+            if value is None:
+                continue
+
+            offsets = self.keys[name].get(value)
+
+            if offsets is None:
+                offsets = array("Q")
+                self.keys[name][value] = offsets
+
+            # A raw line can hold many lines if they are separated by ``\r``
+            if not offsets or offsets[-1] != offset:
+                offsets.append(offset)
+
+    def is_fresh(self):
+        """Returns true if the log did not change since the index was built"""
+        try:
+            return _file_stamp(self.path) == (self.size, self.mtime)
+        except OSError:
+            return False
+
+    def save(self, filename=None):
+        """Write a json header followed by the offset arrays"""
+        if filename is None:
+            filename = index_path(self.path)
+
+        header = {
+            "version": INDEX_VERSION,
+            "size": self.size,
+            "mtime": self.mtime,
+            "keys": {name: {} for name in DIMENSIONS},
+        }
+        arrays = []
+        start = 0
+
+        for name in DIMENSIONS:
+            for value, offsets in self.keys[name].items():
+                header["keys"][name][value] = [start, len(offsets)]
+                arrays.append(offsets)
+                start += len(offsets)
+
+        with open(filename, "wb") as file:
+            file.write(INDEX_MAGIC + b"\n")
+            file.write(json.dumps(header).encode("utf-8") + b"\n")
+
+            for offsets in arrays:
+                offsets.tofile(file)
+
+    @staticmethod
+    def load(path, filename=None):
+        """Load the index of a file, returns None if it is missing or out of date"""
+        if filename is None:
+            filename = index_path(path)
+
+        try:
+            with open(filename, "rb") as file:
+                if file.readline() != INDEX_MAGIC + b"\n":
+                    return None
+
+                header = json.loads(file.readline())
+
+                if header.get("version") != INDEX_VERSION:
+                    return None
+
+                index = LogIndex(path, header["size"], header["mtime"])
+
+                if not index.is_fresh():
+                    return None
+
+                data = array("Q")
+                data.frombytes(file.read())
+        except (OSError, ValueError):
+            return None
+
+        for name in DIMENSIONS:
+            for value, (start, count) in header["keys"][name].items():
+                index.keys[name][value] = data[start : start + count]
+
+        return index
+
+    def offsets(self, query):
+        """Returns the sorted offsets of the lines that can match the query"""
+        selected = None
+
+        def intersect(candidates):
+            if selected is None:
+                return candidates
+            return selected & candidates
+
+        if query.categories:
+            selected = intersect(self._union("category", query.categories))
+
+        if query.verbosities:
+            selected = intersect(self._union("verbosity", query.verbosities))
+
+        if query.since is not None or query.until is not None:
+            buckets = [b for b in self.keys["bucket"] if query.match_bucket(b)]
+            selected = intersect(self._union("bucket", buckets))
+
+        if selected is None:
+            # Every log line
+            selected = self._union("category", self.keys["category"])
+
+        return sorted(selected)
+
+    def _union(self, name, values):
+        offsets = set()
+
+        for value in values:
+            offsets.update(self.keys[name].get(value, ()))
+
+        return offsets
+
+
+def format_lines(fmt, lines, query):
+    """Format the lines selected by the query"""
+    for line in lines:
+        data = fmt.parse(line)
+
+        if query.match(data):
+            fmt.match_tokens(line, data)
+
+
+def load_or_build(fmt, path):
+    """Returns an up to date index of the file, building it if needed"""
+    index = LogIndex.load(path)
+
+    if index is None:
+        index = LogIndex.build(path, fmt)
+
+        try:
+            index.save()
+        except OSError:
+            # read only folder, the index is still used for this query
+            pass
+
+    return index
+
+
+def query_file(fmt, path, query, index=None):
+    """Format the lines of a file selected by the query.
+
+    With an index only the candidate lines are read, without it the whole file is scanned,
+    compressed files are always scanned.
+    """
+    with open(path, "rb") as file:
+        if index is None:
+            _, stream = open_stream(file)
+            splitter = LineSplitter()
+
+            while True:
+                chunk = stream.read(CHUNK_SIZE)
+
+                if not chunk:
+                    break
+
+                format_lines(fmt, splitter.feed(chunk), query)
+
+            format_lines(fmt, splitter.finish(), query)
+        else:
+            for offset in index.offsets(query):
+                file.seek(offset)
+                format_lines(fmt, split_lines(file.readline()), query)
+
+    fmt.flush()
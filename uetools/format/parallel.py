@@ -0,0 +1,122 @@
+"""Format large log files using several processes.
+
+The file is memory mapped and split at line boundaries, each chunk is decoded
+and tokenized by a worker process. The tokens are merged back in order
+by the formatter of the main process, which keeps the duplicate suppression,
+the summary and the return codes exactly as if the file had been read sequentially.
+"""
+import mmap
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from uetools.format.base import parse_line
+from uetools.format.tokenizer import detect_returncode
+
+# Size of the chunks given to the workers
+CHUNK_SIZE = 8 * 1024 * 1024
+
+
+def chunk_boundaries(view, chunksize=CHUNK_SIZE):
+    """Split a buffer in ranges of roughly ``chunksize`` bytes that end on a newline.
+
+    Splitting right after a newline never cuts a utf-8 sequence or a ``\\r\\n`` in half.
+
+    Examples
+    --------
+
+    >>> chunk_boundaries(b"a\\nbb\\nccc\\nd", chunksize=3)
+    [(0, 5), (5, 9), (9, 10)]
+
+    """
+    size = len(view)
+    ranges = []
+    start = 0
+
+    while start < size:
+        newline = view.find(b"\n", start + chunksize - 1)
+        end = size if newline < 0 else newline + 1
+
+        ranges.append((start, end))
+        start = end
+
+    return ranges
+
+
+def split_lines(data):
+    """Decode a chunk the same way :class:`~uetools.core.run.LineSplitter` does"""
+    text = data.decode("utf-8", errors="replace")
+    text = text.replace("\r\n", "\n").replace("\r", "\n")
+
+    lines = text.split("\n")
+    last = lines.pop()
+    lines = [line + "\n" for line in lines]
+
+    if last:
+        lines.append(last)
+
+    return lines
+
+
+def tokenize_chunk(path, start, end, regex):
+    """Decode and tokenize a range of the file, runs inside a worker process"""
+    with open(path, "rb") as file:
+        file.seek(start)
+        data = file.read(end - start)
+
+    return [
+        (line, parse_line(regex, line), detect_returncode(line))
+        for line in split_lines(data)
+    ]
+
+
+def merge_chunk(fmt, tokens):
+    """Format the tokens of a chunk, in order"""
+    match = fmt.match_tokens
+
+    for line, data, rc in tokens:
+        match(line, data)
+
+        if rc is not None and rc != 0:
+            fmt.return_codes.append(int(rc))
+
+    fmt.flush()
+
+
+def format_file(fmt, path, jobs=None, chunksize=CHUNK_SIZE):
+    """Format a file using ``jobs`` processes, the output is the same as the sequential path"""
+    if jobs is None:
+        jobs = os.cpu_count() or 1
+
+    with open(path, "rb") as file:
+        if os.fstat(file.fileno()).st_size == 0:
+            return
+
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as view:
+            ranges = chunk_boundaries(view, chunksize)
+
+    # Not worth starting the workers
+    if jobs <= 1 or len(ranges) <= 1:
+        for start, end in ranges:
+            merge_chunk(fmt, tokenize_chunk(path, start, end, fmt.regex))
+        return
+
+    # Limit the number of chunks in flight so memory does not grow with the file size
+    pending = deque()
+    ranges = iter(ranges)
+
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        for start, end in ranges:
+            pending.append(pool.submit(tokenize_chunk, path, start, end, fmt.regex))
+
+            if len(pending) >= jobs * 2:
+                break
+
+        while pending:
+            tokens = pending.popleft().result()
+
+            for start, end in ranges:
+                pending.append(pool.submit(tokenize_chunk, path, start, end, fmt.regex))
+                break
+
+            merge_chunk(fmt, tokens)
@@ -0,0 +1,261 @@
+"""Track the progress of a cook from its log.
+
+The package counters of ``LogCook`` and the job counters of the shader compiler
+are extracted as the log is streamed. The throughput is estimated
+over a moving window which gives an ETA that reacts to slowdowns.
+The cook is also split in phases so their duration can be compared between runs.
+"""
+import re
+import time
+from collections import deque
+from datetime import datetime as Datetime
+
+# Seconds of history used to estimate the throughput
+WINDOW = 60
+
+DATETIME_FORMAT = "%Y.%m.%d-%H.%M.%S:%f"
+
+COOKED_PACKAGES = re.compile(
+    r"Cooked packages (?P<done>\d+) Packages Remain (?P<remain>\d+) Total (?P<total>\d+)"
+)
+
+SHADER_JOBS = [
+    re.compile(r"(?P<remain>\d+) (?:shaders?|shader jobs?|jobs?) (?:remaining|left)"),
+    re.compile(r"Jobs assigned (?P<total>\d+), completed (?P<done>\d+)"),
+]
+
+# A phase starts when one of its lines is seen, phases can be skipped but not revisited
+PHASES = [
+    ("global shaders", "LogCook", "Compiling global changed shaders"),
+    ("discovery", "LogCook", "Discovering"),
+    ("cook", "LogCook", "Cooked packages"),
+    ("finalize", "LogCook", "Finishing up"),
+    ("shutdown", "LogExit", "Exiting"),
+]
+
+
+def parse_datetime(value):
+    """Returns the number of seconds since the epoch of a log datetime, None if it is not a date"""
+    try:
+        return Datetime.strptime(value, DATETIME_FORMAT).timestamp()
+    except (TypeError, ValueError):
+        return None
+
+
+def duration(seconds):
+    """Format a duration for humans
+
+    Examples
+    --------
+
+    >>> duration(3725)
+    '1:02:05'
+    >>> duration(65.4)
+    '01:05'
+
+    """
+    seconds = int(seconds)
+    hours, seconds = divmod(seconds, 3600)
+    minutes, seconds = divmod(seconds, 60)
+
+    if hours:
+        return f"{hours}:{minutes:02d}:{seconds:02d}"
+
+    return f"{minutes:02d}:{seconds:02d}"
+
+
+class Counter:
+    """Progress of one kind of work (packages, shaders) with a moving window throughput"""
+
+    def __init__(self, name, window=WINDOW):
+        self.name = name
+        self.window = window
+        self.done = 0
+        self.total = 0
+        self.samples = deque()
+
+    def update(self, now, done, total):
+        self.done = done
+        self.total = total
+
+        if now is None:
+            return
+
+        self.samples.append((now, done))
+
+        while len(self.samples) > 2 and now - self.samples[0][0] > self.window:
+            self.samples.popleft()
+
+    @property
+    def remain(self):
+        return max(self.total - self.done, 0)
+
+    def rate(self):
+        """Items per second over the window, None if unknown"""
+        if len(self.samples) < 2:
+            return None
+
+        (start, first), (end, last) = self.samples[0], self.samples[-1]
+
+        if end <= start:
+            return None
+
+        return (last - first) / (end - start)
+
+    def eta(self):
+        """Seconds until completion, None if unknown"""
+        rate = self.rate()
+
+        if not rate or rate <= 0:
+            return None
+
+        return self.remain / rate
+
+    def status(self):
+        percent = 100 * self.done / self.total if self.total else 0
+        text = f"{self.name} {self.done}/{self.total} ({percent:3.0f}%)"
+
+        rate = self.rate()
+        if rate is not None:
+            text += f" {rate:.1f}/s"
+
+        eta = self.eta()
+        if eta is not None:
+            text += f" ETA {duration(eta)}"
+
+        return text
+
+
+class CookProgress:
+    """Extract progress counters and phases from cook log lines
+
+    Examples
+    --------
+
+    >>> progress = CookProgress()
+    >>> progress.update("2023.02.14-13.00.00:000", "LogCook", " Cooked packages 0 Packages Remain 100 Total 100")
+    True
+    >>> progress.update("2023.02.14-13.00.10:000", "LogCook", " Cooked packages 20 Packages Remain 80 Total 100")
+    True
+    >>> progress.status()
+    'packages 20/100 ( 20%) 2.0/s ETA 00:40'
+
+    """
+
+    def __init__(self, window=WINDOW, clock=time.monotonic):
+        # Time of the lines without datetime, None when replaying a log file
+        self.clock = clock
+        self.packages = Counter("packages", window)
+        self.shaders = Counter("shaders", window)
+        # (name, time) the time is converted only when needed
+        self.phases = [("startup", None)]
+        self.next_phase = 0
+        self.first_seen = None
+        self.last_seen = None
+
+    @staticmethod
+    def seconds(value):
+        """Convert a time recorded by :meth:`touch` to seconds"""
+        if isinstance(value, str):
+            return parse_datetime(value)
+        return value
+
+    def touch(self, datetime):
+        """Record the time of the current line, the datetime of the line is parsed later if needed"""
+        if datetime is not None:
+            # The log header has no datetime, the clock values cannot be compared with the log
+            if self.last_seen is not None and not isinstance(self.last_seen, str):
+                self._drop_clock()
+
+            self.last_seen = datetime
+
+        # Do not mix the clock with the datetimes of the log
+        elif self.clock is not None and not isinstance(self.last_seen, str):
+            self.last_seen = self.clock()
+
+        if self.first_seen is None:
+            self.first_seen = self.last_seen
+
+    def _drop_clock(self):
+        """Forget the times given by the clock, the datetimes of the log are used from now on"""
+        self.first_seen = None
+        self.phases = [
+            (phase, start if isinstance(start, str) else None)
+            for phase, start in self.phases
+        ]
+        self.packages.samples.clear()
+        self.shaders.samples.clear()
+
+    def now(self):
+        return self.seconds(self.last_seen)
+
+    def update(self, datetime, category, message):
+        """Process a line, returns true if a counter changed"""
+        self.touch(datetime)
+        changed = False
+
+        if self.next_phase < len(PHASES):
+            for i, (phase, phase_category, pattern) in enumerate(
+                PHASES[self.next_phase :], start=self.next_phase
+            ):
+                if category == phase_category and pattern in message:
+                    self.phases.append((phase, self.last_seen))
+                    self.next_phase = i + 1
+                    break
+
+        if category == "LogCook":
+            result = COOKED_PACKAGES.search(message)
+
+            if result:
+                total = int(result["total"])
+                self.packages.update(self.now(), total - int(result["remain"]), total)
+                changed = True
+
+        elif category == "LogShaderCompilers":
+            changed = self._update_shaders(message)
+
+        return changed
+
+    def _update_shaders(self, message):
+        for pattern in SHADER_JOBS:
+            result = pattern.search(message)
+
+            if not result:
+                continue
+
+            values = result.groupdict()
+            total = int(
+                values.get("total") or max(self.shaders.total, int(values["remain"]))
+            )
+            done = (
+                int(values["done"])
+                if "done" in values
+                else total - int(values["remain"])
+            )
+
+            self.shaders.update(self.now(), done, total)
+            return True
+
+        return False
+
+    def status(self):
+        """One line summary of the progress"""
+        counters = [c.status() for c in (self.packages, self.shaders) if c.total]
+        return " | ".join(counters)
+
+    def timings(self):
+        """Returns the duration of each phase, in order"""
+        phases = self.phases + [(None, self.last_seen)]
+        timings = []
+
+        # Phases without time started before the first line with a time
+        for (phase, start), (_, stop) in zip(phases, phases[1:]):
+            start = self.seconds(self.first_seen if start is None else start)
+            stop = self.seconds(self.first_seen if stop is None else stop)
+
+            if start is None or stop is None:
+                continue
+
+            timings.append((phase, max(stop - start, 0)))
+
+        return timings
@@ -0,0 +1,324 @@
+"""Build automation test reports while the tests are running.
+
+:class:`~uetools.format.tests.TestFormatter` gives the test events it recognises
+to a :class:`TestReport`, which keeps one :class:`TestCase` per test with its duration,
+result and the warnings/errors logged while it was running.
+
+The reports are written again when a test starts, finishes or logs an error,
+at most every :data:`WRITE_INTERVAL` seconds, and once more when the report is closed.
+A failure, or the first error of a test, is written right away.
+They are replaced atomically so a crash of the editor leaves the report of the tests
+that completed, the test that was running is reported as an error.
+"""
+import json
+import os
+import re
+import time
+from dataclasses import asdict, dataclass, field
+from xml.sax.saxutils import escape, quoteattr
+
+from uetools.format.progress import parse_datetime
+
+TEST_STARTED = re.compile(
+    r"Test Started\. Name=\{(?P<name>[^}]*)\} Path=\{(?P<path>[^}]*)\}"
+)
+TEST_COMPLETED = re.compile(
+    r"Test Completed\. Result=\{(?P<result>[^}]*)\} Name=\{(?P<name>[^}]*)\} Path=\{(?P<path>[^}]*)\}"
+)
+END_EVENTS = re.compile(r"EndEvents: (?P<path>.*)")
+
+# Result of a test that was running when the log stopped
+INCOMPLETE = "Incomplete"
+
+SUCCESS = ("Success", "Passed")
+SKIPPED = ("Skipped", "NotRun", "Not Run")
+
+# Seconds between two writes of the reports while the tests are running
+WRITE_INTERVAL = 5
+
+
+@dataclass
+class TestCase:
+    """Result of a single automation test"""
+
+    # Tell pytest this is not a test
+    __test__ = False
+
+    name: str
+    path: str
+    started: float = None
+    duration: float = None
+    result: str = INCOMPLETE
+    errors: list = field(default_factory=list)
+    warnings: list = field(default_factory=list)
+
+    @property
+    def classname(self):
+        return self.path.rsplit(".", 1)[0] if "." in self.path else self.path
+
+    @property
+    def failed(self):
+        return self.result not in SUCCESS and self.result not in SKIPPED
+
+    def to_junit(self):
+        """Returns the ``<testcase>`` element of this test"""
+        duration = self.duration or 0
+        errors = escape("\n".join(self.errors))
+
+        xml = [
+            (
+                f"    <testcase classname={quoteattr(self.classname)} "
+                f'name={quoteattr(self.name)} time="{duration:.3f}">'
+            )
+        ]
+
+        if self.result == INCOMPLETE:
+            message = quoteattr("Test did not complete")
+            xml.append(f"      <error message={message}>{errors}</error>")
+
+        elif self.result in SKIPPED:
+            xml.append("      <skipped/>")
+
+        elif self.failed:
+            message = quoteattr(self.errors[0] if self.errors else self.result)
+            xml.append(f"      <failure message={message}>{errors}</failure>")
+
+        if self.warnings:
+            warnings = escape("\n".join(self.warnings))
+            xml.append(f"      <system-err>{warnings}</system-err>")
+
+        xml.append("    </testcase>")
+        return "\n".join(xml)
+
+
+def _write_atomic(path, text):
+    tmp = f"{path}.tmp"
+
+    with open(tmp, "w", encoding="utf-8") as file:
+        file.write(text)
+
+    os.replace(tmp, path)
+
+
+class TestReport:
+    """Collect the automation tests found in a log and write them as JUnit XML and JSON
+
+    Parameters
+    ----------
+    junit: str
+        Path of the JUnit XML report
+
+    json: str
+        Path of the JSON report
+
+    clock:
+        Time of the lines without datetime, None to only use the datetimes of the log
+
+    interval:
+        Seconds between two writes of the reports, the final reports are always written
+
+    """
+
+    __test__ = False
+
+    # pylint: disable=redefined-outer-name
+    def __init__(
+        self,
+        junit=None,
+        json=None,
+        name="automation",
+        clock=time.monotonic,
+        interval=WRITE_INTERVAL,
+    ):
+        self.junit = junit
+        self.json = json
+        self.name = name
+        self.clock = clock
+        # A datetime was seen, the clock is not used anymore
+        self._dated = False
+        self.interval = interval
+        self._written = None
+        # Something changed since the reports were written
+        self._pending = False
+        self.tests = []
+        self.current = None
+        # Serialized tests, they do not change once the test finished
+        self._junit_cache = []
+        self._json_cache = []
+
+    def _time(self, datetime):
+        if datetime is not None:
+            # The clock cannot be compared with the log, the running test started on the clock
+            if not self._dated and self.current is not None:
+                self.current.started = None
+
+            self._dated = True
+            return parse_datetime(datetime)
+
+        # Do not mix the clock with the datetimes of the log
+        if self.clock is not None and not self._dated:
+            return self.clock()
+
+        return None
+
+    def update(self, datetime, category, verbosity, message):
+        """Process a log line"""
+        if "Test Started" in message:
+            result = TEST_STARTED.search(message)
+
+            if result:
+                self.finish()
+                self.current = TestCase(result["name"], result["path"])
+                self.current.started = self._time(datetime)
+                self.write()
+                return
+
+        current = self.current
+        if current is None:
+            return
+
+        if "Test Completed" in message:
+            result = TEST_COMPLETED.search(message)
+
+            if result and result["path"] == current.path:
+                current.result = result["result"]
+
+                end = self._time(datetime)
+                if end is not None and current.started is not None:
+                    current.duration = round(max(end - current.started, 0), 3)
+
+                # Failures are written right away, the editor might not survive them
+                if current.failed:
+                    self.write(force=True)
+                return
+
+        if "EndEvents" in message:
+            result = END_EVENTS.search(message)
+
+            if result and result["path"].strip() == current.path:
+                self.finish()
+                return
+
+        if verbosity in ("Error", "Fatal"):
+            current.errors.append(f"{category}: {message.strip()}")
+            # The error might be the last thing logged before a crash,
+            # the errors that follow it are throttled in case of an error storm
+            self.write(force=len(current.errors) == 1)
+
+        elif verbosity == "Warning":
+            current.warnings.append(f"{category}: {message.strip()}")
+
+    def finish(self):
+        """The current test will not receive more events"""
+        if self.current is None:
+            return
+
+        test = self.current
+        self.current = None
+
+        self.tests.append(test)
+        self._junit_cache.append(test.to_junit())
+        self._json_cache.append(json.dumps(self._test_record(test)))
+        self.write()
+
+    @staticmethod
+    def _test_record(test):
+        record = asdict(test)
+        record.pop("started")
+        return record
+
+    def write(self, force=False):
+        """Write the reports, including the test that is still running as incomplete
+
+        The reports are only written if they were not written in the last ``interval`` seconds,
+        unless ``force`` is true.
+        """
+        now = time.monotonic()
+
+        recent = self._written is not None and now - self._written < self.interval
+
+        if recent and not force:
+            self._pending = True
+            return
+
+        self._written = now
+        self._pending = False
+
+        tests = list(self.tests)
+        junit = list(self._junit_cache)
+        records = list(self._json_cache)
+
+        if self.current is not None:
+            tests.append(self.current)
+            junit.append(self.current.to_junit())
+            records.append(json.dumps(self._test_record(self.current)))
+
+        if self.junit is not None:
+            _write_atomic(self.junit, self._junit_document(tests, junit))
+
+        if self.json is not None:
+            _write_atomic(self.json, self._json_document(tests, records))
+
+    def flush(self):
+        """Write the changes that were delayed, if the interval has passed"""
+        if self._pending:
+            self.write()
+
+    def _counts(self, tests):
+        return {
+            "tests": len(tests),
+            "failures": sum(t.failed and t.result != INCOMPLETE for t in tests),
+            "errors": sum(t.result == INCOMPLETE for t in tests),
+            "skipped": sum(t.result in SKIPPED for t in tests),
+            "time": sum(t.duration or 0 for t in tests),
+        }
+
+    def _junit_document(self, tests, junit):
+        counts = self._counts(tests)
+        attributes = (
+            f'tests="{counts["tests"]}" failures="{counts["failures"]}" '
+            f'errors="{counts["errors"]}" skipped="{counts["skipped"]}" time="{counts["time"]:.3f}"'
+        )
+
+        return "\n".join(
+            [
+                '<?xml version="1.0" encoding="utf-8"?>',
+                f"<testsuites {attributes}>",
+                f"  <testsuite name={quoteattr(self.name)} {attributes}>",
+                *junit,
+                "  </testsuite>",
+                "</testsuites>",
+                "",
+            ]
+        )
+
+    def _json_document(self, tests, records):
+        header = json.dumps(dict(name=self.name, **self._counts(tests)))
+        return header[:-1] + ', "testcases": [\n' + ",\n".join(records) + "\n]}\n"
+
+    def extend(self, tests):
+        """Add tests that ran in another process and write the reports"""
+        for test in tests:
+            self.tests.append(test)
+            self._junit_cache.append(test.to_junit())
+            self._json_cache.append(json.dumps(self._test_record(test)))
+
+        self.write(force=True)
+
+    def close(self):
+        """Write the final reports, a test still running at this point did not complete"""
+        self.finish()
+        self.write(force=True)
+
+    def slowest(self, n=10):
+        """Returns the slowest tests"""
+        timed = [t for t in self.tests if t.duration is not None]
+        return sorted(timed, key=lambda t: t.duration, reverse=True)[:n]
+
+
+def load_tests(filename):
+    """Returns the tests of a JSON report written by :class:`TestReport`"""
+    with open(filename, encoding="utf-8") as file:
+        data = json.load(file)
+
+    return [TestCase(**record) for record in data.get("testcases", [])]
@@ -0,0 +1,84 @@
+"""Follow the packages processed by the ``resavepackages`` commandlet.
+
+The commandlet prints ``Loading (n/N) <file>`` before it processes a package,
+the packages named in its errors failed. When the commandlet crashes,
+the package it was processing and the ones it did not reach are failed as well,
+so only those are given to the next attempt.
+
+The commandlet also returns an error when some packages failed to save, it only
+crashed when it did not log its exit.
+"""
+import re
+
+from uetools.format.base import Formatter
+
+LOADING = re.compile(r"Loading \((?P<index>\d+)/(?P<total>\d+)\):?\s+(?P<path>.+?)\s*$")
+
+# Logged by the engine once the commandlet returned
+EXITED = ("Execution of commandlet took", "LogExit: Exiting")
+
+PACKAGE_FILE = re.compile(r"(?P<path>[^\s'\"`]+\.(?:uasset|umap))", re.IGNORECASE)
+
+
+def package_key(path):
+    """Identify a package file the same way, relative or absolute, on every platform
+
+    Examples
+    --------
+
+    >>> package_key("../../../RTSGame/Content/Maps/Arena.umap")
+    'content/maps/arena.umap'
+    >>> package_key("C:\\\\Projects\\\\RTSGame\\\\Content\\\\Maps\\\\Arena.umap")
+    'content/maps/arena.umap'
+
+    """
+    path = path.replace("\\", "/").lower()
+    index = path.rfind("/content/")
+
+    if index < 0:
+        return path
+
+    return path[index + 1 :]
+
+
+class ResaveFormatter(Formatter):
+    """Format the output of ``resavepackages`` and record the packages that failed"""
+
+    def __init__(self, col=None) -> None:
+        super().__init__(col)
+        # Keys of the packages in the order they were loaded
+        self.loaded = []
+        self.failed = set()
+        self.exited = False
+
+    def match_tokens(self, line, data):
+        if any(marker in line for marker in EXITED):
+            self.exited = True
+
+        if data:
+            _, _, _, verbosity, message = data
+
+            if "Loading (" in message:
+                result = LOADING.search(message)
+
+                if result:
+                    self.loaded.append(package_key(result["path"]))
+
+            elif verbosity in ("Error", "Fatal"):
+                for result in PACKAGE_FILE.finditer(message):
+                    self.failed.add(package_key(result["path"]))
+
+        super().match_tokens(line, data)
+
+    def failed_packages(self, packages, returncode):
+        """Returns the packages of this process that need to be resaved again"""
+        keys = {package_key(path): path for path in packages}
+        failed = {keys[key] for key in self.failed if key in keys}
+
+        if returncode != 0 and not self.exited:
+            # It might have crashed while processing the last package it loaded
+            done = set(self.loaded[:-1])
+
+            failed.update(path for key, path in keys.items() if key not in done)
+
+        return [path for path in packages if path in failed]
@@ -0,0 +1,273 @@
+"""Output sinks for the formatters.
+
+The formatters call ``self.print`` for every line they output, by default
+this is the builtin ``print``, a sink can replace it to batch the writes.
+
+:class:`RecordSink` replaces the text output by one machine readable record per line.
+"""
+import json
+import struct
+import sys
+import time
+
+# Flush when that many characters are buffered
+BUFFER_SIZE = 64 * 1024
+
+# Flush when the oldest buffered line is that old (seconds)
+BUFFER_DELAY = 0.1
+
+
+def isatty(stream):
+    try:
+        return stream.isatty()
+    except (AttributeError, ValueError):
+        return False
+
+
+class TerminalSink:
+    """Buffer formatted lines and write them to the terminal in batches.
+
+    The buffer is flushed when it is too big, too old, when a warning or an error
+    is printed or when :meth:`flush` is called.
+
+    Parameters
+    ----------
+    stream:
+        Stream to write to, defaults to the current ``sys.stdout``
+
+    color: bool
+        Colorize warnings and errors, defaults to true when writing to a terminal
+
+    Examples
+    --------
+
+    >>> import io
+    >>> out = io.StringIO()
+    >>> sink = TerminalSink(out)
+    >>> sink.print("[  0][L][LogInit] buffered")
+    >>> out.getvalue()
+    ''
+    >>> sink.print("[  0][E][LogInit] errors are written right away", flush=True)
+    >>> print(out.getvalue(), end="")
+    [  0][L][LogInit] buffered
+    [  0][E][LogInit] errors are written right away
+
+    """
+
+    def __init__(self, stream=None, color=None, size=BUFFER_SIZE, delay=BUFFER_DELAY):
+        self._stream = stream
+        self.color = isatty(self.stream) if color is None else color
+        self.max_size = size
+        self.max_delay = delay
+        self.buffer = []
+        self.size = 0
+        self.first_write = None
+
+    @property
+    def stream(self):
+        # Resolve stdout late, it can be replaced while we are running
+        if self._stream is None:
+            return sys.stdout
+        return self._stream
+
+    # pylint: disable=redefined-builtin
+    def print(self, *args, sep=" ", end="\n", file=None, flush=False):
+        """Same signature as the builtin print so it can replace it"""
+        if len(args) == 1:
+            text = str(args[0])
+        else:
+            text = sep.join(str(arg) for arg in args)
+
+        # Lines for another stream are not buffered, what was printed before goes first
+        if file is not None and file is not self.stream:
+            self.flush()
+            file.write(text + end)
+            file.flush()
+            return
+
+        self.buffer.append(text)
+        self.buffer.append(end)
+        self.size += len(text) + len(end)
+
+        now = time.monotonic()
+        if self.first_write is None:
+            self.first_write = now
+
+        if (
+            flush
+            or self.size >= self.max_size
+            or now - self.first_write >= self.max_delay
+        ):
+            self.flush()
+
+    def flush(self):
+        """Write everything that was buffered"""
+        if not self.buffer:
+            return
+
+        stream = self.stream
+        stream.write("".join(self.buffer))
+        stream.flush()
+
+        self.buffer = []
+        self.size = 0
+        self.first_write = None
+
+
+class PrefixSink:
+    """Prefix the lines of a formatter and send them to a shared sink,
+    used when the output of several processes is interleaved
+
+    Examples
+    --------
+
+    >>> import io
+    >>> out = io.StringIO()
+    >>> shared = TerminalSink(out)
+    >>> server, client = PrefixSink(shared, "server| "), PrefixSink(shared, "client| ")
+    >>> server.print("[  0][L][LogNet] listening")
+    >>> client.print("  - ", end="")
+    >>> client.print("[  0][L][LogNet] connected")
+    >>> shared.flush()
+    >>> print(out.getvalue(), end="")
+    server| [  0][L][LogNet] listening
+    client|   - [  0][L][LogNet] connected
+
+    """
+
+    def __init__(self, sink, prefix):
+        self.sink = sink
+        self.prefix = prefix
+        self.color = sink.color
+        self.line_start = True
+
+    # pylint: disable=redefined-builtin
+    def print(self, *args, sep=" ", end="\n", file=None, flush=False):
+        text = sep.join(str(arg) for arg in args)
+
+        if self.line_start:
+            text = self.prefix + text
+
+        self.line_start = end.endswith("\n")
+        self.sink.print(text, end=end, file=file, flush=flush)
+
+    def flush(self):
+        self.sink.flush()
+
+
+def _jsonl_encoder():
+    encode = json.JSONEncoder(ensure_ascii=False, separators=(",", ":")).encode
+
+    def encode_record(record):
+        return (encode(record) + "\n").encode("utf-8")
+
+    return encode_record
+
+
+def _msgpack_encoder():
+    # Only needed for this output format
+    import msgpack
+
+    pack = msgpack.Packer().pack
+
+    def encode_record(record):
+        payload = pack(record)
+        return struct.pack(">I", len(payload)) + payload
+
+    return encode_record
+
+
+# Supported record formats
+RECORD_FORMATS = {
+    "jsonl": _jsonl_encoder,
+    "msgpack": _msgpack_encoder,
+}
+
+
+class RecordSink:
+    """Write one record per log line, as JSON Lines or length prefixed msgpack.
+
+    msgpack records are prefixed by their size as a 4 bytes big endian integer.
+    The records are buffered like :class:`TerminalSink` does.
+
+    Parameters
+    ----------
+    stream:
+        Binary stream to write to, defaults to the current ``sys.stdout.buffer``
+
+    format: str
+        ``jsonl`` or ``msgpack``
+
+    process: str
+        Added to every record as ``process``, to tell processes apart
+
+    Examples
+    --------
+
+    >>> import io
+    >>> out = io.BytesIO()
+    >>> sink = RecordSink(out)
+    >>> sink.write(dict(category="LogInit", verbosity="Log", message="été"))
+    >>> sink.flush()
+    >>> print(out.getvalue().decode("utf-8"), end="")
+    {"category":"LogInit","verbosity":"Log","message":"été"}
+
+    """
+
+    # pylint: disable=redefined-builtin
+    def __init__(
+        self,
+        stream=None,
+        format="jsonl",
+        size=BUFFER_SIZE,
+        delay=BUFFER_DELAY,
+        process=None,
+    ):
+        if format not in RECORD_FORMATS:
+            raise ValueError(f"Unknown record format {format}")
+
+        self._stream = stream
+        self.format = format
+        self.encode = RECORD_FORMATS[format]()
+        # Name of the process the records come from, when several are running
+        self.process = process
+        self.max_size = size
+        self.max_delay = delay
+        self.buffer = bytearray()
+        self.first_write = None
+
+    @property
+    def stream(self):
+        if self._stream is None:
+            return sys.stdout.buffer
+        return self._stream
+
+    def write(self, record, flush=False):
+        """Encode a record and buffer it"""
+        if self.process is not None:
+            record["process"] = self.process
+
+        self.buffer += self.encode(record)
+
+        now = time.monotonic()
+        if self.first_write is None:
+            self.first_write = now
+
+        if (
+            flush
+            or len(self.buffer) >= self.max_size
+            or now - self.first_write >= self.max_delay
+        ):
+            self.flush()
+
+    def flush(self):
+        """Write everything that was buffered"""
+        if not self.buffer:
+            return
+
+        stream = self.stream
+        stream.write(self.buffer)
+        stream.flush()
+
+        self.buffer = bytearray()
+        self.first_write = None
@@ -0,0 +1,213 @@
+"""Bounded containers used by the formatters to remember what they have seen.
+
+A cook can run for hours and print millions of lines, the formatters
+should not grow with the size of the log.
+"""
+from dataclasses import dataclass, field
+
+# Rough cost of a fingerprint inside a set (int object + set slot)
+FINGERPRINT_SIZE = 80
+
+# Default memory budget of the duplicate suppression
+DEFAULT_FINGERPRINT_MEMORY = 16 * 1024 * 1024
+
+# Default number of unique warnings/errors kept for the summary
+DEFAULT_TABLE_CAPACITY = 4096
+
+# Distinct messages kept as examples of a cluster
+DEFAULT_EXAMPLES = 3
+
+
+class FingerprintStore:
+    """Remember fingerprints of the lines seen recently, using a bounded amount of memory.
+
+    Fingerprints are kept in two generations, when the young generation is full
+    the old one is dropped and the young one becomes old.
+    Lookups check both generations so at least ``capacity / 2`` of the most recent
+    fingerprints are always remembered.
+
+    Parameters
+    ----------
+    max_memory: int
+        Memory budget in bytes
+
+    policy: str
+        ``lru`` refreshes a fingerprint every time it is seen,
+        ``fifo`` forgets fingerprints in the order they were inserted
+
+    Examples
+    --------
+
+    >>> store = FingerprintStore(capacity=4, policy="fifo")
+    >>> for fingerprint in range(5):
+    ...     store.add(fingerprint)
+    >>> 0 in store, 2 in store, 4 in store
+    (False, True, True)
+
+    """
+
+    def __init__(
+        self, max_memory=DEFAULT_FINGERPRINT_MEMORY, policy="lru", capacity=None
+    ):
+        if policy not in ("lru", "fifo"):
+            raise ValueError(f"Unknown eviction policy {policy}")
+
+        if capacity is None:
+            capacity = max_memory // FINGERPRINT_SIZE
+
+        self.policy = policy
+        self.generation_size = max(capacity // 2, 1)
+        self.young = set()
+        self.old = set()
+        self.evicted = 0
+
+    def __contains__(self, fingerprint):
+        if fingerprint in self.young:
+            return True
+
+        if fingerprint in self.old:
+            if self.policy == "lru":
+                self.add(fingerprint)
+            return True
+
+        return False
+
+    def __len__(self):
+        return len(self.young) + len(self.old)
+
+    def add(self, fingerprint):
+        """Insert a new fingerprint, evicting the oldest generation if needed"""
+        if len(self.young) >= self.generation_size:
+            self.evicted += len(self.old)
+            self.old = self.young
+            self.young = set()
+
+        self.young.add(fingerprint)
+
+    def clear(self):
+        self.young = set()
+        self.old = set()
+
+
+@dataclass
+class LogCount:
+    """One unique warning/error and how many times it was seen"""
+
+    line: object
+    count: int = 1
+    first_frame: str = None
+    last_frame: str = None
+    # Distinct instances of the line, when lines are grouped by fingerprint
+    examples: list = field(default_factory=list)
+
+
+class LogTable:
+    """Count occurrences of unique log lines, keeping a single record per line.
+
+    When the table is full, the half with the lowest counts is evicted,
+    their occurrences are still accounted for in ``evicted``.
+
+    Examples
+    --------
+
+    >>> table = LogTable(capacity=2)
+    >>> for msg in ["a", "b", "a", "c", "a"]:
+    ...     table.add(msg, msg, frame=None)
+    >>> [(c.line, c.count) for c in table.top()]
+    [('a', 3), ('c', 1)]
+    >>> table.total, table.evicted
+    (5, 1)
+
+    """
+
+    def __init__(self, capacity=DEFAULT_TABLE_CAPACITY, examples=DEFAULT_EXAMPLES):
+        self.capacity = capacity
+        self.max_examples = examples
+        self.records = {}
+        self.total = 0
+        self.evicted = 0
+
+    def __len__(self):
+        return len(self.records)
+
+    def __iter__(self):
+        return iter(self.records.values())
+
+    def add(self, key, line, frame=None, example=None):
+        """Count an occurrence of ``line``, ``key`` identifies the unique line.
+
+        ``example`` is remembered if it is different from the examples seen so far
+        """
+        self.total += 1
+        record = self.records.get(key)
+
+        if record is not None:
+            record.count += 1
+            record.last_frame = frame
+
+            examples = record.examples
+            if (
+                example is not None
+                and len(examples) < self.max_examples
+                and example not in examples
+            ):
+                examples.append(example)
+            return
+
+        if len(self.records) >= self.capacity:
+            self._evict()
+
+        examples = [] if example is None else [example]
+        self.records[key] = LogCount(line, 1, frame, frame, examples)
+
+    def merge(self, other):
+        """Add the counts of another table, combines the summaries of several processes"""
+        for key, record in other.records.items():
+            mine = self.records.get(key)
+
+            if mine is None:
+                if len(self.records) >= self.capacity:
+                    self._evict()
+
+                self.records[key] = LogCount(
+                    record.line,
+                    record.count,
+                    record.first_frame,
+                    record.last_frame,
+                    list(record.examples),
+                )
+                continue
+
+            mine.count += record.count
+            mine.last_frame = record.last_frame
+
+            for example in record.examples:
+                if len(mine.examples) >= self.max_examples:
+                    break
+
+                if example not in mine.examples:
+                    mine.examples.append(example)
+
+        self.total += other.total
+        self.evicted += other.evicted
+
+    def _evict(self):
+        counts = sorted(self.records.items(), key=lambda item: item[1].count)
+
+        for key, record in counts[: max(len(counts) // 2, 1)]:
+            self.evicted += record.count
+            del self.records[key]
+
+    def top(self, n=None):
+        """Returns the records sorted by count, most frequent first"""
+        records = sorted(self.records.values(), key=lambda r: r.count, reverse=True)
+
+        if n is not None:
+            return records[:n]
+
+        return records
+
+    def clear(self):
+        self.records = {}
+        self.total = 0
+        self.evicted = 0
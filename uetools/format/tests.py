@@ -1,4 +1,5 @@
-from uetools.format.base import Formatter, colored
+from uetools.format.base import Formatter
+from uetools.format.report import TestReport
 
 
 class TestFormatter(Formatter):
@@ -9,6 +10,59 @@ class TestFormatter(Formatter):
         self.indent = 0
         self.allow_everything = False
         self.iterating_overlist = False
+        self.report = None
+
+    def use_report(self, junit=None, json=None):
+        """Collect the results of the tests and write them to JUnit XML and/or JSON"""
+        self.report = TestReport(junit, json)
+        return self.report
+
+    def match_tokens(self, line, data):
+        # Before the duplicate lines are removed, each test gets all its warnings
+        if data and self.report is not None:
+            datetime, _, category, verbosity, message = data
+            self.report.update(datetime, category, verbosity, message)
+
+        super().match_tokens(line, data)
+
+    def flush(self):
+        if self.report is not None:
+            self.report.flush()
+
+        super().flush()
+
+    def summary(self, top=None):
+        """Print the warnings and errors followed by the slowest tests"""
+        if self.report is not None:
+            # A test still running at this point did not complete
+            self.report.close()
+
+        super().summary(top)
+
+        if self.records is not None or self.report is None:
+            return
+
+        slowest = self.report.slowest()
+        if not slowest:
+            return
+
+        self.print(f"    Slowest tests ({len(self.report.tests)} tests)")
+        self.print("=" * 80)
+        for test in slowest:
+            self.print(f"  {test.duration:>9.3f}s  {test.result:<10}  {test.path}")
+
+        self.print("=" * 80)
+        self.flush()
+
+    def summary_record(self, top):
+        record = super().summary_record(top)
+
+        if self.report is not None:
+            record["tests"] = [
+                {"path": test.path, "result": test.result, "duration": test.duration}
+                for test in self.report.tests
+            ]
+        return record
 
     def default_format(self, *args, **kwargs):
         """Default format function"""
@@ -46,7 +100,7 @@ class TestFormatter(Formatter):
         # Tests
         # -----
         if "Test Started" in message:
-            message = ">" + colored(message, "blue", attrs=["bold"])
+            message = ">" + self.colored(message, "blue", attrs=["bold"])
             self.indent += 4
             self.iterating_overlist = False
             self.allow_everything = True
@@ -58,9 +112,9 @@ class TestFormatter(Formatter):
             self.allow_everything = False
 
             if "Success" in message:
-                message = "<" + colored(message, "green")
+                message = "<" + self.colored(message, "green")
             else:
-                message = "<" + colored(message, "red")
+                message = "<" + self.colored(message, "red")
 
             self.default_format(datetime, frame, category, verbosity, message)
             return
@@ -86,3 +140,30 @@ class TestFormatter(Formatter):
 
         message = " " * self.indent + message.strip()
         self.default_format(datetime, frame, category, verbosity, message)
+
+
+class TestListFormatter(Formatter):
+    """Collect the tests printed by ``Automation List``"""
+
+    # Tell pytest this is not a test
+    __test__ = False
+
+    def __init__(self, col=None) -> None:
+        super().__init__(col)
+        self.listing = False
+        self.tests = []
+
+    def match_tokens(self, line, data):
+        if data:
+            _, _, category, _, message = data
+
+            if "automation tests based on" in message.lower():
+                self.listing = True
+
+            elif self.listing and category == "LogAutomationCommandLine":
+                name = message.strip()
+
+                if name and " " not in name:
+                    self.tests.append(name)
+
+        super().match_tokens(line, data)
@@ -0,0 +1,118 @@
+"""Single pass tokenizer for unreal engine log lines.
+
+This is a string scanning replacement for ``UE_LOG_FORMAT.search`` and the
+``ERROR_PATERNS`` loop that :class:`~uetools.format.base.Formatter` used to run on every line.
+It produces the exact same fields as the regex, but the timestamp is found by
+scanning the line with ``str`` methods instead of backtracking through the greedy ``datetime`` group,
+and the rest of the line is matched by an anchored pattern that never has to search.
+
+Examples
+--------
+
+>>> tokenize("[2023.02.14-13.44.00:123][  0]LogConfig: Display: Loading Android ini files\\n")
+('2023.02.14-13.44.00:123', '0', 'LogConfig', 'Display', ' Loading Android ini files')
+
+>>> tokenize("LogWindows: File 'aqProf.dll' does not exist")
+(None, None, 'LogWindows', None, "File 'aqProf.dll' does not exist")
+
+>>> tokenize("Took 43.0452803s to run dotnet, ExitCode=0") is None
+True
+
+>>> detect_returncode("AutomationTool exiting with ExitCode=139 (139)")
+'139'
+
+>>> detect_returncode("LogCook: Display: Cooked packages 12") is None
+True
+
+"""
+import re
+
+# Lines printed by UAT when it fails, the return code is forwarded to our caller
+UAT_ERROR_1 = re.compile(
+    r"^RunUAT ERROR: AutomationTool was unable to run successfully. Exited with code: (?P<returncode>[0-9]*)"
+)
+UAT_ERROR_2 = re.compile(
+    r"^AutomationTool exiting with ExitCode=(?P<returncode>[0-9]*) \((?P<message>[a-zA-Z0-9]*)\)"
+)
+
+# Cheap literal test that need to pass before the expensive pattern is tried
+ERROR_PREFIXES = [
+    ("RunUAT ERROR", UAT_ERROR_1),
+    ("AutomationTool exiting", UAT_ERROR_2),
+]
+
+_ERROR_STARTS = tuple(prefix for prefix, _ in ERROR_PREFIXES)
+
+
+# Everything after the timestamp, it is anchored and cannot backtrack
+# so it is only used once the start of the category is known
+LOG_MESSAGE = re.compile(
+    r"(?P<category>[A-Za-z]*): (?:(?P<verbosity>[A-Za-z]*):)?(?P<message>.*)"
+)
+
+# Order of the fields returned by the tokenizer
+FIELDS = ("datetime", "frame", "category", "verbosity", "message")
+
+_NO_TIMESTAMP = (None, None)
+
+
+def tokenize(line):
+    """Split a log line into a tuple of datetime, frame, category, verbosity and message.
+
+    Returns None if the line does not follow the unreal engine log format,
+    the fields are the same as the groups of ``UE_LOG_FORMAT``.
+    """
+    if not line.startswith("["):
+        # Without the timestamp the category has to start the line
+        result = LOG_MESSAGE.match(line)
+
+        if result is None:
+            return None
+
+        return _NO_TIMESTAMP + result.groups()
+
+    # Like ``.`` in the regex, nothing goes past the end of the line
+    size = line.find("\n")
+    if size < 0:
+        size = len(line)
+
+    # The datetime group is greedy, the right most ``][``
+    # that produces a valid line wins
+    end = size
+
+    while True:
+        end = line.rfind("][", 1, end)
+
+        if end < 0:
+            # An empty category would need the line to start with ": "
+            return None
+
+        # ``][\\s*(?P<frame>\\d*)]``, the first ``]`` is the one closing the frame
+        close = line.find("]", end + 2)
+
+        if close >= 0:
+            frame = line[end + 2 : close].lstrip()
+
+            if not frame or frame.isdecimal():
+                result = LOG_MESSAGE.match(line, close + 1)
+
+                if result is not None:
+                    return (line[1:end], frame) + result.groups()
+
+        # Look for a ``][`` that starts before this one
+        end += 1
+
+
+def detect_returncode(line):
+    """Returns the return code reported by UAT if the line is an error line"""
+    if not line.startswith(_ERROR_STARTS):
+        return None
+
+    for prefix, pattern in ERROR_PREFIXES:
+        if line.startswith(prefix):
+            result = pattern.search(line)
+
+            if result:
+                return result.groupdict().get("returncode", 0)
+
+    return None
@@ -0,0 +1,80 @@
+from uetools.format.actions import ActionTimeline
+from uetools.format.base import Formatter
+
+
+class UBTFormatter(Formatter):
+    """Format UnrealBuildTool output and time the actions it executes"""
+
+    def __init__(self, col=None) -> None:
+        super().__init__(col)
+        self.timeline = ActionTimeline()
+        self.trace = None
+        self.slowest_count = 10
+
+    def use_trace(self, trace):
+        """Write the timeline of the actions to a Chrome trace when the summary is shown"""
+        self.trace = trace
+
+    def match_tokens(self, line, data):
+        # Actions are not UE log lines
+        if data is None:
+            self.timeline.update(line)
+
+        super().match_tokens(line, data)
+
+    def summary(self, top=None):
+        """Print the warnings and errors followed by the slowest actions"""
+        if self.trace is not None and self.timeline.timed:
+            self.timeline.save_trace(self.trace)
+
+        super().summary(top)
+
+        if self.records is not None:
+            return
+
+        timeline = self.timeline
+        if not timeline.timed:
+            return
+
+        occupancy = timeline.occupancy()
+        occupancy = "" if occupancy is None else f", {100 * occupancy:.0f}% busy"
+
+        self.print(
+            f"    Actions ({len(timeline.actions)} actions, {len(timeline.lanes)} lanes, "
+            f"{timeline.wall_time():.1f} s{occupancy})"
+        )
+        self.print("=" * 80)
+
+        for category, title in (
+            ("compile", "Slowest compiles"),
+            ("link", "Slowest links"),
+        ):
+            slowest = timeline.slowest(category, self.slowest_count)
+            if not slowest:
+                continue
+
+            self.print(f"  {title}")
+            for action in slowest:
+                self.print(
+                    f"  {action.duration:>9.3f}s  {action.kind:<10}  {action.target}"
+                )
+
+        if self.trace is not None:
+            self.print(f"  Trace saved to {self.trace}")
+
+        self.print("=" * 80)
+        self.flush()
+
+    def summary_record(self, top):
+        record = super().summary_record(top)
+        record["actions"] = [
+            {
+                "index": action.index,
+                "kind": action.kind,
+                "target": action.target,
+                "lane": action.lane,
+                "duration": action.duration,
+            }
+            for action in self.timeline.actions
+        ]
+        return record